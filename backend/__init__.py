@@ -3,7 +3,10 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from .config.config import Config
 from .models import db
+from .utils.document_storage import document_storage
 from .utils.email_service import mail
+from .utils.response_cache import response_cache
+from .utils.user_columns import user_columns
 import os
 
 def create_app():
@@ -13,10 +16,13 @@ def create_app():
     app.config.from_object(Config)
 
     # Initialize extensions
-    CORS(app)
+    CORS(app, expose_headers=['X-Next-Cursor'])
     db.init_app(app)
     JWTManager(app)
     mail.init_app(app)
+    document_storage.init_app(app)
+    response_cache.init_app(app)
+    user_columns.init_app(app)
 
     # Create tables if they don't exist
     with app.app_context():
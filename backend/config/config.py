@@ -40,4 +40,39 @@ class Config:
         import secrets
         print("⚠️ WARNING: Using generated secret key. Set SECRET_KEY in Replit Secrets for production!")
         SECRET_KEY = secrets.token_hex(32)
-    DEBUG = os.getenv('FLASK_ENV') == 'development'
\ No newline at end of file
+    DEBUG = os.getenv('FLASK_ENV') == 'development'
+
+    # Seconds a cached analytics response stays valid before recomputation
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+
+    # Seconds between full rebuilds of the in-memory user analytics columns;
+    # bounds drift from user writes made outside this app
+    USER_COLUMNS_MAX_AGE = int(os.getenv('USER_COLUMNS_MAX_AGE', 300))
+
+    # Directory where generated department reports are written
+    REPORTS_DIR = os.getenv('REPORTS_DIR') or os.path.join(BASE_DIR, 'reports')
+
+    # Where profile views read attendance from: 'aggregate' (AttendanceRecord
+    # counts) or 'bitmap' (AttendanceBitmap)
+    ATTENDANCE_STORE = os.getenv('ATTENDANCE_STORE', 'aggregate')
+
+    # Directory holding uploaded student documents (content-addressed by SHA-256)
+    DOCUMENTS_DIR = os.getenv('DOCUMENTS_DIR') or os.path.join(BASE_DIR, 'documents')
+
+    # Largest document accepted, in bytes
+    MAX_DOCUMENT_SIZE = int(os.getenv('MAX_DOCUMENT_SIZE', 25 * 1024 * 1024))
+
+    # Hours an unfinished resumable upload is kept before it is discarded
+    DOCUMENT_UPLOAD_TTL_HOURS = int(os.getenv('DOCUMENT_UPLOAD_TTL_HOURS', 24))
+
+    # Seconds a signed document download URL stays valid
+    DOCUMENT_URL_TTL = int(os.getenv('DOCUMENT_URL_TTL', 300))
+
+    # Hand document downloads to the front-end server: 'x-accel-redirect'
+    # (nginx), 'x-sendfile' (Apache, lighttpd) or empty to serve them here
+    DOCUMENT_SENDFILE = os.getenv('DOCUMENT_SENDFILE', '')
+    # nginx internal location aliased to DOCUMENTS_DIR, for X-Accel-Redirect
+    DOCUMENT_ACCEL_PREFIX = os.getenv('DOCUMENT_ACCEL_PREFIX', '/protected-documents/')
+
+    # Minutes a reviewer's claim on a batch of queued documents lasts
+    DOCUMENT_CLAIM_TTL_MINUTES = int(os.getenv('DOCUMENT_CLAIM_TTL_MINUTES', 15))
\ No newline at end of file
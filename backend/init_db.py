@@ -14,7 +14,7 @@ def init_database():
         print("Creating database tables...")
         db.create_all()
         print("Database tables created successfully!")
-        print("Tables created: users, verification_codes")
+        print("Tables created: " + ", ".join(sorted(db.metadata.tables)))
 
 if __name__ == '__main__':
     init_database()
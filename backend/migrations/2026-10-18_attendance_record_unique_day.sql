@@ -0,0 +1,27 @@
+-- Migration: one attendance mark per student, subject and day
+-- The CSV import upserts on this key. Databases created before it may
+-- hold repeated marks, so those are collapsed first, keeping the most
+-- recently inserted row. create_all() builds new tables with the
+-- constraint already.
+-- Up
+DELETE FROM attendance_record older
+USING attendance_record newer
+WHERE older.student_profile_id = newer.student_profile_id
+  AND older.subject_code = newer.subject_code
+  AND older.date = newer.date
+  AND older.id < newer.id;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_attendance_record_student_subject_date') THEN
+    ALTER TABLE attendance_record
+      ADD CONSTRAINT uq_attendance_record_student_subject_date UNIQUE (student_profile_id, subject_code, date);
+  END IF;
+END $$;
+
+-- The delete above bypasses the ORM hooks that keep attendance_aggregate
+-- in step; rebuild it afterwards:
+--   python backend/scripts/rebuild_attendance.py
+
+-- Down (manual)
+-- ALTER TABLE attendance_record DROP CONSTRAINT IF EXISTS uq_attendance_record_student_subject_date;
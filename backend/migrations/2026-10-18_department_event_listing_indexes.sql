@@ -0,0 +1,12 @@
+-- Migration: indexes for the keyset-paginated event listing
+-- The listing filters by status or department and orders by start date.
+-- create_all() builds new tables with these already.
+-- Up
+CREATE INDEX IF NOT EXISTS ix_department_event_status_start_date
+  ON department_event (status, start_date);
+CREATE INDEX IF NOT EXISTS ix_department_event_department_start_date
+  ON department_event (department, start_date);
+
+-- Down (manual)
+-- DROP INDEX IF EXISTS ix_department_event_department_start_date;
+-- DROP INDEX IF EXISTS ix_department_event_status_start_date;
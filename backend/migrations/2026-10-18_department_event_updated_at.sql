@@ -0,0 +1,12 @@
+-- Migration: change stamp on department events for calendar feed versions
+-- For databases whose department_event table predates the calendar feeds;
+-- create_all() builds new tables with this already.
+-- Up
+ALTER TABLE department_event
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+
+-- Existing events get one stamp, so every feed's version moves once
+UPDATE department_event SET updated_at = (now() AT TIME ZONE 'utc') WHERE updated_at IS NULL;
+
+-- Down (manual)
+-- ALTER TABLE department_event DROP COLUMN IF EXISTS updated_at;
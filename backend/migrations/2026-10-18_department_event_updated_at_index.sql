@@ -0,0 +1,10 @@
+-- Migration: index for incremental reads of changed events
+-- The venue schedule and the reminder scheduler poll for events whose
+-- updated_at moved. Run after 2026-10-18_department_event_updated_at.sql.
+-- create_all() builds new tables with this already.
+-- Up
+CREATE INDEX IF NOT EXISTS ix_department_event_updated_at
+  ON department_event (updated_at);
+
+-- Down (manual)
+-- DROP INDEX IF EXISTS ix_department_event_updated_at;
@@ -0,0 +1,14 @@
+-- Migration: content-addressed document storage columns
+-- create_all() builds new tables (document_upload included) with these already.
+-- Up
+ALTER TABLE document ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE document ADD COLUMN IF NOT EXISTS file_size BIGINT;
+ALTER TABLE document ADD COLUMN IF NOT EXISTS content_type VARCHAR(100);
+CREATE INDEX IF NOT EXISTS ix_document_content_hash
+  ON document (content_hash);
+
+-- Down (manual)
+-- DROP INDEX IF EXISTS ix_document_content_hash;
+-- ALTER TABLE document DROP COLUMN IF EXISTS content_type;
+-- ALTER TABLE document DROP COLUMN IF EXISTS file_size;
+-- ALTER TABLE document DROP COLUMN IF EXISTS content_hash;
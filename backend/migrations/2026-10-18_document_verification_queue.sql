@@ -0,0 +1,22 @@
+-- Migration: verification queue lease columns and indexes on document
+-- The queue walks unverified documents oldest first, optionally of one
+-- type, and a reviewer's batch is found again by its claim token.
+-- create_all() builds new tables with these already.
+-- Up
+ALTER TABLE document ADD COLUMN IF NOT EXISTS claimed_by INTEGER REFERENCES "user" (id);
+ALTER TABLE document ADD COLUMN IF NOT EXISTS claim_expires_at TIMESTAMP;
+ALTER TABLE document ADD COLUMN IF NOT EXISTS claim_token VARCHAR(32);
+CREATE INDEX IF NOT EXISTS ix_document_claim_token
+  ON document (claim_token);
+CREATE INDEX IF NOT EXISTS ix_document_verified_upload_date
+  ON document (verified, upload_date, id);
+CREATE INDEX IF NOT EXISTS ix_document_verified_type_upload_date
+  ON document (verified, document_type, upload_date, id);
+
+-- Down (manual)
+-- DROP INDEX IF EXISTS ix_document_verified_type_upload_date;
+-- DROP INDEX IF EXISTS ix_document_verified_upload_date;
+-- DROP INDEX IF EXISTS ix_document_claim_token;
+-- ALTER TABLE document DROP COLUMN IF EXISTS claim_token;
+-- ALTER TABLE document DROP COLUMN IF EXISTS claim_expires_at;
+-- ALTER TABLE document DROP COLUMN IF EXISTS claimed_by;
@@ -0,0 +1,21 @@
+-- Migration: seat counter and waitlist index for capacity-limited event registration
+-- For databases whose department_event and event_participants tables
+-- predate the waitlist; create_all() builds new tables with these already.
+-- Up
+ALTER TABLE department_event
+  ADD COLUMN IF NOT EXISTS seats_taken INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill the counter from pending and approved participations
+-- (the same as backend.utils.event_registration.recount_seats())
+UPDATE department_event e
+SET seats_taken = (
+  SELECT count(*) FROM event_participants p
+  WHERE p.event_id = e.id AND p.approval_status IN ('pending', 'approved')
+);
+
+CREATE INDEX IF NOT EXISTS ix_event_participants_event_status_registered
+  ON event_participants (event_id, approval_status, registration_date);
+
+-- Down (manual)
+-- DROP INDEX IF EXISTS ix_event_participants_event_status_registered;
+-- ALTER TABLE department_event DROP COLUMN IF EXISTS seats_taken;
@@ -0,0 +1,8 @@
+-- Migration: index for the student dashboard's profile lookup by user
+-- create_all() builds new tables with this already.
+-- Up
+CREATE INDEX IF NOT EXISTS ix_student_profile_user_id
+  ON student_profile (user_id);
+
+-- Down (manual)
+-- DROP INDEX IF EXISTS ix_student_profile_user_id;
@@ -0,0 +1,8 @@
+-- Migration: index for per-subject result analytics
+-- create_all() builds new tables with this already.
+-- Up
+CREATE INDEX IF NOT EXISTS ix_subject_record_subject_code
+  ON subject_record (subject_code);
+
+-- Down (manual)
+-- DROP INDEX IF EXISTS ix_subject_record_subject_code;
@@ -0,0 +1,26 @@
+-- Migration: one result per subject per semester record
+-- Result imports upsert on this key. Databases created before it may
+-- hold repeated results, so those are collapsed first, keeping the
+-- most recently inserted row. create_all() builds new tables with the
+-- constraint already.
+-- Up
+DELETE FROM subject_record older
+USING subject_record newer
+WHERE older.semester_record_id = newer.semester_record_id
+  AND older.subject_code = newer.subject_code
+  AND older.id < newer.id;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_subject_record_semester_subject') THEN
+    ALTER TABLE subject_record
+      ADD CONSTRAINT uq_subject_record_semester_subject UNIQUE (semester_record_id, subject_code);
+  END IF;
+END $$;
+
+-- SGPA/CGPA were computed with the duplicates counted; recompute them
+-- afterwards:
+--   python backend/scripts/import_results.py --recompute
+
+-- Down (manual)
+-- ALTER TABLE subject_record DROP CONSTRAINT IF EXISTS uq_subject_record_semester_subject;
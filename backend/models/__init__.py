@@ -0,0 +1,10 @@
+from flask_sqlalchemy import SQLAlchemy
+
+# The one SQLAlchemy instance behind every model in this package
+db = SQLAlchemy()
+
+# The auth API's accounts. The DCSA models have their own integer-keyed
+# User in backend.models.user; the auth classes carry distinct names so
+# relationship('User') strings there stay unambiguous.
+from .auth import AuthUser as User, AuthVerificationCode as VerificationCode  # noqa: E402
+from . import user, dcsa, profile, student  # noqa: E402,F401
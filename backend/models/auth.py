@@ -1,10 +1,11 @@
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
 import bcrypt
 
-db = SQLAlchemy()
+from . import db
 
-class User(db.Model):
+# Login accounts for the auth API, in the ``users`` table shared with the
+# Node server. Exported from ``backend.models`` as ``User``.
+class AuthUser(db.Model):
     __tablename__ = 'users'
     
     id = db.Column(db.String(36), primary_key=True, server_default=db.text('gen_random_uuid()'))
@@ -48,7 +49,7 @@ class User(db.Model):
         }
 
 
-class VerificationCode(db.Model):
+class AuthVerificationCode(db.Model):
     __tablename__ = 'verification_codes'
     
     id = db.Column(db.String(36), primary_key=True, server_default=db.text('gen_random_uuid()'))
@@ -60,6 +60,14 @@ class Achievement(db.Model):
     proof_url = db.Column(db.String(500))  # URL to certificate or proof
 
 class DepartmentEvent(db.Model):
+    __table_args__ = (
+        # Listing filters by status or department and orders by start date
+        db.Index('ix_department_event_status_start_date', 'status', 'start_date'),
+        db.Index('ix_department_event_department_start_date', 'department', 'start_date'),
+        # The venue schedule polls for events changed since its last refresh
+        db.Index('ix_department_event_updated_at', 'updated_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -71,27 +79,86 @@ class DepartmentEvent(db.Model):
     organizer_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     registration_required = db.Column(db.Boolean, default=False)
     max_participants = db.Column(db.Integer)
+    seats_taken = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # pending + approved participants
     is_featured = db.Column(db.Boolean, default=False)
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
     created_by_role = db.Column(db.String(20))
     is_paid = db.Column(db.Boolean, default=False)
     fee_amount = db.Column(db.Numeric(10, 2))
     approval_notes = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Event participants
-    participants = db.relationship('User', secondary='event_participants', backref='events_joined')
+    participants = db.relationship('User', secondary='event_participants', back_populates='participated_events', viewonly=True)
     participant_links = db.relationship('EventParticipant', backref='event', cascade='all, delete-orphan')
 
 class EventParticipant(db.Model):
     __tablename__ = 'event_participants'
+    __table_args__ = (
+        # Waitlist promotion takes the oldest waitlisted rows of one event
+        db.Index('ix_event_participants_event_status_registered', 'event_id', 'approval_status', 'registration_date'),
+    )
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('department_event.id'), primary_key=True)
     registration_date = db.Column(db.DateTime, default=datetime.utcnow)
     attendance_status = db.Column(db.String(20))  # Registered, Attended, Cancelled
     certificate_issued = db.Column(db.Boolean, default=False)
-    approval_status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
+    approval_status = db.Column(db.String(20), default='pending')  # pending, approved, rejected, waitlisted, cancelled
     program = db.Column(db.String(50))
     department = db.Column(db.String(100))
     notes = db.Column(db.Text)
 
-    user = db.relationship('User', backref=db.backref('event_participations', cascade='all, delete-orphan'))
\ No newline at end of file
+    user = db.relationship('User', backref=db.backref('event_participations', cascade='all, delete-orphan'))
+
+# Reminders already sent, so a restarted or re-elected scheduler never repeats one
+class EventReminderLog(db.Model):
+    __tablename__ = 'event_reminder_log'
+    event_id = db.Column(db.Integer, db.ForeignKey('department_event.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    offset_minutes = db.Column(db.Integer, primary_key=True)  # Minutes before start, e.g. 1440 or 60
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Time-limited lock row; the worker holding a lease runs that background job
+class SchedulerLease(db.Model):
+    __tablename__ = 'scheduler_lease'
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+# Shared invalidation counter per response cache tag; every worker compares
+# its cached entries against these, so a write seen by one invalidates all
+class CacheGeneration(db.Model):
+    __tablename__ = 'cache_generation'
+    tag = db.Column(db.String(50), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+# Messages for the SSE stream; every web worker tails this table, so a
+# publish reaches clients on all of them and ids are shared
+class EventBusMessage(db.Model):
+    __tablename__ = 'event_bus_message'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON payload
+    audience = db.Column(db.Text)  # JSON list of user ids; NULL for everyone
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+# Annual report requests, run by backend/scripts/run_report_jobs.py
+class ReportJob(db.Model):
+    __tablename__ = 'report_job'
+    year = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    sections = db.Column(db.Text, nullable=False)  # JSON list of section names
+    requested_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    claim_expires_at = db.Column(db.DateTime)  # A running job past this is taken over
+    claim_token = db.Column(db.String(32))  # Identifies the run holding the claim
+    manifest = db.Column(db.Text)  # JSON, once completed
+    error = db.Column(db.Text)
+
+# Precomputed event recommendations, one row per user
+class EventRecommendation(db.Model):
+    __tablename__ = 'event_recommendation'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    ranked = db.Column(db.Text, nullable=False, default='[]')  # JSON [[event_id, score, start timestamp], ...], best first
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -4,7 +4,7 @@ from . import db
 
 class StudentProfile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     roll_number = db.Column(db.String(20), unique=True, nullable=False)
     current_semester = db.Column(db.Integer)
     enrollment_date = db.Column(db.Date)
@@ -53,6 +53,14 @@ class SemesterRecord(db.Model):
     subject_records = db.relationship('SubjectRecord', backref='semester', lazy='dynamic')
 
 class SubjectRecord(db.Model):
+    __table_args__ = (
+        # One result per subject per semester; result imports upsert on this key
+        db.UniqueConstraint('semester_record_id', 'subject_code',
+                            name='uq_subject_record_semester_subject'),
+        # Subject analytics read every result for one subject code
+        db.Index('ix_subject_record_subject_code', 'subject_code'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     semester_record_id = db.Column(db.Integer, db.ForeignKey('semester_record.id'), nullable=False)
     subject_code = db.Column(db.String(20), nullable=False)
@@ -67,6 +75,12 @@ class SubjectRecord(db.Model):
     result_status = db.Column(db.String(20))  # Pass, Fail, Absent
 
 class AttendanceRecord(db.Model):
+    __table_args__ = (
+        # One mark per student, subject and day; imports upsert on this key
+        db.UniqueConstraint('student_profile_id', 'subject_code', 'date',
+                            name='uq_attendance_record_student_subject_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     student_profile_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False)
     subject_code = db.Column(db.String(20), nullable=False)
@@ -74,13 +88,62 @@ class AttendanceRecord(db.Model):
     status = db.Column(db.String(20))  # Present, Absent, Late
     remarks = db.Column(db.String(200))
 
+# Running attendance counts per student, subject and semester, kept in step
+# with AttendanceRecord so profile views never scan the raw rows
+class AttendanceAggregate(db.Model):
+    student_profile_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), primary_key=True)
+    subject_code = db.Column(db.String(20), primary_key=True)
+    semester_number = db.Column(db.Integer, primary_key=True)  # 0 when the date falls outside every semester
+    total_classes = db.Column(db.Integer, nullable=False, default=0)
+    present_classes = db.Column(db.Integer, nullable=False, default=0)
+    late_classes = db.Column(db.Integer, nullable=False, default=0)
+
+# Daily attendance packed one bit per day from start_date for each student,
+# subject and semester; the store read when ATTENDANCE_STORE is 'bitmap'
+class AttendanceBitmap(db.Model):
+    student_profile_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), primary_key=True)
+    subject_code = db.Column(db.String(20), primary_key=True)
+    semester_number = db.Column(db.Integer, primary_key=True)  # 0 when the date falls outside every semester
+    start_date = db.Column(db.Date, nullable=False)  # the day bit 0 stands for
+    days = db.Column(db.Integer, nullable=False)
+    marked = db.Column(db.LargeBinary, nullable=False)  # attendance was taken that day
+    present = db.Column(db.LargeBinary, nullable=False)
+    late = db.Column(db.LargeBinary, nullable=False)
+
 class Document(db.Model):
+    __table_args__ = (
+        # The verification queue walks unverified documents oldest first,
+        # optionally of one type
+        db.Index('ix_document_verified_upload_date', 'verified', 'upload_date', 'id'),
+        db.Index('ix_document_verified_type_upload_date', 'verified', 'document_type', 'upload_date', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     student_profile_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False)
     document_type = db.Column(db.String(50))  # ID Card, Fee Receipt, Certificate, etc.
     file_name = db.Column(db.String(200))
-    file_path = db.Column(db.String(500))
+    file_path = db.Column(db.String(500))  # relative to DOCUMENTS_DIR
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the stored bytes
+    file_size = db.Column(db.BigInteger)
+    content_type = db.Column(db.String(100))
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     verified = db.Column(db.Boolean, default=False)
     verification_date = db.Column(db.DateTime)
-    verified_by = db.Column(db.Integer, db.ForeignKey('user.id'))
\ No newline at end of file
+    verified_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    # Verification queue lease: the reviewer working on this document and until when
+    claimed_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    claim_expires_at = db.Column(db.DateTime)
+    claim_token = db.Column(db.String(32), index=True)
+
+# A resumable document upload in progress; its bytes accumulate in
+# DOCUMENTS_DIR/uploads/<id>.part until ``received`` reaches ``total_size``
+class DocumentUpload(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    student_profile_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False)
+    document_type = db.Column(db.String(50))
+    file_name = db.Column(db.String(200))
+    content_type = db.Column(db.String(100))
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
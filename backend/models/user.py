@@ -1,8 +1,7 @@
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+from . import db
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -65,7 +64,8 @@ class User(db.Model):
     organized_events = db.relationship('DepartmentEvent', backref='organizer')
     participated_events = db.relationship('DepartmentEvent', 
                                        secondary='event_participants',
-                                       backref='participants')
+                                       back_populates='participants',
+                                       viewonly=True)
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -73,6 +73,16 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    @classmethod
+    def visible_to(cls, viewer):
+        """SQL criterion for profiles ``viewer`` may see.
+
+        Mirrors the checks in ``get_user_profile``: private profiles are
+        hidden and alumni-only profiles are shown to alumni only.
+        """
+        hidden = ['private'] if viewer is not None and viewer.is_alumni else ['private', 'alumni-only']
+        return db.or_(cls.profile_visibility.is_(None), cls.profile_visibility.notin_(hidden))
+    
     def to_dict(self):
         data = {
             'id': self.id,
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.user import User, db
-from ..models.dcsa import Achievement
+from ...models.user import User, db
+from ...models.dcsa import Achievement, Course
+from ...utils.response_cache import cached_response
+from ...utils.user_columns import user_columns
 from datetime import datetime
 
 achievements = Blueprint('achievements', __name__)
@@ -107,45 +109,46 @@ def delete_achievement(achievement_id):
     return jsonify({'message': 'Achievement deleted successfully'}), 200
 
 @achievements.route('/api/dcsa/placements', methods=['GET'])
+@cached_response('users', 'courses')
 def get_placement_stats():
     """Get placement statistics"""
     # Get query parameters
     year = request.args.get('year', type=int)
     course_id = request.args.get('course_id', type=int)
     
-    query = User.query.filter(User.placement_company.isnot(None))
+    users = user_columns.snapshot()
+    placed = users.present('placement_company')
     
     # Apply filters
+    placed_students = placed
     if year:
-        query = query.filter_by(placement_year=year)
+        placed_students = users.where(placed_students, placement_year=year)
     if course_id:
-        query = query.filter_by(course_id=course_id)
+        placed_students = users.where(placed_students, course_id=course_id)
     
-    placed_students = query.all()
+    courses = Course.query.all()
+    course_names = {course.id: course.name for course in courses}
     
-    # Group by company
-    companies = {}
-    for student in placed_students:
-        companies[student.placement_company] = companies.get(student.placement_company, 0) + 1
-    
-    # Group by course
+    # Group by company and course
+    companies = users.group_count('placement_company', placed_students)
     course_stats = {}
-    for student in placed_students:
-        if student.course:
-            course_name = student.course.name
-            course_stats[course_name] = course_stats.get(course_name, 0) + 1
+    for cid, count in users.group_count('course_id', placed_students).items():
+        if cid in course_names:
+            course_stats[course_names[cid]] = count
+    
+    placed_by_course = users.group_count('course_id', placed)
+    alumni_by_course = users.group_count('course_id', users.where(is_alumni=True))
     
     return jsonify({
-        'total_placements': len(placed_students),
+        'total_placements': users.count(placed_students),
         'companies': [{'name': k, 'count': v} for k, v in companies.items()],
         'course_wise': [{'course': k, 'count': v} for k, v in course_stats.items()],
         'placement_percentage': {
             course.name: (
-                len([s for s in course.students if s.placement_company]) / 
-                len([s for s in course.students if s.is_alumni]) * 100
-                if len([s for s in course.students if s.is_alumni]) > 0 else 0
+                placed_by_course.get(course.id, 0) / alumni_by_course[course.id] * 100
+                if alumni_by_course.get(course.id) else 0
             )
-            for course in Course.query.all()
+            for course in courses
         }
     }), 200
 
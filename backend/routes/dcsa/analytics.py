@@ -1,45 +1,55 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.user import User, db
-from ..models.dcsa import (
+from ...models.user import User, db
+from ...utils.response_cache import cached_response
+from ...utils.singleflight import single_flight, single_flight_group
+from ...utils.user_columns import user_columns
+from ...utils.department_report import SECTIONS
+from ...utils import report_jobs
+from ...models.dcsa import (
     Course, DepartmentEvent, ResearchPublication,
-    Achievement, EventParticipant
+    Achievement, EventParticipant, ReportJob
 )
 from sqlalchemy import func, extract
 from datetime import datetime
+import os
 
 analytics = Blueprint('analytics', __name__)
 
+def _is_faculty_or_admin(user):
+    return bool(user and (user.is_faculty or getattr(user, 'role', None) == 'admin'))
+
 @analytics.route('/api/dcsa/analytics/overview', methods=['GET'])
+@cached_response('users', 'courses', 'publications', 'events', 'achievements')
+@single_flight
 def get_department_overview():
     """Get comprehensive department analytics"""
+    users = user_columns.snapshot()
+
     # Basic counts
-    total_students = User.query.filter_by(is_alumni=False).count()
-    total_alumni = User.query.filter_by(is_alumni=True).count()
-    total_faculty = User.query.filter_by(is_faculty=True).count()
+    total_students = users.count(users.where(is_alumni=False))
+    total_alumni = users.count(users.where(is_alumni=True))
+    total_faculty = users.count(users.where(is_faculty=True))
     total_events = DepartmentEvent.query.count()
     total_publications = ResearchPublication.query.count()
     
     # Course-wise distribution
     courses = Course.query.all()
+    # As with course.students before, a NULL is_alumni counts as a current student here
+    current_by_course = users.group_count('course_id', ~users.where(is_alumni=True))
+    alumni_by_course = users.group_count('course_id', users.where(is_alumni=True))
+    cgpa_by_course = users.group_mean('cgpa', 'course_id')
     course_stats = [{
         'course': course.name,
-        'current_students': len([s for s in course.students if not s.is_alumni]),
-        'alumni': len([s for s in course.students if s.is_alumni]),
-        'average_cgpa': sum(s.cgpa or 0 for s in course.students) / len(course.students) if course.students else 0
+        'current_students': current_by_course.get(course.id, 0),
+        'alumni': alumni_by_course.get(course.id, 0),
+        'average_cgpa': cgpa_by_course.get(course.id, 0)
     } for course in courses]
     
     # Placement statistics
-    placed_students = User.query.filter(User.placement_company.isnot(None)).all()
     placement_stats = {
-        'total_placed': len(placed_students),
-        'top_companies': db.session.query(
-            User.placement_company,
-            func.count(User.id)
-        ).filter(User.placement_company.isnot(None))
-        .group_by(User.placement_company)
-        .order_by(func.count(User.id).desc())
-        .limit(5).all()
+        'total_placed': users.count(users.present('placement_company')),
+        'top_companies': users.top_groups('placement_company', 5)
     }
     
     # Research metrics
@@ -92,26 +102,33 @@ def get_department_overview():
     }), 200
 
 @analytics.route('/api/dcsa/analytics/trends', methods=['GET'])
+@cached_response('users', 'publications', 'events')
+@single_flight
 def get_department_trends():
     """Get trend analysis for various metrics"""
     # Get trends over the past 5 years
     current_year = datetime.utcnow().year
     years = range(current_year - 4, current_year + 1)
     
+    users = user_columns.snapshot()
+    enrollments_by_year = users.group_count('batch_year')
+    graduations_by_year = users.group_count('graduation_year')
+    placements_by_year = users.group_count('placement_year')
+    
     # Enrollment trends
     enrollment_trends = []
     for year in years:
         enrollment_trends.append({
             'year': year,
-            'new_enrollments': User.query.filter_by(batch_year=year).count(),
-            'graduations': User.query.filter_by(graduation_year=year).count()
+            'new_enrollments': enrollments_by_year.get(year, 0),
+            'graduations': graduations_by_year.get(year, 0)
         })
     
     # Placement trends
     placement_trends = []
     for year in years:
-        placed_count = User.query.filter_by(placement_year=year).count()
-        total_graduates = User.query.filter_by(graduation_year=year).count()
+        placed_count = placements_by_year.get(year, 0)
+        total_graduates = graduations_by_year.get(year, 0)
         placement_trends.append({
             'year': year,
             'placed_students': placed_count,
@@ -148,56 +165,125 @@ def get_department_trends():
     }), 200
 
 @analytics.route('/api/dcsa/analytics/course/<int:course_id>', methods=['GET'])
+@cached_response('users', 'courses', 'achievements')
+@single_flight
 def get_course_analytics(course_id):
     """Get detailed analytics for a specific course"""
     course = Course.query.get_or_404(course_id)
+    users = user_columns.snapshot()
     
     # Student statistics
-    current_students = [s for s in course.students if not s.is_alumni]
-    alumni = [s for s in course.students if s.is_alumni]
+    in_course = users.where(course_id=course.id)
+    current_students = in_course & ~users.where(is_alumni=True)
+    alumni = users.where(in_course, is_alumni=True)
     
-    # Academic performance
+    # Academic performance (a CGPA of 0 counts as not yet graded)
+    graded = in_course & (users.cgpa != 0)
+    below_7, from_7, from_8, from_9 = users.histogram('cgpa', [float('-inf'), 7, 8, 9, float('inf')], graded)
     cgpa_ranges = {
-        '9-10': len([s for s in course.students if s.cgpa and s.cgpa >= 9]),
-        '8-9': len([s for s in course.students if s.cgpa and 8 <= s.cgpa < 9]),
-        '7-8': len([s for s in course.students if s.cgpa and 7 <= s.cgpa < 8]),
-        'Below 7': len([s for s in course.students if s.cgpa and s.cgpa < 7])
+        '9-10': int(from_9),
+        '8-9': int(from_8),
+        '7-8': int(from_7),
+        'Below 7': int(below_7)
     }
     
+    top_performers = users.top_k('cgpa', 5, in_course)
+    names = dict(db.session.query(User.id, User.full_name)
+                 .filter(User.id.in_([user_id for user_id, _ in top_performers])).all())
+    
     # Placement statistics
-    placed_students = [s for s in alumni if s.placement_company]
+    placed_students = users.present('placement_company', alumni)
     
     # Achievement distribution
-    achievements = []
-    for student in course.students:
-        achievements.extend(student.achievements)
+    achievement_types = dict(db.session.query(
+        Achievement.achievement_type,
+        func.count(Achievement.id)
+    ).join(User, Achievement.user_id == User.id)
+    .filter(User.course_id == course.id)
+    .group_by(Achievement.achievement_type).all())
     
     return jsonify({
         'course_info': {
             'name': course.name,
             'duration': course.duration,
-            'total_students': len(course.students),
-            'current_students': len(current_students),
-            'alumni': len(alumni)
+            'total_students': users.count(in_course),
+            'current_students': users.count(current_students),
+            'alumni': users.count(alumni)
         },
         'academic_metrics': {
             'cgpa_distribution': cgpa_ranges,
-            'average_cgpa': sum(s.cgpa or 0 for s in course.students) / len(course.students) if course.students else 0,
+            'average_cgpa': users.mean('cgpa', in_course),
             'top_performers': [{
-                'name': s.full_name,
-                'cgpa': s.cgpa
-            } for s in sorted(course.students, key=lambda x: x.cgpa or 0, reverse=True)[:5]]
+                'name': names.get(user_id),
+                'cgpa': cgpa
+            } for user_id, cgpa in top_performers]
         },
         'placement_metrics': {
-            'placed_students': len(placed_students),
-            'placement_rate': (len(placed_students) / len(alumni) * 100) if alumni else 0,
-            'companies': list(set(s.placement_company for s in placed_students if s.placement_company))
+            'placed_students': users.count(placed_students),
+            'placement_rate': (users.count(placed_students) / users.count(alumni) * 100) if users.count(alumni) else 0,
+            'companies': list(users.group_count('placement_company', placed_students))
         },
         'achievement_metrics': {
-            'total_achievements': len(achievements),
-            'achievement_types': {
-                atype: len([a for a in achievements if a.achievement_type == atype])
-                for atype in set(a.achievement_type for a in achievements)
-            }
+            'total_achievements': sum(achievement_types.values()),
+            'achievement_types': achievement_types
         }
-    }), 200
\ No newline at end of file
+    }), 200
+
+@analytics.route('/api/dcsa/analytics/coalescing-stats', methods=['GET'])
+@jwt_required()
+def get_coalescing_stats():
+    """Get single-flight counters for the expensive statistics endpoints"""
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_faculty_or_admin(current_user):
+        return jsonify({'error': 'Only faculty members can view request statistics'}), 403
+
+    return jsonify(single_flight_group.stats()), 200
+
+@analytics.route('/api/dcsa/reports/annual', methods=['POST'])
+@jwt_required()
+def start_annual_report():
+    """Queue the annual department report for the report job runner"""
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_faculty_or_admin(current_user):
+        return jsonify({'error': 'Only faculty members can generate reports'}), 403
+    
+    data = request.get_json() or {}
+    year = data.get('year', datetime.utcnow().year - 1)
+    sections = data.get('sections') or list(SECTIONS)
+    if isinstance(year, bool) or not isinstance(year, int):
+        return jsonify({'error': 'year must be an integer'}), 400
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        return jsonify({'error': f"Unknown sections: {', '.join(sorted(unknown))}"}), 400
+    
+    if not report_jobs.request_report(year, sections):
+        return jsonify({'error': f'The {year} report is already being generated'}), 409
+    
+    return jsonify({
+        'message': 'Report generation queued',
+        'status_url': f'/api/dcsa/reports/annual/{year}'
+    }), 202
+
+@analytics.route('/api/dcsa/reports/annual/<int:year>', methods=['GET'])
+@jwt_required()
+def get_annual_report_status(year):
+    """Get the status and manifest of an annual report"""
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_faculty_or_admin(current_user):
+        return jsonify({'error': 'Only faculty members can view reports'}), 403
+    
+    job = db.session.get(ReportJob, year)
+    if not job:
+        return jsonify({'error': 'No report has been generated for this year'}), 404
+    
+    return jsonify(report_jobs.serialize(job)), 200
+
+@analytics.route('/api/dcsa/reports/annual/<int:year>/<path:filename>', methods=['GET'])
+@jwt_required()
+def download_annual_report(year, filename):
+    """Download one file of a generated annual report"""
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_faculty_or_admin(current_user):
+        return jsonify({'error': 'Only faculty members can download reports'}), 403
+    
+    return send_from_directory(os.path.join(current_app.config['REPORTS_DIR'], str(year)), filename, as_attachment=True)
@@ -0,0 +1,99 @@
+from flask import Blueprint, Response, jsonify, request, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
+from ...models.dcsa import DepartmentEvent, EventParticipant
+from ...models.user import db
+from ...utils.event_registration import SEAT_HOLDING
+from ...utils.ical import build_feed, feed_etag
+from ...utils.signing import sign_token, verify_token
+
+event_calendar = Blueprint('event_calendar', __name__)
+
+CALENDAR_TOKEN_PURPOSE = 'calendar-feed'
+
+# Calendar clients may reuse a feed this long before revalidating
+FEED_MAX_AGE = 300
+
+def _public_events(department=None):
+    query = DepartmentEvent.query.filter(DepartmentEvent.status == 'approved')
+    if department:
+        query = query.filter(DepartmentEvent.department == department)
+    return query
+
+def _participant_events(user_id):
+    return (DepartmentEvent.query
+            .join(EventParticipant, EventParticipant.event_id == DepartmentEvent.id)
+            .filter(EventParticipant.user_id == user_id,
+                    EventParticipant.approval_status.in_(SEAT_HOLDING),
+                    DepartmentEvent.status == 'approved'))
+
+def _serve_feed(scope, name, query, version_columns=()):
+    """Answer a feed request from its version, rendering only on change.
+
+    The version is one aggregate query over the feed's events: a feed
+    changes only when an event in it is edited or when events enter or
+    leave it, both of which move the latest updated_at or the count.
+    """
+    last_modified, *version = query.with_entities(
+        func.max(DepartmentEvent.updated_at),
+        func.count(DepartmentEvent.id),
+        *version_columns,
+    ).order_by(None).one()
+    version = (last_modified, *version)
+    scope = (scope, request.host)
+    etag = feed_etag(scope, version)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = build_feed(scope, version, name, lambda: query.order_by(DepartmentEvent.start_date).all(),
+                          request.host)
+        response = Response(body, mimetype='text/calendar')
+        response.headers['Content-Disposition'] = f'inline; filename="{scope[0][0]}.ics"'
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.max_age = FEED_MAX_AGE
+    return response.make_conditional(request)
+
+@event_calendar.route('/api/dcsa/events/calendar.ics', methods=['GET'])
+def all_events_feed():
+    """iCalendar feed of all approved department events"""
+    return _serve_feed(('events',), 'DCSA Events', _public_events())
+
+@event_calendar.route('/api/dcsa/events/calendar/departments/<department>.ics', methods=['GET'])
+def department_feed(department):
+    """iCalendar feed of one department's approved events"""
+    return _serve_feed(('department', department), f'{department} Events', _public_events(department))
+
+@event_calendar.route('/api/dcsa/events/calendar/token', methods=['GET'])
+@jwt_required()
+def participation_feed_url():
+    """Private subscription URL for the current user's participation feed"""
+    token = sign_token(CALENDAR_TOKEN_PURPOSE, get_jwt_identity())
+    return jsonify({
+        'url': url_for('event_calendar.participation_feed', token=token, _external=True)
+    }), 200
+
+@event_calendar.route('/api/dcsa/events/calendar/my/<token>.ics', methods=['GET'])
+def participation_feed(token):
+    """iCalendar feed of the events a user has registered for.
+
+    Calendar clients cannot send a JWT, so the user is identified by the
+    signed token embedded in the subscription URL.
+    """
+    fields = verify_token(CALENDAR_TOKEN_PURPOSE, token)
+    if not fields or not fields[0].isdigit():
+        return jsonify({'error': 'Invalid calendar token'}), 404
+    user_id = int(fields[0])
+
+    response = _serve_feed(
+        ('participation', user_id),
+        'My DCSA Events',
+        _participant_events(user_id),
+        # Registering for or cancelling an event changes which events are
+        # in the feed without touching the events themselves
+        version_columns=(func.sum(DepartmentEvent.id), func.max(EventParticipant.registration_date)),
+    )
+    response.cache_control.private = True
+    return response
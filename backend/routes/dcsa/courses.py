@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.user import User, db
-from ..models.dcsa import Course, Specialization, UserSpecialization
+from ...models.user import User, db
+from ...models.dcsa import Course, Specialization, UserSpecialization
 
 dcsa = Blueprint('dcsa', __name__)
 
@@ -1,17 +1,74 @@
-from datetime import datetime
+import base64
+import time
 from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from flask import Blueprint, Response, jsonify, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+from markupsafe import escape
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from ...models.dcsa import DepartmentEvent, EventParticipant
+from ...models.user import User, db
+from ...utils.checkin import (
+    ALREADY_CHECKED_IN,
+    NOT_APPROVED,
+    attendance_buffer,
+    attendance_counts,
+    check_in_token,
+    read_check_in_token,
+)
+from ...utils.event_registration import (
+    SEAT_HOLDING,
+    fill_from_waitlist,
+    release_seats,
+    take_seats,
+    transition,
+    waitlist_position,
+)
+from ...utils.event_bus import event_bus, read_stream_ticket, stream_ticket
+from ...utils.event_stats import SERIES_INTERVALS, event_statistics, participation_series
+from ...utils.notifications import notification_queue
+from ...utils.recommendations import drop_recommendation, recommended_for, refresh_event_in_background
+from ...utils.response_cache import cached_response
+from ...utils.scheduling import venue_schedule
+from ...utils.singleflight import single_flight
 
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import get_jwt_identity, jwt_required
 
-from ..models.dcsa import DepartmentEvent, EventParticipant
-from ..models.user import User, db
+events = Blueprint("events", __name__)
 
+EVENTS_PAGE_SIZE = 50
+EVENTS_MAX_PAGE_SIZE = 200
+
+# Seconds a check-in volunteer's authorization is trusted without a lookup
+CHECKIN_STAFF_TTL = 300
+# Cached authorizations kept before expired ones are swept out
+CHECKIN_STAFF_MAX = 1000
+_checkin_staff = {}
+
+
+def _participant_counts(event_ids):
+    """Count seat-holding participants for many events with one grouped query."""
+    if not event_ids:
+        return {}
+    rows = (
+        db.session.query(EventParticipant.event_id, func.count())
+        .filter(
+            EventParticipant.event_id.in_(event_ids),
+            EventParticipant.approval_status.in_(SEAT_HOLDING),
+        )
+        .group_by(EventParticipant.event_id)
+        .all()
+    )
+    return dict(rows)
 
-events = Blueprint("events", __name__)
 
+def _serialize_event(event: DepartmentEvent, admin: bool = False, participant_count: int = None):
+    if participant_count is None:
+        participant_count = _participant_counts([event.id]).get(event.id, 0)
 
-def _serialize_event(event: DepartmentEvent, admin: bool = False):
     data = {
         "id": event.id,
         "title": event.title,
@@ -23,7 +80,8 @@ def _serialize_event(event: DepartmentEvent, admin: bool = False):
         "department": event.department,
         "registration_required": event.registration_required,
         "max_participants": event.max_participants,
-        "current_participants": len(event.participants),
+        "seats_taken": event.seats_taken,
+        "current_participants": participant_count,
         "is_featured": event.is_featured,
         "status": event.status,
         "is_paid": event.is_paid,
@@ -56,10 +114,64 @@ def _serialize_event(event: DepartmentEvent, admin: bool = False):
     return data
 
 
+def _encode_cursor(event: DepartmentEvent) -> str:
+    start = event.start_date.isoformat() if event.start_date else ""
+    raw = f"{start}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """``(start_date, id)`` of a cursor; start_date is None past the dated events."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    start, event_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+    return (datetime.fromisoformat(start) if start else None), int(event_id)
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 datetime into the naive UTC the event columns store.
+
+    Values with an offset (the frontend sends ``toISOString()``) are
+    converted; values without one are taken to be UTC already.
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_datetime_arg(name: str):
+    value = request.args.get(name)
+    return _parse_datetime(value) if value else None
+
+
 def _is_admin_or_faculty(user: User) -> bool:
     return bool(user and (getattr(user, "role", None) == "admin" or getattr(user, "is_faculty", False)))
 
 
+def _venue_conflict_response(venue, start_date, end_date, exclude_id: int = None):
+    """409 response listing approved events that overlap the booking, or None."""
+    conflict_ids = venue_schedule.conflicts(venue, start_date, end_date, exclude_id=exclude_id)
+    if not conflict_ids:
+        return None
+    conflicts = (
+        DepartmentEvent.query.filter(DepartmentEvent.id.in_(conflict_ids))
+        .order_by(DepartmentEvent.start_date)
+        .all()
+    )
+    return jsonify({
+        "error": "Venue is already booked at that time",
+        "conflicts": [
+            {
+                "id": event.id,
+                "title": event.title,
+                "start_date": event.start_date.isoformat() if event.start_date else None,
+                "end_date": event.end_date.isoformat() if event.end_date else None,
+            }
+            for event in conflicts
+        ],
+    }), 409
+
+
 def _can_submit_event(user: User) -> bool:
     if not user:
         return False
@@ -75,7 +187,10 @@ def list_events():
     if not status_filter:
         status_filter = "all" if _is_admin_or_faculty(current_user) else "approved"
 
-    query = DepartmentEvent.query
+    admin = _is_admin_or_faculty(current_user)
+    query = DepartmentEvent.query.options(selectinload(DepartmentEvent.organizer))
+    if admin:
+        query = query.options(selectinload(DepartmentEvent.participant_links))
     if status_filter != "all":
         query = query.filter_by(status=status_filter)
 
@@ -83,12 +198,70 @@ def list_events():
         query = query.filter_by(event_type=request.args["type"])
     if request.args.get("department"):
         query = query.filter_by(department=request.args["department"])
-    if request.args.get("upcoming") in {"true", "1", "True"}:
+    upcoming = request.args.get("upcoming") in {"true", "1", "True"}
+    if upcoming:
         query = query.filter(DepartmentEvent.start_date >= datetime.utcnow())
 
-    events_data = query.order_by(DepartmentEvent.start_date.desc()).all()
-    admin = _is_admin_or_faculty(current_user)
-    return jsonify([_serialize_event(evt, admin=admin) for evt in events_data]), 200
+    try:
+        window_start = _parse_datetime_arg("from")
+        window_end = _parse_datetime_arg("to")
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO 8601 dates"}), 400
+    if window_start:
+        query = query.filter(DepartmentEvent.start_date >= window_start)
+    if window_end:
+        query = query.filter(DepartmentEvent.start_date < window_end)
+
+    limit = min(request.args.get("limit", EVENTS_PAGE_SIZE, type=int), EVENTS_MAX_PAGE_SIZE)
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    ascending = request.args.get("order") == "asc"
+
+    # Keyset pagination on (start_date, id). The cursor is the last event
+    # of the previous page; ties on start_date are broken by id. Events
+    # without a start date follow all dated ones, paged by id alone, and
+    # a cursor on one of them carries no start date.
+    cursor = None
+    if request.args.get("cursor"):
+        try:
+            cursor = _decode_cursor(request.args["cursor"])
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    id_order = DepartmentEvent.id.asc() if ascending else DepartmentEvent.id.desc()
+    events_data = []
+    if cursor is None or cursor[0] is not None:
+        dated = query.filter(DepartmentEvent.start_date.isnot(None))
+        if cursor and ascending:
+            dated = dated.filter(or_(
+                DepartmentEvent.start_date > cursor[0],
+                and_(DepartmentEvent.start_date == cursor[0], DepartmentEvent.id > cursor[1]),
+            ))
+        elif cursor:
+            dated = dated.filter(or_(
+                DepartmentEvent.start_date < cursor[0],
+                and_(DepartmentEvent.start_date == cursor[0], DepartmentEvent.id < cursor[1]),
+            ))
+        start_order = DepartmentEvent.start_date.asc() if ascending else DepartmentEvent.start_date.desc()
+        events_data = dated.order_by(start_order, id_order).limit(limit + 1).all()
+
+    # Date filters never match an event without a start date
+    if len(events_data) <= limit and not (upcoming or window_start or window_end):
+        undated = query.filter(DepartmentEvent.start_date.is_(None))
+        if cursor and cursor[0] is None:
+            undated = undated.filter(DepartmentEvent.id > cursor[1] if ascending else DepartmentEvent.id < cursor[1])
+        events_data += undated.order_by(id_order).limit(limit + 1 - len(events_data)).all()
+    has_more = len(events_data) > limit
+    events_data = events_data[:limit]
+
+    counts = _participant_counts([evt.id for evt in events_data])
+    response = jsonify([
+        _serialize_event(evt, admin=admin, participant_count=counts.get(evt.id, 0))
+        for evt in events_data
+    ])
+    if has_more:
+        response.headers["X-Next-Cursor"] = _encode_cursor(events_data[-1])
+    return response, 200
 
 
 @events.route("/api/dcsa/events", methods=["POST"])
@@ -104,17 +277,21 @@ def submit_event():
             return jsonify({"error": f"Missing field: {field}"}), 400
 
     try:
-        start_date = datetime.fromisoformat(data["start_date"])
+        start_date = _parse_datetime(data["start_date"])
     except ValueError:
         return jsonify({"error": "Invalid start_date"}), 400
 
     end_date = None
     if data.get("end_date"):
         try:
-            end_date = datetime.fromisoformat(data["end_date"])
+            end_date = _parse_datetime(data["end_date"])
         except ValueError:
             return jsonify({"error": "Invalid end_date"}), 400
 
+    conflict = _venue_conflict_response(data.get("venue"), start_date, end_date)
+    if conflict:
+        return conflict
+
     event = DepartmentEvent(
         title=data["title"],
         description=data.get("description"),
@@ -135,6 +312,7 @@ def submit_event():
 
     db.session.add(event)
     db.session.commit()
+    venue_schedule.apply(event)
 
     return jsonify({
         "message": "Event published" if event.status == "approved" else "Event submitted for approval",
@@ -152,6 +330,24 @@ def update_event(event_id: int):
         return jsonify({"error": "Not authorized"}), 403
 
     data = request.get_json() or {}
+    start_date, end_date = event.start_date, event.end_date
+    if "start_date" in data:
+        try:
+            start_date = _parse_datetime(data["start_date"])
+        except ValueError:
+            return jsonify({"error": "Invalid start_date"}), 400
+    if "end_date" in data:
+        try:
+            end_date = _parse_datetime(data["end_date"])
+        except ValueError:
+            return jsonify({"error": "Invalid end_date"}), 400
+    venue = data["venue"] if "venue" in data else event.venue
+
+    if event.status != "rejected":
+        conflict = _venue_conflict_response(venue, start_date, end_date, exclude_id=event.id)
+        if conflict:
+            return conflict
+
     for field in [
         "title",
         "description",
@@ -166,20 +362,15 @@ def update_event(event_id: int):
     ]:
         if field in data:
             setattr(event, field, data[field])
+    if "max_participants" in data:
+        db.session.flush()
+        fill_from_waitlist(event.id)
 
-    if "start_date" in data:
-        try:
-            event.start_date = datetime.fromisoformat(data["start_date"])
-        except ValueError:
-            return jsonify({"error": "Invalid start_date"}), 400
-
-    if "end_date" in data:
-        try:
-            event.end_date = datetime.fromisoformat(data["end_date"])
-        except ValueError:
-            return jsonify({"error": "Invalid end_date"}), 400
+    event.start_date = start_date
+    event.end_date = end_date
 
     db.session.commit()
+    venue_schedule.apply(event)
     return jsonify({"message": "Event updated", "event": _serialize_event(event, admin=_is_admin_or_faculty(current_user))}), 200
 
 
@@ -196,9 +387,23 @@ def moderate_event(event_id: int):
         return jsonify({"error": "Status must be 'approved' or 'rejected'"}), 400
 
     event = DepartmentEvent.query.get_or_404(event_id)
+    if status == "approved":
+        conflict = _venue_conflict_response(event.venue, event.start_date, event.end_date, exclude_id=event.id)
+        if conflict:
+            return conflict
+
     event.status = status
     event.approval_notes = data.get("notes")
     db.session.commit()
+    venue_schedule.apply(event)
+    refresh_event_in_background(event.id)
+
+    # Approved events change everyone's listing; rejections only concern the organizer
+    event_bus.publish(
+        "event.moderated",
+        {"event_id": event.id, "status": status},
+        user_ids=None if status == "approved" else [event.organizer_id],
+    )
 
     return jsonify({"message": f"Event {status}", "event": _serialize_event(event, admin=True)}), 200
 
@@ -214,45 +419,90 @@ def request_participation(event_id: int):
     if event.status != "approved":
         return jsonify({"error": "Event is not open for participation"}), 400
 
-    existing = EventParticipant.query.filter_by(user_id=current_user.id, event_id=event.id).first()
-    if existing:
-        return jsonify({"error": "Participation already requested"}), 400
-
     data = request.get_json() or {}
-    program = data.get("program") or getattr(getattr(current_user, "course", None), "name", None)
-    department = data.get("department") or getattr(current_user, "department_designation", None)
-
-    participant = EventParticipant(
-        user_id=current_user.id,
-        event_id=event.id,
-        attendance_status="Registered",
-        approval_status="pending",
-        program=program,
-        department=department,
-        notes=data.get("notes"),
-    )
+    user_id = current_user.id
+    fields = {
+        "attendance_status": "Registered",
+        "approval_status": "pending",
+        "program": data.get("program") or getattr(getattr(current_user, "course", None), "name", None),
+        "department": data.get("department") or getattr(current_user, "department_designation", None),
+        "notes": data.get("notes"),
+        "registration_date": datetime.utcnow(),
+    }
 
+    # Insert first and let the primary key reject duplicates; only a
+    # previously cancelled participation may be requested again.
+    participant = EventParticipant(user_id=user_id, event_id=event_id, **fields)
     db.session.add(participant)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        participant = db.session.get(EventParticipant, (user_id, event_id))
+        if participant is None or participant.approval_status != "cancelled":
+            return jsonify({"error": "Participation already requested"}), 400
+        for field, value in fields.items():
+            setattr(participant, field, value)
+    drop_recommendation(user_id, event_id)
+
+    # Capacity is claimed last so the event row is locked for as short a
+    # time as possible before commit.
+    if not take_seats(event_id):
+        participant.approval_status = "waitlisted"
     db.session.commit()
 
-    return jsonify({"message": "Participation request submitted"}), 201
+    if participant.approval_status == "waitlisted":
+        return jsonify({
+            "message": "Event is full; you have been added to the waitlist",
+            "approval_status": "waitlisted",
+            "waitlist_position": waitlist_position(participant),
+        }), 201
+    return jsonify({"message": "Participation request submitted", "approval_status": "pending"}), 201
 
 
-@events.route("/api/dcsa/events/my-participation", methods=["GET"])
+@events.route("/api/dcsa/events/<int:event_id>/participation", methods=["DELETE"])
 @jwt_required()
-def my_participation():
+def cancel_participation(event_id: int):
     current_user = User.query.get(get_jwt_identity())
-    links = EventParticipant.query.filter_by(user_id=current_user.id).all()
-    return jsonify([
+    link = EventParticipant.query.filter_by(user_id=current_user.id, event_id=event_id).first_or_404()
+    if link.approval_status in {"cancelled", "rejected"}:
+        return jsonify({"error": f"Participation is already {link.approval_status}"}), 400
+
+    previous = link.approval_status
+    if not transition(event_id, [current_user.id], previous,
+                      approval_status="cancelled", attendance_status="Cancelled"):
+        db.session.rollback()
+        return jsonify({"error": "Participation was changed meanwhile; please retry"}), 409
+    if previous in SEAT_HOLDING:
+        release_seats(event_id)
+    db.session.commit()
+
+    return jsonify({"message": "Participation cancelled"}), 200
+
+
+def participation_payload(user_id: int) -> list:
+    """A user's event registrations, shared with the student dashboard."""
+    links = EventParticipant.query.filter_by(user_id=user_id).all()
+    return [
         {
             "event_id": link.event_id,
             "approval_status": link.approval_status,
             "attendance_status": link.attendance_status,
             "program": link.program,
             "department": link.department,
+            "check_in_token": check_in_token(link.event_id, link.user_id)
+            if link.approval_status == "approved"
+            else None,
         }
         for link in links
-    ]), 200
+    ]
+
+
+@events.route("/api/dcsa/events/my-participation", methods=["GET"])
+@jwt_required()
+def my_participation():
+    current_user = User.query.get(get_jwt_identity())
+    return jsonify(participation_payload(current_user.id)), 200
 
 
 @events.route("/api/dcsa/events/<int:event_id>/participation/<int:user_id>", methods=["POST"])
@@ -270,36 +520,354 @@ def review_participation(event_id: int, user_id: int):
     if status not in {"approved", "rejected"}:
         return jsonify({"error": "Status must be 'approved' or 'rejected'"}), 400
 
-    link.approval_status = status
-    link.notes = data.get("notes")
+    previous = link.approval_status
+    if previous == "cancelled":
+        return jsonify({"error": "Participation was cancelled by the participant"}), 400
+    held_seat = previous in SEAT_HOLDING
+    if not transition(event.id, [user_id], previous, approval_status=status, notes=data.get("notes")):
+        db.session.rollback()
+        return jsonify({"error": "Participation was changed meanwhile; please retry"}), 409
+    if status == "approved" and not held_seat and not take_seats(event.id):
+        db.session.rollback()
+        return jsonify({"error": "Event is full"}), 409
+    if status == "rejected" and held_seat:
+        release_seats(event.id)
     db.session.commit()
 
+    event_bus.publish("participation.reviewed", {"event_id": event.id, "approval_status": status}, user_ids=[user_id])
+
     return jsonify({"message": f"Participation {status}"}), 200
 
 
+def _review_email(event: DepartmentEvent, name: str, status: str, notes: str = None) -> str:
+    outcome = "approved" if status == "approved" else "not approved"
+    body = (
+        f"<p>Hi {escape(name or 'there')},</p>"
+        f"<p>Your participation in <strong>{escape(event.title)}</strong> has been {outcome}.</p>"
+    )
+    if notes:
+        body += f"<p>Notes from the organizer: {escape(notes)}</p>"
+    return body
+
+
+@events.route("/api/dcsa/events/<int:event_id>/participation/review", methods=["POST"])
+@jwt_required()
+def bulk_review_participation(event_id: int):
+    """Approve or reject many participants at once.
+
+    Targets are either an explicit ``user_ids`` list or a ``filter`` with
+    any of program, department, registered_before and approval_status.
+    Each targeted row gets an outcome: approved, rejected, unchanged,
+    full (no seat left to approve it), cancelled, conflict (another
+    request changed it meanwhile) or not_found.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    event = DepartmentEvent.query.get_or_404(event_id)
+
+    if not (_is_admin_or_faculty(current_user) or event.organizer_id == current_user.id):
+        return jsonify({"error": "Not authorized"}), 403
+
+    data = request.get_json() or {}
+    status = data.get("status")
+    if status not in {"approved", "rejected"}:
+        return jsonify({"error": "Status must be 'approved' or 'rejected'"}), 400
+
+    user_ids = data.get("user_ids")
+    criteria = data.get("filter")
+    if (user_ids is None) == (criteria is None):
+        return jsonify({"error": "Provide either user_ids or filter"}), 400
+
+    filters = [EventParticipant.event_id == event.id]
+    if user_ids is not None:
+        try:
+            user_ids = {int(user_id) for user_id in user_ids}
+        except (TypeError, ValueError):
+            return jsonify({"error": "user_ids must be a list of integers"}), 400
+        filters.append(EventParticipant.user_id.in_(user_ids))
+    else:
+        if not isinstance(criteria, dict):
+            return jsonify({"error": "filter must be an object"}), 400
+        for field in ("program", "department", "approval_status"):
+            if criteria.get(field):
+                filters.append(getattr(EventParticipant, field) == criteria[field])
+        if criteria.get("registered_before"):
+            try:
+                before = _parse_datetime(criteria["registered_before"])
+            except ValueError:
+                return jsonify({"error": "registered_before must be an ISO 8601 datetime"}), 400
+            filters.append(EventParticipant.registration_date < before)
+
+    # One read of the current state decides every row's outcome
+    rows = (
+        db.session.query(
+            EventParticipant.user_id,
+            EventParticipant.approval_status,
+            EventParticipant.registration_date,
+            User.email,
+            User.full_name,
+        )
+        .join(User, User.id == EventParticipant.user_id)
+        .filter(*filters)
+        .order_by(EventParticipant.registration_date, EventParticipant.user_id)
+        .all()
+    )
+
+    outcomes = {}
+    to_change = []
+    needs_seat = []
+    for row in rows:
+        if row.approval_status == "cancelled":
+            outcomes[row.user_id] = "cancelled"
+        elif row.approval_status == status:
+            outcomes[row.user_id] = "unchanged"
+        elif status == "approved" and row.approval_status not in SEAT_HOLDING:
+            needs_seat.append(row)
+        else:
+            to_change.append(row)
+
+    if needs_seat:
+        # Seats go to the earliest registrations first
+        locked = (
+            DepartmentEvent.query.filter_by(id=event.id).with_for_update().populate_existing().one()
+        )
+        granted = len(needs_seat)
+        if locked.max_participants is not None:
+            granted = max(0, min(granted, locked.max_participants - locked.seats_taken))
+        if granted and not take_seats(event.id, granted):
+            granted = 0
+        to_change.extend(needs_seat[:granted])
+        for row in needs_seat[granted:]:
+            outcomes[row.user_id] = "full"
+
+    # The rows were read unlocked, so each move is conditional on the
+    # status seen; seats are only released for rows this request moved
+    by_previous = defaultdict(list)
+    for row in to_change:
+        by_previous[row.approval_status].append(row)
+    changed = []
+    released = 0
+    for previous, group in by_previous.items():
+        moved = set(transition(event.id, [row.user_id for row in group], previous,
+                               approval_status=status, notes=data.get("notes")))
+        for row in group:
+            if row.user_id in moved:
+                outcomes[row.user_id] = status
+                changed.append(row)
+            else:
+                outcomes[row.user_id] = "conflict"
+        if status == "rejected" and previous in SEAT_HOLDING:
+            released += len(moved)
+        elif status == "approved" and previous not in SEAT_HOLDING:
+            # Seats taken above for rows that changed under us go back
+            released += len(group) - len(moved)
+    if released:
+        release_seats(event.id, released)
+    db.session.commit()
+
+    if changed:
+        event_bus.publish(
+            "participation.reviewed",
+            {"event_id": event.id, "approval_status": status},
+            user_ids=[row.user_id for row in changed],
+        )
+
+    if user_ids is not None:
+        for user_id in user_ids - outcomes.keys():
+            outcomes[user_id] = "not_found"
+
+    notified = notification_queue.enqueue_many(
+        (
+            f"Participation {status}: {event.title}",
+            row.email,
+            _review_email(event, row.full_name, status, data.get("notes")),
+        )
+        for row in changed
+    )
+
+    summary = defaultdict(int)
+    for outcome in outcomes.values():
+        summary[outcome] += 1
+
+    return jsonify({
+        "status": status,
+        "summary": dict(summary),
+        "notified": notified,
+        "results": [
+            {"user_id": user_id, "outcome": outcome}
+            for user_id, outcome in sorted(outcomes.items())
+        ],
+    }), 200
+
+
+def _can_check_in(event_id: int, user_id: int) -> bool:
+    """Check-in permission, cached so busy scanners skip the user lookups."""
+    key = (event_id, user_id)
+    expires = _checkin_staff.get(key)
+    if expires and expires > time.monotonic():
+        return True
+    current_user = User.query.get(user_id)
+    event = DepartmentEvent.query.get(event_id)
+    if not event or not (_is_admin_or_faculty(current_user) or event.organizer_id == user_id):
+        return False
+    now = time.monotonic()
+    if len(_checkin_staff) >= CHECKIN_STAFF_MAX:
+        for stale in [k for k, expiry in _checkin_staff.items() if expiry <= now]:
+            _checkin_staff.pop(stale, None)
+        if len(_checkin_staff) >= CHECKIN_STAFF_MAX:
+            _checkin_staff.clear()
+    _checkin_staff[key] = now + CHECKIN_STAFF_TTL
+    return True
+
+
+@events.route("/api/dcsa/events/<int:event_id>/check-in", methods=["POST"])
+@jwt_required()
+def check_in(event_id: int):
+    """Record attendance from a scanned participant token.
+
+    The token is verified by signature and expiry, the participant is
+    checked against the event's cached roster and the write is buffered,
+    so most scans cost no database round trip once the scanner is known.
+    """
+    if not _can_check_in(event_id, int(get_jwt_identity())):
+        return jsonify({"error": "Not authorized"}), 403
+
+    data = request.get_json() or {}
+    ticket = read_check_in_token(data.get("token"))
+    if ticket is None or ticket[0] != event_id:
+        return jsonify({"error": "Invalid check-in token"}), 400
+
+    user_id = ticket[1]
+    outcome = attendance_buffer.record(event_id, user_id)
+    if outcome == NOT_APPROVED:
+        return jsonify({"user_id": user_id, "error": "Participation is not approved"}), 409
+    if outcome == ALREADY_CHECKED_IN:
+        return jsonify({"user_id": user_id, "status": outcome}), 200
+    return jsonify({"user_id": user_id, "status": outcome}), 202
+
+
+@events.route("/api/dcsa/events/<int:event_id>/attendance", methods=["GET"])
+@jwt_required()
+def attendance(event_id: int):
+    """Live attendance counter for the venue screen (check-in staff only)."""
+    if not _can_check_in(event_id, int(get_jwt_identity())):
+        return jsonify({"error": "Not authorized"}), 403
+    return jsonify({"event_id": event_id, **attendance_counts(event_id)}), 200
+
+
+@events.route("/api/dcsa/events/stream/ticket", methods=["POST"])
+@jwt_required()
+def event_stream_ticket():
+    """Short-lived ticket for opening the event stream from a browser."""
+    expires = get_jwt().get("exp")
+    return jsonify({"ticket": stream_ticket(int(get_jwt_identity()), expires), "session_expires": expires}), 200
+
+
+@events.route("/api/dcsa/events/stream", methods=["GET"])
+@jwt_required(optional=True)
+def event_stream():
+    """Server-Sent Events feed of moderation and participation changes.
+
+    EventSource cannot send headers, so browsers open the stream with
+    ``?ticket=`` from ``/stream/ticket`` rather than putting the JWT in
+    the URL; other clients may send the JWT header. The stream ends with
+    an ``expired`` event when the session behind it expires. Clients
+    resume from the ``Last-Event-ID`` header (or ``?last_event_id=``)
+    after a reconnect.
+    """
+    if get_jwt_identity() is not None:
+        user_id, expires_at = int(get_jwt_identity()), get_jwt().get("exp")
+    else:
+        ticket = read_stream_ticket(request.args.get("ticket"))
+        if ticket is None:
+            return jsonify({"error": "A valid stream ticket is required"}), 401
+        user_id, expires_at = ticket
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    return Response(
+        event_bus.stream(user_id=user_id, last_event_id=last_event_id, expires_at=expires_at),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@events.route("/api/dcsa/events/venues/<venue>/free-slots", methods=["GET"])
+def venue_free_slots(venue: str):
+    """Free periods at a venue between ``from`` and ``to``.
+
+    ``min_minutes`` drops gaps shorter than the requested length.
+    """
+    try:
+        window_start = _parse_datetime_arg("from")
+        window_end = _parse_datetime_arg("to")
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO 8601 dates"}), 400
+    if not window_start or not window_end or window_end <= window_start:
+        return jsonify({"error": "from and to are required and from must be before to"}), 400
+
+    min_minutes = request.args.get("min_minutes", 0, type=int)
+    slots = venue_schedule.free_slots(venue, window_start, window_end, timedelta(minutes=max(min_minutes, 0)))
+    return jsonify({
+        "venue": venue,
+        "free_slots": [{"start": start.isoformat(), "end": end.isoformat()} for start, end in slots],
+    }), 200
+
+
+@events.route("/api/dcsa/events/recommended", methods=["GET"])
+@jwt_required()
+def recommended_events():
+    """Precomputed event recommendations for the current user.
+
+    Served from one primary-key lookup; pass ``expand=true`` to also load
+    the full event records.
+    """
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 20)
+    ranked = recommended_for(int(get_jwt_identity()), limit=limit)
+
+    if request.args.get("expand") not in {"true", "1", "True"}:
+        return jsonify([{"event_id": event_id, "score": score} for event_id, score in ranked]), 200
+
+    by_id = {
+        event.id: event
+        for event in DepartmentEvent.query.options(selectinload(DepartmentEvent.organizer))
+        .filter(DepartmentEvent.id.in_([event_id for event_id, _ in ranked]), DepartmentEvent.status == "approved")
+        .all()
+    }
+    counts = _participant_counts(list(by_id))
+    return jsonify([
+        {"score": score, **_serialize_event(by_id[event_id], participant_count=counts.get(event_id, 0))}
+        for event_id, score in ranked
+        if event_id in by_id
+    ]), 200
+
+
 @events.route("/api/dcsa/events/stats", methods=["GET"])
 @jwt_required(optional=True)
+@cached_response("events")
+@single_flight
 def event_stats():
-    events = DepartmentEvent.query.all()
-    participants = EventParticipant.query.all()
-
-    events_by_type = defaultdict(int)
-    for event in events:
-        events_by_type[event.event_type] += 1
-
-    program_counts = defaultdict(int)
-    department_counts = defaultdict(int)
-    for part in participants:
-        if part.approval_status == "approved":
-            if part.program:
-                program_counts[part.program] += 1
-            if part.department:
-                department_counts[part.department] += 1
+    try:
+        start = _parse_datetime_arg("from")
+        end = _parse_datetime_arg("to")
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO 8601 dates"}), 400
 
-    return jsonify({
-        "events_by_type": dict(events_by_type),
-        "total_events": len(events),
-        "approved_participants": len([p for p in participants if p.approval_status == "approved"]),
-        "program_counts": dict(program_counts),
-        "department_counts": dict(department_counts),
-    }), 200
\ No newline at end of file
+    interval = request.args.get("interval")
+    if interval and interval not in SERIES_INTERVALS:
+        return jsonify({"error": f"interval must be one of: {', '.join(SERIES_INTERVALS)}"}), 400
+
+    filters = {
+        "start": start,
+        "end": end,
+        "department": request.args.get("department"),
+        "status": request.args.get("status"),
+    }
+    stats = event_statistics(**filters)
+    if interval:
+        stats["participation_series"] = participation_series(interval, **filters)
+
+    return jsonify(stats), 200
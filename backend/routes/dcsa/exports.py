@@ -0,0 +1,138 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import case, select
+from ...models.user import User, db
+from ...models.dcsa import (
+    Course, ResearchPublication, Achievement,
+    DepartmentEvent, EventParticipant
+)
+from ...utils.streaming import csv_chunks, ndjson_chunks, gzip_chunks
+from datetime import datetime
+
+exports = Blueprint('exports', __name__)
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+FORMATS = {
+    'csv': ('text/csv', csv_chunks),
+    'ndjson': ('application/x-ndjson', ndjson_chunks),
+}
+
+def _visible(viewer, column):
+    """``column`` for profiles ``viewer`` may see, NULL for the rest."""
+    return case((User.visible_to(viewer), column), else_=None)
+
+def _directory_export(viewer):
+    columns = [
+        ('id', User.id),
+        ('full_name', User.full_name),
+        ('email', case((User.email_visibility.is_(True), User.email), else_=None)),
+        ('is_alumni', User.is_alumni),
+        ('course', Course.name),
+        ('batch_year', User.batch_year),
+        ('graduation_year', User.graduation_year),
+        ('company', User.company),
+        ('position', User.position),
+        ('placement_company', User.placement_company),
+        ('placement_year', User.placement_year),
+        ('location', User.location),
+        ('linkedin', User.linkedin),
+    ]
+    statement = (select(*(column for _, column in columns))
+                 .outerjoin(Course, User.course_id == Course.id)
+                 .where(User.visible_to(viewer))
+                 .order_by(User.id))
+    return [name for name, _ in columns], statement
+
+def _publications_export(viewer):
+    columns = [
+        ('id', ResearchPublication.id),
+        ('title', ResearchPublication.title),
+        ('authors', ResearchPublication.authors),
+        ('publication_type', ResearchPublication.publication_type),
+        ('journal_name', ResearchPublication.journal_name),
+        ('conference_name', ResearchPublication.conference_name),
+        ('year', ResearchPublication.year),
+        ('doi', ResearchPublication.doi),
+        ('url', ResearchPublication.url),
+        ('citation_count', ResearchPublication.citation_count),
+        ('author', _visible(viewer, User.full_name)),
+    ]
+    statement = (select(*(column for _, column in columns))
+                 .outerjoin(User, ResearchPublication.user_id == User.id)
+                 .order_by(ResearchPublication.id))
+    return [name for name, _ in columns], statement
+
+def _achievements_export(viewer):
+    columns = [
+        ('id', Achievement.id),
+        ('title', Achievement.title),
+        ('achievement_type', Achievement.achievement_type),
+        ('date', Achievement.date),
+        ('proof_url', Achievement.proof_url),
+        ('user_id', _visible(viewer, Achievement.user_id)),
+        ('user', _visible(viewer, User.full_name)),
+    ]
+    statement = (select(*(column for _, column in columns))
+                 .outerjoin(User, Achievement.user_id == User.id)
+                 .order_by(Achievement.id))
+    return [name for name, _ in columns], statement
+
+def _event_participants_export(viewer):
+    columns = [
+        ('event_id', EventParticipant.event_id),
+        ('event_title', DepartmentEvent.title),
+        ('event_start', DepartmentEvent.start_date),
+        ('user_id', EventParticipant.user_id),
+        ('program', EventParticipant.program),
+        ('department', EventParticipant.department),
+        ('registration_date', EventParticipant.registration_date),
+        ('approval_status', EventParticipant.approval_status),
+        ('attendance_status', EventParticipant.attendance_status),
+        ('certificate_issued', EventParticipant.certificate_issued),
+    ]
+    statement = (select(*(column for _, column in columns))
+                 .join(DepartmentEvent, EventParticipant.event_id == DepartmentEvent.id)
+                 .order_by(EventParticipant.event_id, EventParticipant.user_id))
+    return [name for name, _ in columns], statement
+
+DATASETS = {
+    'directory': _directory_export,
+    'publications': _publications_export,
+    'achievements': _achievements_export,
+    'event-participants': _event_participants_export,
+}
+
+@exports.route('/api/dcsa/export/<dataset>', methods=['GET'])
+@jwt_required()
+def export_dataset(dataset):
+    """Stream a dataset as CSV or newline-delimited JSON (faculty/admin only)"""
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or not (current_user.is_faculty or getattr(current_user, 'role', None) == 'admin'):
+        return jsonify({'error': 'Only faculty members can export data'}), 403
+
+    if dataset not in DATASETS:
+        return jsonify({'error': f"Unknown dataset. Choose one of: {', '.join(DATASETS)}"}), 404
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    compress = request.args.get('gzip') in {'1', 'true', 'True'}
+
+    header, statement = DATASETS[dataset](current_user)
+    mimetype, encode = FORMATS[export_format]
+
+    def rows():
+        result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in result:
+            yield tuple(row)
+
+    body = encode(header, rows())
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d}.{export_format}"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    if compress:
+        body = gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
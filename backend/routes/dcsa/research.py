@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.user import User, db
-from ..models.dcsa import ResearchPublication, DepartmentRole
+from ...models.user import User, db
+from ...models.dcsa import ResearchPublication, DepartmentRole
+from ...utils.response_cache import cached_response
+from ...utils.singleflight import single_flight
 from datetime import datetime
 
 research = Blueprint('research', __name__)
@@ -119,6 +121,8 @@ def get_research_roles():
     } for role in roles]), 200
 
 @research.route('/api/dcsa/research-stats', methods=['GET'])
+@cached_response('publications', 'users')
+@single_flight
 def get_research_stats():
     """Get research statistics"""
     # Publications by year
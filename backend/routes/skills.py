@@ -5,6 +5,20 @@ from ..models.profile import Skill, UserSkill
 
 skills = Blueprint('skills', __name__)
 
+def user_skills_payload(user_id):
+    """A user's skills with their proficiency, in one joined query"""
+    rows = (db.session.query(Skill, UserSkill)
+            .join(UserSkill, UserSkill.skill_id == Skill.id)
+            .filter(UserSkill.user_id == user_id)
+            .all())
+    return [{
+        'id': skill.id,
+        'name': skill.name,
+        'category': skill.category,
+        'proficiency_level': user_skill.proficiency_level,
+        'years_of_experience': user_skill.years_of_experience
+    } for skill, user_skill in rows]
+
 @skills.route('/api/skills', methods=['GET'])
 @jwt_required()
 def get_user_skills():
@@ -15,22 +29,7 @@ def get_user_skills():
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    skills_data = []
-    for skill in user.skills:
-        user_skill = UserSkill.query.filter_by(
-            user_id=user.id,
-            skill_id=skill.id
-        ).first()
-        
-        skills_data.append({
-            'id': skill.id,
-            'name': skill.name,
-            'category': skill.category,
-            'proficiency_level': user_skill.proficiency_level if user_skill else None,
-            'years_of_experience': user_skill.years_of_experience if user_skill else None
-        })
-    
-    return jsonify(skills_data), 200
+    return jsonify(user_skills_payload(user.id)), 200
 
 @skills.route('/api/skills', methods=['POST'])
 @jwt_required()
@@ -0,0 +1,33 @@
+import csv
+import io
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ...models.user import User
+from ...utils.attendance_import import import_attendance_csv
+
+attendance = Blueprint('attendance', __name__)
+
+@attendance.route('/api/student/attendance/import', methods=['POST'])
+@jwt_required()
+def import_attendance():
+    """Bulk import attendance from a CSV upload (faculty/admin only)
+
+    Send the file as multipart field ``file`` or as a raw text/csv body.
+    Columns: roll_number, subject_code, date, status and optional remarks.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or not (current_user.is_faculty or getattr(current_user, 'role', None) == 'admin'):
+        return jsonify({'error': 'Only faculty members can import attendance'}), 403
+
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    # utf-8-sig drops the byte-order mark spreadsheet exports often start with
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    try:
+        report = import_attendance_csv(lines)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(report), 200
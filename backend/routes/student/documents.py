@@ -0,0 +1,447 @@
+import base64
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Blueprint, current_app, request, jsonify, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import and_, or_, update
+from werkzeug.utils import send_file
+from ...models.user import User, db
+from ...models.student import StudentProfile, Document, DocumentUpload
+from ...utils.document_storage import (
+    DocumentTooLarge, document_content_type, document_storage,
+    download_token, read_download_token
+)
+from .profile import document_payload
+
+documents = Blueprint('documents', __name__)
+
+def _current_profile():
+    return StudentProfile.query.filter_by(user_id=get_jwt_identity()).first()
+
+def _owned_upload(upload_id):
+    """The caller's upload with this id, or None"""
+    student_profile = _current_profile()
+    if not student_profile:
+        return None
+    return DocumentUpload.query.filter_by(id=upload_id, student_profile_id=student_profile.id).first()
+
+def _upload_status(upload, status=200):
+    response = jsonify({'upload_id': upload.id, 'offset': upload.received, 'size': upload.total_size})
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(upload.received)
+    response.headers['Upload-Length'] = str(upload.total_size)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def _purge_stale_uploads():
+    """Drop resumable uploads nobody has touched within DOCUMENT_UPLOAD_TTL_HOURS"""
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config.get('DOCUMENT_UPLOAD_TTL_HOURS', 24))
+    stale = DocumentUpload.query.filter(DocumentUpload.updated_at < cutoff).all()
+    for upload in stale:
+        document_storage.discard_upload(upload.id)
+        db.session.delete(upload)
+    if stale:
+        db.session.commit()
+
+@documents.route('/api/student/documents/uploads', methods=['POST'])
+@jwt_required()
+def start_upload():
+    """Start a resumable document upload
+
+    JSON body: ``document_type``, ``file_name``, ``size`` in bytes and
+    optionally ``content_type``. Send the bytes with PATCH requests to
+    the returned upload, each carrying an ``Upload-Offset`` header.
+    """
+    student_profile = _current_profile()
+    if not student_profile:
+        return jsonify({'error': 'Student profile not found'}), 404
+
+    data = request.get_json() or {}
+    size = data.get('size')
+    if not data.get('document_type') or not data.get('file_name'):
+        return jsonify({'error': 'document_type and file_name are required'}), 400
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({'error': 'size must be a positive number of bytes'}), 400
+    if document_storage.max_size and size > document_storage.max_size:
+        return jsonify({'error': f'Documents may be at most {document_storage.max_size} bytes'}), 413
+    content_type = document_content_type(data['file_name'], data.get('content_type'))
+    if not content_type:
+        return jsonify({'error': 'Documents must be PDF or image files'}), 415
+
+    _purge_stale_uploads()
+    upload = DocumentUpload(
+        id=uuid.uuid4().hex,
+        student_profile_id=student_profile.id,
+        document_type=data['document_type'],
+        file_name=data['file_name'][:200],
+        content_type=content_type,
+        total_size=size,
+        received=0
+    )
+    document_storage.begin_upload(upload.id)
+    db.session.add(upload)
+    db.session.commit()
+
+    response = _upload_status(upload, 201)
+    response.headers['Location'] = f'/api/student/documents/uploads/{upload.id}'
+    return response
+
+@documents.route('/api/student/documents/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def upload_status(upload_id):
+    """How many bytes of an upload have arrived, to resume after an interruption"""
+    upload = _owned_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    return _upload_status(upload)
+
+@documents.route('/api/student/documents/uploads/<upload_id>', methods=['PATCH'])
+@jwt_required()
+def append_upload(upload_id):
+    """Append the request body to an upload at ``Upload-Offset``
+
+    The offset must equal the bytes received so far (409 otherwise, with
+    the current offset). When the last byte arrives the document is
+    created and returned with 201.
+    """
+    upload = _owned_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
+    if offset != upload.received:
+        return _upload_status(upload, 409)
+
+    try:
+        chunk_path, length = document_storage.stage_chunk(request.stream, upload.total_size - offset)
+    except DocumentTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+
+    try:
+        # Claim the offset before touching the part file: only one of two
+        # racing chunks wins, and the row stays locked until the commit,
+        # so the next chunk cannot append before this one is in place
+        result = db.session.execute(
+            update(DocumentUpload)
+            .where(DocumentUpload.id == upload.id, DocumentUpload.received == offset)
+            .values(received=offset + length, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.session.rollback()
+            db.session.refresh(upload)
+            return _upload_status(upload, 409)
+        try:
+            received = document_storage.append(upload.id, offset, chunk_path)
+        except BaseException:
+            db.session.rollback()
+            raise
+        db.session.commit()
+    finally:
+        document_storage.discard_chunk(chunk_path)
+    db.session.refresh(upload)
+
+    if received < upload.total_size:
+        return _upload_status(upload)
+
+    content_hash, file_path = document_storage.finish_upload(upload.id, received)
+    document = Document(
+        student_profile_id=upload.student_profile_id,
+        document_type=upload.document_type,
+        file_name=upload.file_name,
+        file_path=file_path,
+        content_hash=content_hash,
+        file_size=received,
+        content_type=upload.content_type,
+        upload_date=datetime.utcnow()
+    )
+    db.session.add(document)
+    db.session.delete(upload)
+    db.session.commit()
+    return jsonify({
+        'message': 'Document uploaded successfully',
+        'document_id': document.id,
+        'content_hash': content_hash,
+        'file_size': received
+    }), 201
+
+@documents.route('/api/student/documents/uploads/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_upload(upload_id):
+    """Abandon an upload and discard the bytes received so far"""
+    upload = _owned_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    document_storage.discard_upload(upload.id)
+    db.session.delete(upload)
+    db.session.commit()
+    return '', 204
+
+def _is_verifier(user):
+    return bool(user and (user.is_faculty or getattr(user, 'role', None) == 'admin'))
+
+@documents.route('/api/student/documents/<int:document_id>/download-url', methods=['GET'])
+@jwt_required()
+def document_download_url(document_id):
+    """Short-lived signed URL for a document's file (its owner or a verifier)"""
+    current_user = User.query.get(get_jwt_identity())
+    document = Document.query.get_or_404(document_id)
+    owner_id = db.session.query(StudentProfile.user_id).filter_by(id=document.student_profile_id).scalar()
+    if not current_user or not (owner_id == current_user.id or _is_verifier(current_user)):
+        return jsonify({'error': 'Not authorized to download this document'}), 403
+    if not document.content_hash:
+        return jsonify({'error': 'No file was stored for this document'}), 404
+
+    ttl = current_app.config.get('DOCUMENT_URL_TTL', 300)
+    token = download_token(document.id, document.content_hash, ttl)
+    return jsonify({
+        'url': url_for('documents.download_document', document_id=document.id, token=token, _external=True),
+        'expires_in': ttl
+    }), 200
+
+@documents.route('/api/student/documents/<int:document_id>/file', methods=['GET'])
+def download_document(document_id):
+    """Serve a document's file to the holder of a signed URL
+
+    The token from download-url is the only authorization, so the check
+    is one HMAC and the link works where no JWT can be sent (links,
+    <img> and PDF viewers). Range, If-None-Match and If-Modified-Since
+    are honoured. With DOCUMENT_SENDFILE set the bytes are sent by the
+    front-end server through X-Accel-Redirect or X-Sendfile; otherwise
+    the WSGI server's file wrapper streams them (sendfile under gunicorn).
+    """
+    claims = read_download_token(request.args.get('token', ''))
+    if not claims or claims[0] != document_id:
+        return jsonify({'error': 'Invalid or expired download link'}), 403
+    _, content_hash, expires = claims
+
+    document = db.session.get(Document, document_id)
+    if not document or document.content_hash != content_hash:
+        return jsonify({'error': 'Document not found'}), 404
+
+    offload = current_app.config.get('DOCUMENT_SENDFILE')
+    response = send_file(
+        document_storage.path_for(document.file_path),
+        request.environ,
+        mimetype=document.content_type,
+        download_name=document.file_name or f'document-{document.id}',
+        # The stored bytes never change for a hash, so it makes an exact ETag
+        etag=content_hash,
+        # Ranges are cut here, or by the front-end server when offloading
+        conditional=not offload,
+        use_x_sendfile=bool(offload),
+        response_class=current_app.response_class,
+    )
+    if offload:
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            # Nothing to send: the front-end server must not serve the file
+            del response.headers['X-Sendfile']
+        elif offload == 'x-accel-redirect':
+            del response.headers['X-Sendfile']
+            prefix = current_app.config.get('DOCUMENT_ACCEL_PREFIX', '/protected-documents/')
+            response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + document.file_path
+
+    # Cacheable by the browser only, and only while the link is valid
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = max(0, int(expires - time.time()))
+    return response
+
+# Verification queue: reviewers claim batches of unverified documents, oldest
+# first, and verify them a batch at a time
+
+QUEUE_PAGE_SIZE = 50
+MAX_CLAIM_BATCH = 200
+
+def _encode_queue_cursor(document):
+    raw = f'{document.upload_date.isoformat()}|{document.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_queue_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    uploaded, document_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    return datetime.fromisoformat(uploaded), int(document_id)
+
+def _unverified(document_type=None):
+    """Query over the verification queue, in (upload_date, id) order"""
+    query = Document.query.filter(Document.verified.is_(False), Document.upload_date.isnot(None))
+    if document_type:
+        query = query.filter(Document.document_type == document_type)
+    return query.order_by(Document.upload_date, Document.id)
+
+def _unclaimed(now):
+    return or_(Document.claimed_by.is_(None), Document.claim_expires_at < now)
+
+def _queue_payload(document, roll_number, now):
+    payload = document_payload(document)
+    claimed = document.claimed_by is not None and document.claim_expires_at >= now
+    payload.update({
+        'roll_number': roll_number,
+        'claimed_by': document.claimed_by if claimed else None,
+        'claim_expires_at': document.claim_expires_at.isoformat() if claimed else None
+    })
+    return payload
+
+def _queue_rows(ids):
+    rows = (db.session.query(Document, StudentProfile.roll_number)
+            .join(StudentProfile, StudentProfile.id == Document.student_profile_id)
+            .filter(Document.id.in_(ids))
+            .order_by(Document.upload_date, Document.id)
+            .all()) if ids else []
+    return rows
+
+@documents.route('/api/student/documents/verification-queue', methods=['GET'])
+@jwt_required()
+def verification_queue():
+    """List unverified documents, oldest upload first
+
+    Query parameters: ``document_type``, ``unclaimed=true`` to hide
+    documents another reviewer holds, ``limit`` and ``cursor`` (the
+    X-Next-Cursor header of the previous page).
+    """
+    if not _is_verifier(User.query.get(get_jwt_identity())):
+        return jsonify({'error': 'Not authorized to verify documents'}), 403
+
+    limit = min(max(request.args.get('limit', QUEUE_PAGE_SIZE, type=int), 1), MAX_CLAIM_BATCH)
+    now = datetime.utcnow()
+    query = (_unverified(request.args.get('document_type'))
+             .join(StudentProfile, StudentProfile.id == Document.student_profile_id)
+             .add_columns(StudentProfile.roll_number))
+    if request.args.get('unclaimed', '').lower() == 'true':
+        query = query.filter(_unclaimed(now))
+    if request.args.get('cursor'):
+        try:
+            cursor_date, cursor_id = _decode_queue_cursor(request.args['cursor'])
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(or_(
+            Document.upload_date > cursor_date,
+            and_(Document.upload_date == cursor_date, Document.id > cursor_id)
+        ))
+
+    rows = query.limit(limit + 1).all()
+    response = jsonify([_queue_payload(document, roll_number, now) for document, roll_number in rows[:limit]])
+    if len(rows) > limit:
+        response.headers['X-Next-Cursor'] = _encode_queue_cursor(rows[limit - 1][0])
+    return response, 200
+
+@documents.route('/api/student/documents/verification-queue/claim', methods=['POST'])
+@jwt_required()
+def claim_verification_batch():
+    """Claim the oldest unclaimed documents for review
+
+    JSON body: ``batch_size`` (default 50) and optionally
+    ``document_type``. The claim lasts DOCUMENT_CLAIM_TTL_MINUTES and is
+    identified by the returned ``claim_token``. Reviewers claiming at
+    the same time get disjoint batches: on PostgreSQL rows locked by
+    another claim are skipped (FOR UPDATE SKIP LOCKED), and everywhere
+    the claim is written with an UPDATE that only takes rows still
+    unclaimed, so a row can only ever go to one reviewer.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_verifier(current_user):
+        return jsonify({'error': 'Not authorized to verify documents'}), 403
+
+    data = request.get_json(silent=True) or {}
+    batch_size = data.get('batch_size', QUEUE_PAGE_SIZE)
+    if not isinstance(batch_size, int) or not 0 < batch_size <= MAX_CLAIM_BATCH:
+        return jsonify({'error': f'batch_size must be between 1 and {MAX_CLAIM_BATCH}'}), 400
+
+    now = datetime.utcnow()
+    candidates = [document_id for (document_id,) in (
+        _unverified(data.get('document_type'))
+        .filter(_unclaimed(now))
+        .with_entities(Document.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )]
+
+    token = uuid.uuid4().hex
+    expires_at = now + timedelta(minutes=current_app.config.get('DOCUMENT_CLAIM_TTL_MINUTES', 15))
+    if candidates:
+        db.session.execute(
+            update(Document)
+            .where(Document.id.in_(candidates), Document.verified.is_(False), _unclaimed(now))
+            .values(claimed_by=current_user.id, claim_token=token, claim_expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+
+    claimed = [document_id for (document_id,) in
+               db.session.query(Document.id).filter(Document.claim_token == token)]
+    return jsonify({
+        'claim_token': token,
+        'claim_expires_at': expires_at.isoformat(),
+        'documents': [_queue_payload(document, roll_number, now)
+                      for document, roll_number in _queue_rows(claimed)]
+    }), 200
+
+def _claim_filter(current_user, data, now):
+    """Conditions selecting the caller's live claim, optionally narrowed to document_ids"""
+    conditions = [
+        Document.claim_token == data.get('claim_token'),
+        Document.claimed_by == current_user.id,
+        Document.claim_expires_at >= now
+    ]
+    if data.get('document_ids') is not None:
+        conditions.append(Document.id.in_(data['document_ids']))
+    return conditions
+
+@documents.route('/api/student/documents/verification-queue/verify', methods=['POST'])
+@jwt_required()
+def verify_claimed_documents():
+    """Mark a claimed batch verified in one update
+
+    JSON body: ``claim_token`` and optionally ``document_ids`` to verify
+    only part of the batch. Documents whose claim has expired are left
+    alone; the response says how many were verified.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_verifier(current_user):
+        return jsonify({'error': 'Not authorized to verify documents'}), 403
+    data = request.get_json(silent=True) or {}
+    if not data.get('claim_token'):
+        return jsonify({'error': 'claim_token is required'}), 400
+    if data.get('document_ids') is not None and not isinstance(data['document_ids'], list):
+        return jsonify({'error': 'document_ids must be a list'}), 400
+
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(Document)
+        .where(Document.verified.is_(False), *_claim_filter(current_user, data, now))
+        .values(verified=True, verification_date=now, verified_by=current_user.id,
+                claimed_by=None, claim_token=None, claim_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return jsonify({'message': 'Documents verified', 'verified': result.rowcount}), 200
+
+@documents.route('/api/student/documents/verification-queue/release', methods=['POST'])
+@jwt_required()
+def release_claimed_documents():
+    """Return claimed documents to the queue without verifying them
+
+    JSON body: ``claim_token`` and optionally ``document_ids``.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_verifier(current_user):
+        return jsonify({'error': 'Not authorized to verify documents'}), 403
+    data = request.get_json(silent=True) or {}
+    if not data.get('claim_token'):
+        return jsonify({'error': 'claim_token is required'}), 400
+    if data.get('document_ids') is not None and not isinstance(data['document_ids'], list):
+        return jsonify({'error': 'document_ids must be a list'}), 400
+
+    result = db.session.execute(
+        update(Document)
+        .where(*_claim_filter(current_user, data, datetime.utcnow()))
+        .values(claimed_by=None, claim_token=None, claim_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return jsonify({'message': 'Documents released', 'released': result.rowcount}), 200
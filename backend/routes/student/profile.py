@@ -1,40 +1,24 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.user import User, db
-from ..models.student import (
+from ...models.user import User, db
+from ...models.student import (
     StudentProfile, SemesterRecord, SubjectRecord,
     AttendanceRecord, Document
 )
+from ...utils.attendance import attendance_for
+from ...utils.document_storage import DocumentTooLarge, document_content_type, document_storage
+from ..dcsa.events import participation_payload
+from ..skills import user_skills_payload
 from datetime import datetime
 
 student = Blueprint('student', __name__)
 
-@student.route('/api/student/profile', methods=['GET'])
-@jwt_required()
-def get_student_profile():
-    """Get current student's profile"""
-    current_user_id = get_jwt_identity()
-    student_profile = StudentProfile.query.filter_by(user_id=current_user_id).first()
-    
-    if not student_profile:
-        return jsonify({'error': 'Student profile not found'}), 404
-    
-    # Get latest semester record
-    latest_semester = (SemesterRecord.query
-                      .filter_by(student_profile_id=student_profile.id)
-                      .order_by(SemesterRecord.semester_number.desc())
-                      .first())
-    
-    # Calculate overall attendance
-    attendance_records = AttendanceRecord.query.filter_by(student_profile_id=student_profile.id)
-    total_classes = attendance_records.count()
-    if total_classes > 0:
-        present_classes = attendance_records.filter_by(status='Present').count()
-        overall_attendance = (present_classes / total_classes) * 100
-    else:
-        overall_attendance = 0
-    
-    return jsonify({
+# Sections /api/student/dashboard can return, in response order
+DASHBOARD_SECTIONS = ('profile', 'semesters', 'documents', 'skills', 'events')
+
+def profile_payload(student_profile, latest_semester, attendance):
+    """Profile body shared by the profile and dashboard endpoints"""
+    return {
         'personal_info': {
             'roll_number': student_profile.roll_number,
             'current_semester': student_profile.current_semester,
@@ -44,7 +28,8 @@ def get_student_profile():
             'category': student_profile.category,
             'phone_number': student_profile.phone_number,
             'alternate_email': student_profile.alternate_email,
-            'address': student_profile.address
+            'permanent_address': student_profile.permanent_address,
+            'current_address': student_profile.current_address
         },
         'academic_info': {
             'enrollment_date': student_profile.enrollment_date.isoformat() if student_profile.enrollment_date else None,
@@ -62,16 +47,60 @@ def get_student_profile():
             'attendance': latest_semester.attendance_percentage if latest_semester else None,
             'status': latest_semester.status if latest_semester else None
         },
-        'overall_attendance': overall_attendance,
-        'parent_info': {
-            'father_name': student_profile.father_name,
-            'father_occupation': student_profile.father_occupation,
-            'father_phone': student_profile.father_phone,
-            'mother_name': student_profile.mother_name,
-            'mother_occupation': student_profile.mother_occupation,
-            'mother_phone': student_profile.mother_phone
+        'overall_attendance': attendance['overall_attendance'],
+        'subject_attendance': attendance['subjects']
+    }
+
+def semester_payload(sem):
+    return {
+        'semester_number': sem.semester_number,
+        'sgpa': sem.sgpa,
+        'cgpa': sem.cgpa,
+        'status': sem.status,
+        'attendance': sem.attendance_percentage,
+        'subjects': {
+            'registered': sem.subjects_registered,
+            'cleared': sem.subjects_cleared,
+            'backlog': sem.backlog_subjects
+        },
+        'duration': {
+            'start': sem.semester_start_date.isoformat() if sem.semester_start_date else None,
+            'end': sem.semester_end_date.isoformat() if sem.semester_end_date else None
         }
-    }), 200
+    }
+
+def document_payload(doc):
+    return {
+        'id': doc.id,
+        'document_type': doc.document_type,
+        'file_name': doc.file_name,
+        'content_type': doc.content_type,
+        'file_size': doc.file_size,
+        'upload_date': doc.upload_date.isoformat(),
+        'verified': doc.verified,
+        'verification_date': doc.verification_date.isoformat() if doc.verification_date else None
+    }
+
+@student.route('/api/student/profile', methods=['GET'])
+@jwt_required()
+def get_student_profile():
+    """Get current student's profile"""
+    current_user_id = get_jwt_identity()
+    student_profile = StudentProfile.query.filter_by(user_id=current_user_id).first()
+    
+    if not student_profile:
+        return jsonify({'error': 'Student profile not found'}), 404
+    
+    # Get latest semester record
+    latest_semester = (SemesterRecord.query
+                      .filter_by(student_profile_id=student_profile.id)
+                      .order_by(SemesterRecord.semester_number.desc())
+                      .first())
+    
+    # Overall and per-subject attendance from the configured attendance store
+    attendance = attendance_for(student_profile.id)
+    
+    return jsonify(profile_payload(student_profile, latest_semester, attendance)), 200
 
 @student.route('/api/student/profile', methods=['PUT'])
 @jwt_required()
@@ -124,32 +153,53 @@ def get_student_documents():
     
     documents = Document.query.filter_by(student_profile_id=student_profile.id).all()
     
-    return jsonify([{
-        'id': doc.id,
-        'document_type': doc.document_type,
-        'file_name': doc.file_name,
-        'upload_date': doc.upload_date.isoformat(),
-        'verified': doc.verified,
-        'verification_date': doc.verification_date.isoformat() if doc.verification_date else None
-    } for doc in documents]), 200
+    return jsonify([document_payload(doc) for doc in documents]), 200
 
 @student.route('/api/student/documents', methods=['POST'])
 @jwt_required()
 def upload_document():
-    """Upload a new student document"""
+    """Upload a new student document
+
+    Send the file as multipart field ``file`` with a ``document_type``
+    form field, or stream the raw bytes as the request body with
+    ``document_type`` and ``file_name`` in the query string. Large scans
+    can use the resumable /api/student/documents/uploads endpoints.
+    """
     current_user_id = get_jwt_identity()
     student_profile = StudentProfile.query.filter_by(user_id=current_user_id).first()
     
     if not student_profile:
         return jsonify({'error': 'Student profile not found'}), 404
     
-    data = request.get_json()
+    upload = request.files.get('file')
+    if upload:
+        fields, stream, file_name, declared_type = request.form, upload.stream, upload.filename, upload.mimetype
+    else:
+        fields, stream, declared_type = request.args, request.stream, request.mimetype
+        file_name = fields.get('file_name')
+    
+    document_type = fields.get('document_type')
+    if not document_type or not file_name:
+        return jsonify({'error': 'document_type and a file name are required'}), 400
+    content_type = document_content_type(file_name, declared_type)
+    if not content_type:
+        return jsonify({'error': 'Documents must be PDF or image files'}), 415
+    
+    try:
+        content_hash, file_size, file_path = document_storage.save(stream)
+    except DocumentTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    if not file_size:
+        return jsonify({'error': 'The uploaded file is empty'}), 400
     
     document = Document(
         student_profile_id=student_profile.id,
-        document_type=data['document_type'],
-        file_name=data['file_name'],
-        file_path=data['file_path'],
+        document_type=document_type,
+        file_name=file_name[:200],
+        file_path=file_path,
+        content_hash=content_hash,
+        file_size=file_size,
+        content_type=content_type,
         upload_date=datetime.utcnow()
     )
     
@@ -159,7 +209,9 @@ def upload_document():
         db.session.commit()
         return jsonify({
             'message': 'Document uploaded successfully',
-            'document_id': document.id
+            'document_id': document.id,
+            'content_hash': content_hash,
+            'file_size': file_size
         }), 201
     except Exception as e:
         db.session.rollback()
@@ -179,19 +231,56 @@ def get_semester_history():
         student_profile_id=student_profile.id
     ).order_by(SemesterRecord.semester_number).all()
     
-    return jsonify([{
-        'semester_number': sem.semester_number,
-        'sgpa': sem.sgpa,
-        'cgpa': sem.cgpa,
-        'status': sem.status,
-        'attendance': sem.attendance_percentage,
-        'subjects': {
-            'registered': sem.subjects_registered,
-            'cleared': sem.subjects_cleared,
-            'backlog': sem.backlog_subjects
-        },
-        'duration': {
-            'start': sem.semester_start_date.isoformat() if sem.semester_start_date else None,
-            'end': sem.semester_end_date.isoformat() if sem.semester_end_date else None
-        }
-    } for sem in semesters]), 200
\ No newline at end of file
+    return jsonify([semester_payload(sem) for sem in semesters]), 200
+
+@student.route('/api/student/dashboard', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """Everything the student dashboard shows, in one request
+
+    Replaces separate calls to the profile, semester history, documents,
+    skills and event participation endpoints. ``sections`` picks a
+    comma-separated subset of profile, semesters, documents, skills and
+    events (default: all). The profile is resolved once and each section
+    costs a single query.
+    """
+    requested = request.args.get('sections')
+    if requested:
+        sections = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in sections if name not in DASHBOARD_SECTIONS]
+        if unknown:
+            return jsonify({'error': f"Unknown sections: {', '.join(unknown)}. "
+                                     f"Choose from: {', '.join(DASHBOARD_SECTIONS)}"}), 400
+    else:
+        sections = DASHBOARD_SECTIONS
+
+    current_user_id = get_jwt_identity()
+    student_profile = StudentProfile.query.filter_by(user_id=current_user_id).first()
+    
+    if not student_profile:
+        return jsonify({'error': 'Student profile not found'}), 404
+    
+    dashboard = {}
+    # Profile and semester history share one semester query
+    if 'profile' in sections or 'semesters' in sections:
+        semesters = (SemesterRecord.query
+                     .filter_by(student_profile_id=student_profile.id)
+                     .order_by(SemesterRecord.semester_number)
+                     .all())
+    if 'profile' in sections:
+        dashboard['profile'] = profile_payload(
+            student_profile,
+            semesters[-1] if semesters else None,
+            attendance_for(student_profile.id)
+        )
+    if 'semesters' in sections:
+        dashboard['semesters'] = [semester_payload(sem) for sem in semesters]
+    if 'documents' in sections:
+        documents = Document.query.filter_by(student_profile_id=student_profile.id).all()
+        dashboard['documents'] = [document_payload(doc) for doc in documents]
+    if 'skills' in sections:
+        dashboard['skills'] = user_skills_payload(student_profile.user_id)
+    if 'events' in sections:
+        dashboard['events'] = participation_payload(student_profile.user_id)
+    
+    return jsonify(dashboard), 200
\ No newline at end of file
@@ -0,0 +1,65 @@
+import csv
+import io
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ...models.user import User
+from ...utils.response_cache import cached_response
+from ...utils.results import ANALYTICS_BINS, import_results_csv, subject_analytics
+from ...utils.singleflight import single_flight
+
+results = Blueprint('results', __name__)
+
+def _is_faculty_or_admin(user):
+    return bool(user and (user.is_faculty or getattr(user, 'role', None) == 'admin'))
+
+@results.route('/api/student/results/import', methods=['POST'])
+@jwt_required()
+def import_results():
+    """Bulk import a cohort's subject results from CSV and recompute SGPA/CGPA (faculty/admin only)
+
+    Send the file as multipart field ``file`` or as a raw text/csv body.
+    Columns: roll_number, semester_number, subject_code, subject_name,
+    credits, grade and optional internal_marks, external_marks,
+    total_marks and result_status.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_faculty_or_admin(current_user):
+        return jsonify({'error': 'Only faculty members can import results'}), 403
+
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    # utf-8-sig drops the byte-order mark spreadsheet exports often start with
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    try:
+        report = import_results_csv(lines)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(report), 200
+
+@results.route('/api/student/results/subjects/<subject_code>/analytics', methods=['GET'])
+@jwt_required()
+def get_subject_analytics(subject_code):
+    """Grade distribution, pass rate, percentiles and outliers for a subject (faculty/admin only)
+
+    Optional query arguments: ``semester`` to limit to one semester
+    number and ``bins`` for the marks histograms.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    if not _is_faculty_or_admin(current_user):
+        return jsonify({'error': 'Only faculty members can view result analytics'}), 403
+
+    semester = request.args.get('semester', type=int)
+    bins = request.args.get('bins', ANALYTICS_BINS, type=int)
+    if not 1 <= bins <= 50:
+        return jsonify({'error': 'bins must be between 1 and 50'}), 400
+    return _subject_analytics(subject_code.upper(), semester, bins)
+
+# Cached per subject, semester and bins (the request's view and query
+# arguments) once the caller has been authorised
+@cached_response('results')
+@single_flight
+def _subject_analytics(subject_code, semester, bins):
+    return jsonify(subject_analytics(subject_code, semester, bins)), 200
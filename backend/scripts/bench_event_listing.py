@@ -0,0 +1,131 @@
+"""Benchmark the approved-upcoming event listing against a large event history.
+
+Seeds a scratch SQLite database (or the empty database given with
+--database, whose tables are dropped again afterwards) with historical
+events and reports latency percentiles for the first page of
+``/api/dcsa/events?upcoming=true``, with and without the
+(status, start_date) and (department, start_date) indexes.
+
+    python backend/scripts/bench_event_listing.py --events 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from sqlalchemy import text
+
+from backend.models.user import db
+from backend.models.dcsa import DepartmentEvent
+from backend.routes.dcsa.events import events
+
+STATUSES = ['approved'] * 8 + ['pending', 'rejected']
+DEPARTMENTS = ['DCSA', 'UIET', 'UBS', 'Physics', 'Chemistry']
+EVENT_TYPES = ['Workshop', 'Conference', 'Seminar', 'Alumni Meet']
+INDEXES = ['ix_department_event_status_start_date', 'ix_department_event_department_start_date']
+
+
+def build_app(database_uri):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['JWT_SECRET_KEY'] = 'benchmark'
+    db.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(events)
+    return app
+
+
+def seed(total, upcoming):
+    now = datetime.utcnow()
+    rows = []
+    for i in range(total):
+        if i < upcoming:
+            start = now + timedelta(hours=random.randint(1, 24 * 180))
+        else:
+            start = now - timedelta(hours=random.randint(1, 24 * 365 * 10))
+        rows.append({
+            'title': f'Event {i}',
+            'event_type': random.choice(EVENT_TYPES),
+            'start_date': start,
+            'end_date': start + timedelta(hours=3),
+            'department': random.choice(DEPARTMENTS),
+            'status': random.choice(STATUSES),
+        })
+        if len(rows) == 10000:
+            db.session.execute(DepartmentEvent.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(DepartmentEvent.__table__.insert(), rows)
+    db.session.commit()
+
+
+def measure(client, path, requests):
+    client.get(path)
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.data
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p95': timings[int(len(timings) * 0.95) - 1],
+        'max': timings[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--upcoming', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--database', help='URI of an empty scratch database (default: temporary SQLite file)')
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database:
+        database_uri = args.database
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database_uri = f'sqlite:///{scratch.name}'
+
+    app = build_app(database_uri)
+    with app.app_context():
+        # Indexes and tables are dropped below, so never run against real data
+        if args.database and db.inspect(db.engine).get_table_names():
+            sys.exit('Refusing to benchmark against a database that already has tables')
+        db.create_all()
+        print(f'Seeding {args.events} events ({args.upcoming} upcoming)...')
+        seed(args.events, args.upcoming)
+
+        client = app.test_client()
+        path = '/api/dcsa/events?upcoming=true&order=asc'
+
+        indexed = measure(client, path, args.requests)
+        for name in INDEXES:
+            db.session.execute(text(f'DROP INDEX {name}'))
+        db.session.commit()
+        unindexed = measure(client, path, args.requests)
+
+        if args.database:
+            db.drop_all()
+
+    for label, result in (('with indexes', indexed), ('without indexes', unindexed)):
+        print(f"{label:>16}: p50 {result['p50']:.2f} ms  p95 {result['p95']:.2f} ms  max {result['max']:.2f} ms")
+
+    if scratch:
+        os.unlink(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
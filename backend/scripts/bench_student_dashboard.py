@@ -0,0 +1,178 @@
+"""Benchmark /api/student/dashboard against the five calls it replaces.
+
+Seeds a scratch SQLite database (or the empty database given with
+--database, whose tables are dropped again afterwards) with
+``--students`` student profiles, then gives one of them semesters,
+attendance, documents, skills and event registrations. For that student
+it reports latency percentiles and SQL statements per page load for the
+old sequence (profile, semester history, documents, skills and
+my-participation) and for the single dashboard request, with and without
+the StudentProfile.user_id index.
+
+    python backend/scripts/bench_student_dashboard.py --students 50000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from sqlalchemy import event, text
+
+from backend.models.user import User, db
+from backend.models.dcsa import DepartmentEvent, EventParticipant
+from backend.models.profile import Skill, UserSkill
+from backend.models.student import AttendanceRecord, Document, SemesterRecord, StudentProfile
+from backend.routes.dcsa.events import events
+from backend.routes.skills import skills
+from backend.routes.student.profile import student
+
+FIVE_CALLS = [
+    '/api/student/profile',
+    '/api/student/semester-history',
+    '/api/student/documents',
+    '/api/skills',
+    '/api/dcsa/events/my-participation',
+]
+DASHBOARD = ['/api/student/dashboard']
+INDEX = 'ix_student_profile_user_id'
+
+
+def build_app(database_uri):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['JWT_SECRET_KEY'] = 'benchmark'
+    app.config['SECRET_KEY'] = 'benchmark'
+    db.init_app(app)
+    JWTManager(app)
+    for blueprint in (student, skills, events):
+        app.register_blueprint(blueprint)
+    return app
+
+
+def seed(total):
+    """Create ``total`` students and return the user id of a fully populated one."""
+    rows = []
+    for i in range(total):
+        rows.append({'email': f'student{i}@example.com', 'full_name': f'Student {i}', 'created_at': datetime.utcnow()})
+        if len(rows) == 10000:
+            db.session.execute(User.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(User.__table__.insert(), rows)
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+    db.session.execute(StudentProfile.__table__.insert(), [
+        {'user_id': user_id, 'roll_number': f'R{user_id}'} for user_id in user_ids
+    ])
+    db.session.commit()
+
+    user_id = random.choice(user_ids)
+    profile_id = db.session.query(StudentProfile.id).filter_by(user_id=user_id).scalar()
+    start = date(2024, 8, 1)
+    for number in range(1, 7):
+        db.session.add(SemesterRecord(
+            student_profile_id=profile_id, semester_number=number, sgpa=8.0, cgpa=8.0,
+            semester_start_date=start, semester_end_date=start + timedelta(days=150), status='Completed',
+        ))
+        start += timedelta(days=182)
+    db.session.execute(AttendanceRecord.__table__.insert(), [
+        {'student_profile_id': profile_id, 'subject_code': f'CS10{day % 6}',
+         'date': date(2024, 8, 1) + timedelta(days=day), 'status': random.choice(['Present', 'Absent', 'Late'])}
+        for day in range(900)
+    ])
+    db.session.add_all(Document(student_profile_id=profile_id, document_type='Certificate',
+                                file_name=f'doc{i}.pdf', file_path=f'/docs/doc{i}.pdf') for i in range(10))
+    skill_rows = [Skill(name=f'Skill {i}', category='Technical') for i in range(15)]
+    db.session.add_all(skill_rows)
+    db.session.flush()
+    db.session.add_all(UserSkill(user_id=user_id, skill_id=skill.id, proficiency_level='Intermediate')
+                       for skill in skill_rows)
+    event_rows = [DepartmentEvent(title=f'Event {i}', start_date=datetime.utcnow() + timedelta(days=i + 1),
+                                  status='approved') for i in range(10)]
+    db.session.add_all(event_rows)
+    db.session.flush()
+    db.session.add_all(EventParticipant(event_id=row.id, user_id=user_id, approval_status='approved')
+                       for row in event_rows)
+    db.session.commit()
+    return user_id
+
+
+def measure(client, paths, headers, requests):
+    statements = []
+    listener = lambda *args: statements.append(1)  # noqa: E731
+    for path in paths:
+        assert client.get(path, headers=headers).status_code == 200, path
+
+    timings = []
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            for path in paths:
+                response = client.get(path, headers=headers)
+                assert response.status_code == 200, response.data
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p95': timings[int(len(timings) * 0.95) - 1],
+        'queries': len(statements) / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--database', help='URI of an empty scratch database (default: temporary SQLite file)')
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database:
+        database_uri = args.database
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database_uri = f'sqlite:///{scratch.name}'
+
+    app = build_app(database_uri)
+    results = []
+    with app.app_context():
+        # An index and the tables are dropped below, so never run against real data
+        if args.database and db.inspect(db.engine).get_table_names():
+            sys.exit('Refusing to benchmark against a database that already has tables')
+        db.create_all()
+        print(f'Seeding {args.students} students...')
+        user_id = seed(args.students)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+        client = app.test_client()
+
+        for label in ('with index', 'without index'):
+            if label == 'without index':
+                db.session.execute(text(f'DROP INDEX {INDEX}'))
+                db.session.commit()
+            results.append((f'five calls, {label}', measure(client, FIVE_CALLS, headers, args.requests)))
+            results.append((f'dashboard, {label}', measure(client, DASHBOARD, headers, args.requests)))
+
+        if args.database:
+            db.drop_all()
+
+    for label, result in results:
+        print(f"{label:>26}: p50 {result['p50']:.2f} ms  p95 {result['p95']:.2f} ms  "
+              f"{result['queries']:.0f} queries")
+
+    if scratch:
+        os.unlink(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
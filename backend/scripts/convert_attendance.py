@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from backend.config.config import Config
+from backend.models.user import db
+from backend.utils.attendance_bitmaps import bitmaps_from_records, restore_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert attendance between AttendanceRecord rows and bitmaps.')
+    parser.add_argument('direction', choices=['to-bitmaps', 'to-records'],
+                        help='to-bitmaps packs AttendanceRecord rows; to-records writes the bitmaps back')
+    parser.add_argument('--students', type=int, nargs='+', metavar='STUDENT_PROFILE_ID',
+                        help='Only convert these students (default: everyone)')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        if args.direction == 'to-bitmaps':
+            written = bitmaps_from_records(args.students)
+            print(f"Wrote {written} attendance bitmaps in {time.perf_counter() - started:.2f}s")
+        else:
+            inserted, updated = restore_records(args.students)
+            print(f"Inserted {inserted} and updated {updated} attendance records "
+                  f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
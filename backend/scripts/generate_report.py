@@ -0,0 +1,33 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.config.config import Config
+from backend.utils.department_report import SECTIONS, generate_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the annual DCSA department report.')
+    parser.add_argument('--year', type=int, default=datetime.utcnow().year - 1)
+    parser.add_argument('--out', help='Output directory (default: <REPORTS_DIR>/<year>)')
+    parser.add_argument('--sections', nargs='+', choices=sorted(SECTIONS), help='Sections to build (default: all)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per section, capped at CPU count)')
+    args = parser.parse_args()
+
+    out_dir = args.out or os.path.join(Config.REPORTS_DIR, str(args.year))
+    print(f"Generating {args.year} department report into {out_dir}...")
+    manifest = generate_report(Config.SQLALCHEMY_DATABASE_URI, args.year, out_dir, args.sections, args.workers)
+
+    for name, section in manifest['sections'].items():
+        print(f"  {name}: {section['rows']} rows in {section['seconds']}s")
+    print(f"Report generated in {manifest['seconds']}s")
+    print(json.dumps(manifest['files'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from backend.config.config import Config
+from backend.models.user import db
+from backend.utils.attendance_import import ATTENDANCE_IMPORT_CHUNK, import_attendance_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import attendance records from CSV files.')
+    parser.add_argument('files', nargs='+', metavar='CSV',
+                        help='CSV files with roll_number, subject_code, date, status and optional remarks')
+    parser.add_argument('--chunk-size', type=int, default=ATTENDANCE_IMPORT_CHUNK,
+                        help='Rows validated and written per batch')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        for path in args.files:
+            started = time.perf_counter()
+            with open(path, encoding='utf-8-sig', newline='') as lines:
+                report = import_attendance_csv(lines, args.chunk_size)
+            print(f"{path}: imported {report['imported']} of {report['rows']} rows for "
+                  f"{report['students']} students in {time.perf_counter() - started:.2f}s")
+            for error in report['errors']:
+                print(f"  line {error['line']}: {error['error']}")
+            if report['error_count'] > len(report['errors']):
+                print(f"  ... and {report['error_count'] - len(report['errors'])} more errors")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from backend.config.config import Config
+from backend.models.user import db
+from backend.utils.results import RESULTS_IMPORT_CHUNK, import_results_csv, recompute_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import subject results from CSV and recompute SGPA, CGPA and backlogs.')
+    parser.add_argument('files', nargs='*', metavar='CSV',
+                        help='CSV files with roll_number, semester_number, subject_code, subject_name, credits and grade')
+    parser.add_argument('--chunk-size', type=int, default=RESULTS_IMPORT_CHUNK,
+                        help='Rows validated and written per batch')
+    parser.add_argument('--recompute', action='store_true',
+                        help='Recompute every student\'s results from the stored subject records')
+    args = parser.parse_args()
+    if not args.files and not args.recompute:
+        parser.error('give at least one CSV file or --recompute')
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        for path in args.files:
+            started = time.perf_counter()
+            with open(path, encoding='utf-8-sig', newline='') as lines:
+                report = import_results_csv(lines, args.chunk_size)
+            print(f"{path}: imported {report['imported']} of {report['rows']} rows and recomputed "
+                  f"{report['recomputed']} students in {time.perf_counter() - started:.2f}s")
+            for error in report['errors']:
+                print(f"  line {error['line']}: {error['error']}")
+            if report['error_count'] > len(report['errors']):
+                print(f"  ... and {report['error_count'] - len(report['errors'])} more errors")
+        if args.recompute:
+            started = time.perf_counter()
+            updated = recompute_results()
+            print(f"Recomputed results for {updated} students in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from backend.config.config import Config
+from backend.models.user import db
+from backend.utils.attendance import rebuild_attendance_aggregates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild attendance aggregates from AttendanceRecord rows.')
+    parser.add_argument('--students', type=int, nargs='+', metavar='STUDENT_PROFILE_ID',
+                        help='Only rebuild these students (default: everyone)')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        written = rebuild_attendance_aggregates(args.students)
+        print(f"Wrote {written} attendance aggregate rows in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from backend.config.config import Config
+from backend.models.user import db
+from backend.utils.recommendations import RECOMMENDATION_BATCH_SIZE, rebuild_recommendations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute every user\'s ranked event recommendations.')
+    parser.add_argument('--batch-size', type=int, default=RECOMMENDATION_BATCH_SIZE,
+                        help='Users scored per batch')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        written = rebuild_recommendations(args.batch_size)
+        print(f"Recommendations rebuilt for {written} users in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
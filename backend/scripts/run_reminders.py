@@ -0,0 +1,40 @@
+"""Run the event reminder scheduler.
+
+Start exactly one of these next to the web server; web workers never
+send reminders themselves. A second copy (say, on another deployment
+instance) waits on the scheduler lease and takes over if this one stops.
+
+    python backend/scripts/run_reminders.py
+"""
+import os
+import signal
+import sys
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from backend.config.config import Config
+from backend.models.user import db
+from backend.utils.email_service import mail
+from backend.utils.reminders import reminder_scheduler
+
+
+def main():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    mail.init_app(app)
+
+    # Exit through atexit on SIGTERM so the lease is handed over at once
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+
+    with app.app_context():
+        db.create_all()
+    print('Event reminder scheduler running')
+    reminder_scheduler.run(app)
+
+
+if __name__ == '__main__':
+    main()
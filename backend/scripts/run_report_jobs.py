@@ -0,0 +1,37 @@
+"""Run queued annual report jobs.
+
+Start one of these next to the web server; the report endpoint only
+queues a job row and web workers never generate reports themselves.
+Each report's sections run in a process pool owned by this runner.
+
+    python backend/scripts/run_report_jobs.py
+"""
+import os
+import signal
+import sys
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from backend.config.config import Config
+from backend.models.user import db
+from backend.utils import report_jobs
+
+
+def main():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+
+    with app.app_context():
+        db.create_all()
+    print('Report job runner running')
+    report_jobs.run(app)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Stress concurrent registration for a capacity-limited event.
+
+Creates one approved event with ``--capacity`` seats and registers
+``--students`` students for it concurrently from a thread pool, each in
+its own session and transaction (the same insert / take_seats / commit
+sequence the participation endpoint runs), then checks that exactly
+``capacity`` students hold a seat, the rest are waitlisted in
+registration order, and that cancelling a seat promotes the head of the
+waitlist.
+
+    python backend/scripts/stress_registration.py --students 500 --capacity 50
+
+Uses a scratch SQLite file unless --database is given; point it at
+PostgreSQL to exercise real row-level locking.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from backend.models.user import User, db
+from backend.models.dcsa import DepartmentEvent, EventParticipant
+from backend.utils.event_registration import release_seats, take_seats
+
+
+def build_app(database_uri):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    if database_uri.startswith('sqlite'):
+        # Let concurrent writers wait for the database lock instead of failing
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 60}}
+    db.init_app(app)
+    return app
+
+
+def seed(students, capacity):
+    users = [
+        User(email=f'stress{i}@example.com', full_name=f'Student {i}', is_verified=True)
+        for i in range(students)
+    ]
+    db.session.add_all(users)
+    start = datetime.utcnow() + timedelta(days=7)
+    event = DepartmentEvent(
+        title='Stress test workshop',
+        event_type='Workshop',
+        start_date=start,
+        end_date=start + timedelta(hours=2),
+        status='approved',
+        max_participants=capacity,
+    )
+    db.session.add(event)
+    db.session.commit()
+    return event.id, [user.id for user in users]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--capacity', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--database', help='Database URI (default: scratch SQLite file)')
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database:
+        database_uri = args.database
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database_uri = f'sqlite:///{scratch.name}'
+
+    app = build_app(database_uri)
+    with app.app_context():
+        db.create_all()
+        event_id, user_ids = seed(args.students, args.capacity)
+
+    def register(user_id):
+        with app.app_context():
+            try:
+                participant = EventParticipant(
+                    user_id=user_id,
+                    event_id=event_id,
+                    attendance_status='Registered',
+                    approval_status='pending',
+                    registration_date=datetime.utcnow(),
+                )
+                db.session.add(participant)
+                db.session.flush()
+                if not take_seats(event_id):
+                    participant.approval_status = 'waitlisted'
+                db.session.commit()
+                return None
+            except Exception as exc:
+                db.session.rollback()
+                return f'user {user_id}: {exc}'
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(register, user_ids))
+
+    failures = [result for result in results if result]
+    with app.app_context():
+        event = db.session.get(DepartmentEvent, event_id)
+        holding = EventParticipant.query.filter_by(event_id=event_id, approval_status='pending').count()
+        waitlist = (EventParticipant.query
+                    .filter_by(event_id=event_id, approval_status='waitlisted')
+                    .order_by(EventParticipant.registration_date, EventParticipant.user_id)
+                    .all())
+
+        print(f'registrations: {len(results)}  failed: {len(failures)}')
+        print(f'seats held: {holding}  seats_taken: {event.seats_taken}  waitlisted: {len(waitlist)}')
+        assert not failures, failures[:5]
+        assert holding == event.seats_taken == min(args.capacity, args.students)
+        assert holding + len(waitlist) == args.students
+
+        if waitlist:
+            head = waitlist[0].user_id
+            seated = EventParticipant.query.filter_by(event_id=event_id, approval_status='pending').first()
+            seated.approval_status = 'cancelled'
+            release_seats(event_id)
+            db.session.commit()
+            promoted = db.session.get(EventParticipant, (head, event_id))
+            assert promoted.approval_status == 'pending', promoted.approval_status
+            assert db.session.get(DepartmentEvent, event_id).seats_taken == holding
+            print(f'cancellation promoted waitlist head (user {head})')
+
+        if args.database:
+            db.drop_all()
+
+    print('OK: no overbooking')
+    if scratch:
+        os.unlink(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
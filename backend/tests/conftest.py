@@ -0,0 +1,71 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from backend import create_app
+from backend.config.config import Config
+from backend.models import db as _db
+from backend.utils.response_cache import response_cache
+
+# Importing this package has already imported the app's Config, so point
+# it at a scratch database and directories before any app is created
+_scratch = tempfile.mkdtemp(prefix='backend-tests-')
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(_scratch, "test.db")}'
+Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+Config.SECRET_KEY = 'test-secret-key-of-at-least-32-bytes'
+Config.JWT_SECRET_KEY = 'test-jwt-secret-key-of-32-bytes!'
+Config.DOCUMENTS_DIR = os.path.join(_scratch, 'documents')
+Config.REPORTS_DIR = os.path.join(_scratch, 'reports')
+
+
+@pytest.fixture
+def app():
+    # create_app registers only the auth blueprint; tests register the
+    # ones they exercise before making requests
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def db(app):
+    """Fresh tables for each test, inside an app context."""
+    response_cache.clear()
+    with app.app_context():
+        _db.drop_all()
+        _db.create_all()
+        yield _db
+        _db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization headers carrying a JWT for a user id."""
+    def make(user_id):
+        with app.app_context():
+            return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+    return make
+
+
+@pytest.fixture
+def query_counter(db):
+    """Context manager counting the SQL statements run inside it."""
+    @contextmanager
+    def count():
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    return count
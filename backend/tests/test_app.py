@@ -0,0 +1,25 @@
+from backend.models import User, VerificationCode, db as models_db
+from backend.models import user as dcsa_user
+
+
+def test_app_boots(client):
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.json['status'] == 'ok'
+
+
+def test_models_share_one_db():
+    assert dcsa_user.db is models_db
+    assert User.__tablename__ == 'users'
+    assert VerificationCode.__tablename__ == 'verification_codes'
+    assert {'users', 'user', 'department_event', 'document'} <= set(models_db.metadata.tables)
+
+
+def test_auth_and_dcsa_tables_are_created(db):
+    tables = set(db.inspect(db.engine).get_table_names())
+    assert {'users', 'verification_codes', 'user', 'student_profile'} <= tables
+
+
+def test_login_code_for_unknown_user(client, db):
+    response = client.post('/api/auth/login/send-code', json={'identifier': 'nobody@example.com'})
+    assert response.status_code == 404
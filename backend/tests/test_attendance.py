@@ -0,0 +1,106 @@
+import csv
+import io
+from datetime import date
+
+import pytest
+
+from backend.models.student import AttendanceAggregate, AttendanceRecord, SemesterRecord, StudentProfile
+from backend.models.user import User
+from backend.routes.student.attendance import attendance
+from backend.utils.attendance_import import import_attendance_csv
+
+
+@pytest.fixture
+def client(app, db):
+    app.register_blueprint(attendance)
+    return app.test_client()
+
+
+@pytest.fixture
+def student(db):
+    user = User(email='student@example.com')
+    db.session.add(user)
+    db.session.flush()
+    profile = StudentProfile(user_id=user.id, roll_number='R1')
+    db.session.add(profile)
+    db.session.commit()
+    return profile.id
+
+
+OVERSIZED_ROW = 'R1,CS101,2026-08-03,P,' + 'x' * 200000 + '\n'
+
+
+def test_malformed_csv_is_a_400(client, db, auth_headers, student):
+    faculty = User(email='faculty@example.com', is_faculty=True)
+    db.session.add(faculty)
+    db.session.commit()
+    body = 'roll_number,subject_code,date,status,remarks\n' + OVERSIZED_ROW
+
+    response = client.post('/api/student/attendance/import', data=body,
+                           headers={**auth_headers(faculty.id), 'Content-Type': 'text/csv'})
+
+    assert response.status_code == 400
+
+
+def test_failed_import_still_rebuilds_committed_chunks(db, student):
+    lines = io.StringIO(
+        'roll_number,subject_code,date,status,remarks\n'
+        'R1,CS101,2026-08-03,P,\n'
+        + OVERSIZED_ROW
+    )
+
+    with pytest.raises(csv.Error):
+        import_attendance_csv(lines, chunk_size=1)
+
+    assert AttendanceRecord.query.count() == 1
+    aggregate = AttendanceAggregate.query.filter_by(student_profile_id=student).one()
+    assert (aggregate.total_classes, aggregate.present_classes) == (1, 1)
+
+
+def _aggregates(student_profile_id):
+    return {
+        (row.subject_code, row.semester_number): (row.total_classes, row.present_classes, row.late_classes)
+        for row in AttendanceAggregate.query.filter_by(student_profile_id=student_profile_id)
+    }
+
+
+def _record(db, student_profile_id, on_date, status='Present', subject_code='CS101'):
+    record = AttendanceRecord(student_profile_id=student_profile_id, subject_code=subject_code,
+                              date=on_date, status=status)
+    db.session.add(record)
+    db.session.commit()
+    return record
+
+
+def test_aggregates_follow_record_inserts_updates_and_deletes(db, student):
+    first = _record(db, student, date(2026, 8, 3))
+    second = _record(db, student, date(2026, 8, 4), 'Late')
+    assert _aggregates(student) == {('CS101', 0): (2, 1, 1)}
+
+    second.status = 'Present'
+    first.subject_code = 'CS102'
+    db.session.commit()
+    assert _aggregates(student) == {('CS101', 0): (1, 1, 0), ('CS102', 0): (1, 1, 0)}
+
+    db.session.delete(first)
+    db.session.commit()
+    assert _aggregates(student) == {('CS101', 0): (1, 1, 0), ('CS102', 0): (0, 0, 0)}
+
+
+def test_aggregates_follow_semester_inserts_updates_and_deletes(db, student):
+    _record(db, student, date(2026, 8, 3))
+    _record(db, student, date(2027, 1, 12), 'Absent')
+
+    semester = SemesterRecord(student_profile_id=student, semester_number=1,
+                              semester_start_date=date(2026, 8, 1), semester_end_date=date(2026, 12, 31))
+    db.session.add(semester)
+    db.session.commit()
+    assert _aggregates(student) == {('CS101', 0): (1, 0, 0), ('CS101', 1): (1, 1, 0)}
+
+    semester.semester_end_date = date(2027, 5, 31)
+    db.session.commit()
+    assert _aggregates(student) == {('CS101', 1): (2, 1, 0)}
+
+    db.session.delete(semester)
+    db.session.commit()
+    assert _aggregates(student) == {('CS101', 0): (2, 1, 0)}
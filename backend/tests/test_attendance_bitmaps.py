@@ -0,0 +1,78 @@
+from datetime import date
+
+import pytest
+
+from backend.models.student import AttendanceBitmap, AttendanceRecord, SemesterRecord, StudentProfile
+from backend.models.user import User
+from backend.utils.attendance_bitmaps import attendance_summary, bitmaps_from_records, records_from_bitmaps
+
+
+@pytest.fixture
+def student(app, db):
+    app.config['ATTENDANCE_STORE'] = 'bitmap'
+    user = User(email='student@example.com')
+    db.session.add(user)
+    db.session.flush()
+    profile = StudentProfile(user_id=user.id, roll_number='R1')
+    db.session.add(profile)
+    db.session.flush()
+    db.session.add(SemesterRecord(student_profile_id=profile.id, semester_number=1,
+                                  semester_start_date=date(2026, 8, 1), semester_end_date=date(2026, 12, 31)))
+    db.session.commit()
+    return profile.id
+
+
+def _mark(db, student_profile_id, days, status):
+    db.session.add_all([
+        AttendanceRecord(student_profile_id=student_profile_id, subject_code='CS101',
+                         date=date(2026, 8, day), status=status)
+        for day in days
+    ])
+    db.session.commit()
+
+
+def _subject(student_profile_id):
+    (subject,) = attendance_summary(student_profile_id)['subjects']
+    return subject
+
+
+def test_bitmaps_round_trip_the_records(db, student):
+    _mark(db, student, (3, 4), 'Present')
+    _mark(db, student, (5,), 'Late')
+    _mark(db, student, (6,), 'Absent')
+    db.session.add(AttendanceRecord(student_profile_id=student, subject_code='CS102',
+                                    date=date(2027, 2, 1), status='Present'))  # outside any semester
+    db.session.commit()
+    stored = {(record.subject_code, record.date, record.status) for record in AttendanceRecord.query}
+
+    bitmaps_from_records([student])
+
+    restored = {(record['subject_code'], record['date'], record['status']) for record in records_from_bitmaps()}
+    assert restored == stored
+    assert {row.semester_number for row in AttendanceBitmap.query} == {0, 1}
+
+
+def test_streaks_skip_days_without_class(db, student):
+    _mark(db, student, (3, 4), 'Present')
+    _mark(db, student, (5,), 'Absent')
+    _mark(db, student, (6, 8, 10), 'Present')  # no class on the 7th or 9th
+
+    subject = _subject(student)
+
+    assert (subject['longest_streak'], subject['current_streak']) == (3, 3)
+    assert (subject['total_classes'], subject['present_classes']) == (6, 5)
+
+
+def test_record_edits_reach_the_bitmaps(db, student):
+    _mark(db, student, (3, 4, 5), 'Present')
+    record = AttendanceRecord.query.filter_by(date=date(2026, 8, 5)).one()
+
+    record.status = 'Absent'
+    db.session.commit()
+    subject = _subject(student)
+    assert (subject['present_classes'], subject['longest_streak'], subject['current_streak']) == (2, 2, 0)
+
+    db.session.delete(record)
+    db.session.commit()
+    subject = _subject(student)
+    assert (subject['total_classes'], subject['current_streak']) == (2, 2)
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models.dcsa import DepartmentEvent, EventParticipant
+from backend.models.user import User
+from backend.routes.dcsa.events import events
+from backend.utils import checkin
+from backend.utils.checkin import AttendanceBuffer, check_in_token
+
+
+@pytest.fixture
+def client(app, db, monkeypatch):
+    app.register_blueprint(events)
+    # A fresh buffer per test; flushes happen explicitly
+    buffer = AttendanceBuffer(interval=3600)
+    monkeypatch.setattr('backend.routes.dcsa.events.attendance_buffer', buffer)
+    monkeypatch.setattr(checkin, 'attendance_buffer', buffer)
+    monkeypatch.setattr(buffer, '_ensure_worker', lambda: None)
+    return app.test_client()
+
+
+@pytest.fixture
+def event(db):
+    organizer = User(email='organizer@example.com')
+    approved = User(email='approved@example.com')
+    pending = User(email='pending@example.com')
+    db.session.add_all([organizer, approved, pending])
+    db.session.flush()
+    event = DepartmentEvent(title='Meet', status='approved', organizer_id=organizer.id,
+                            start_date=datetime.utcnow() + timedelta(hours=1))
+    db.session.add(event)
+    db.session.flush()
+    db.session.add_all([
+        EventParticipant(event_id=event.id, user_id=approved.id, approval_status='approved'),
+        EventParticipant(event_id=event.id, user_id=pending.id, approval_status='pending'),
+    ])
+    db.session.commit()
+    return event.id, organizer.id, approved.id, pending.id
+
+
+def _scan(client, auth_headers, event_id, staff_id, token):
+    return client.post(f'/api/dcsa/events/{event_id}/check-in', json={'token': token},
+                       headers=auth_headers(staff_id))
+
+
+def test_unapproved_participant_is_rejected(client, app, auth_headers, event):
+    event_id, staff_id, _, pending_id = event
+    with app.app_context():
+        token = check_in_token(event_id, pending_id)
+
+    response = _scan(client, auth_headers, event_id, staff_id, token)
+
+    assert response.status_code == 409
+    assert checkin.attendance_buffer.pending_count(event_id) == 0
+
+
+def test_expired_token_is_rejected(client, app, auth_headers, event):
+    event_id, staff_id, approved_id, _ = event
+    with app.app_context():
+        token = check_in_token(event_id, approved_id, ttl=-1)
+
+    assert _scan(client, auth_headers, event_id, staff_id, token).status_code == 400
+
+
+def test_check_in_already_written_by_another_worker_is_not_repeated(client, app, db, auth_headers, event):
+    event_id, staff_id, approved_id, _ = event
+    with app.app_context():
+        token = check_in_token(event_id, approved_id)
+    # Another worker's flush has already marked the participant
+    EventParticipant.query.filter_by(event_id=event_id, user_id=approved_id).update({'attendance_status': 'Attended'})
+    db.session.commit()
+
+    response = _scan(client, auth_headers, event_id, staff_id, token)
+
+    assert response.status_code == 200 and response.json['status'] == 'already_checked_in'
+
+
+def test_scan_is_buffered_and_flushed_once(client, app, db, auth_headers, event):
+    event_id, staff_id, approved_id, _ = event
+    with app.app_context():
+        token = check_in_token(event_id, approved_id)
+
+    assert _scan(client, auth_headers, event_id, staff_id, token).status_code == 202
+    assert _scan(client, auth_headers, event_id, staff_id, token).json['status'] == 'already_checked_in'
+    assert checkin.attendance_buffer.flush() == 1
+    assert db.session.get(EventParticipant, (approved_id, event_id)).attendance_status == 'Attended'
+
+
+def test_attendance_counter_requires_check_in_staff(client, auth_headers, event):
+    event_id, staff_id, approved_id, _ = event
+
+    assert client.get(f'/api/dcsa/events/{event_id}/attendance').status_code == 401
+    assert client.get(f'/api/dcsa/events/{event_id}/attendance', headers=auth_headers(approved_id)).status_code == 403
+    counts = client.get(f'/api/dcsa/events/{event_id}/attendance', headers=auth_headers(staff_id)).json
+    assert counts['approved'] == 1
@@ -0,0 +1,155 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from backend.models.student import Document, DocumentUpload, StudentProfile
+from backend.models.user import User
+from backend.routes.student import documents as documents_module
+from backend.routes.student.documents import documents
+from backend.utils.document_storage import document_storage
+
+
+@pytest.fixture
+def client(app, db):
+    app.register_blueprint(documents)
+    return app.test_client()
+
+
+@pytest.fixture
+def student(db):
+    user = User(email='student@example.com')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(StudentProfile(user_id=user.id, roll_number='R1'))
+    db.session.commit()
+    return user.id
+
+
+def _start(client, headers, size):
+    response = client.post('/api/student/documents/uploads', headers=headers,
+                           json={'document_type': 'Certificate', 'file_name': 'c.pdf', 'size': size})
+    return response.json['upload_id']
+
+
+def _patch(client, headers, upload_id, offset, body):
+    return client.patch(f'/api/student/documents/uploads/{upload_id}', data=body,
+                        headers={**headers, 'Upload-Offset': str(offset)})
+
+
+def test_chunks_assemble_into_one_document(client, db, auth_headers, student):
+    headers = auth_headers(student)
+    upload_id = _start(client, headers, 10)
+
+    assert _patch(client, headers, upload_id, 0, b'hello').status_code == 200
+    response = _patch(client, headers, upload_id, 5, b'world')
+
+    assert response.status_code == 201
+    assert response.json['content_hash'] == hashlib.sha256(b'helloworld').hexdigest()
+    assert db.session.get(Document, response.json['document_id']).file_size == 10
+
+
+def test_losing_chunk_never_touches_the_part_file(client, db, app, auth_headers, student, monkeypatch):
+    headers = auth_headers(student)
+    upload_id = _start(client, headers, 10)
+    stage_chunk = document_storage.stage_chunk
+
+    def rival_wins_first(stream, limit):
+        staged = stage_chunk(stream, limit)
+        # Another request claims offset 0 while this one is still staging
+        with db.engine.begin() as connection:
+            connection.execute(update(DocumentUpload).where(DocumentUpload.id == upload_id).values(received=5))
+        return staged
+    monkeypatch.setattr(document_storage, 'stage_chunk', rival_wins_first)
+
+    response = _patch(client, headers, upload_id, 0, b'HELLO')
+
+    assert response.status_code == 409 and response.headers['Upload-Offset'] == '5'
+    assert os.path.getsize(document_storage._part_path(upload_id)) == 0
+    assert os.listdir(os.path.join(app.config['DOCUMENTS_DIR'], 'tmp')) == []
+
+
+@pytest.mark.parametrize('offload', ['x-sendfile', 'x-accel-redirect'])
+def test_offloaded_304_carries_no_file_header(client, db, app, auth_headers, student, offload):
+    headers = auth_headers(student)
+    upload_id = _start(client, headers, 5)
+    document_id = _patch(client, headers, upload_id, 0, b'hello').json['document_id']
+    url = client.get(f'/api/student/documents/{document_id}/download-url', headers=headers).json['url']
+    app.config['DOCUMENT_SENDFILE'] = offload
+
+    response = client.get(url, headers={'If-None-Match': f'"{hashlib.sha256(b"hello").hexdigest()}"'})
+
+    assert response.status_code == 304
+    assert 'X-Sendfile' not in response.headers and 'X-Accel-Redirect' not in response.headers
+
+
+@pytest.fixture
+def queue(db, student):
+    profile = StudentProfile.query.filter_by(user_id=student).one()
+    reviewers = [User(email='first@example.com', is_faculty=True), User(email='second@example.com', is_faculty=True)]
+    db.session.add_all(reviewers)
+    db.session.add_all(
+        Document(student_profile_id=profile.id, document_type='Certificate', file_name=f'{day}.pdf',
+                 upload_date=datetime(2026, 10, day))
+        for day in range(1, 5)
+    )
+    db.session.commit()
+    return [reviewer.id for reviewer in reviewers]
+
+
+def _claim(client, headers, batch_size=2):
+    body = client.post('/api/student/documents/verification-queue/claim', json={'batch_size': batch_size},
+                       headers=headers).json
+    return body['claim_token'], [document['file_name'] for document in body['documents']]
+
+
+def test_racing_claims_get_disjoint_batches(client, db, auth_headers, queue, monkeypatch):
+    first, second = (auth_headers(reviewer) for reviewer in queue)
+    started, rival = [], []
+    real_update = documents_module.update
+
+    def rival_claims_in_between(*args):
+        # The second reviewer claims after the first has picked its
+        # candidates but before the first writes its claim
+        if not started:
+            started.append(True)
+            rival.extend(_claim(client, second)[1])
+        return real_update(*args)
+    monkeypatch.setattr(documents_module, 'update', rival_claims_in_between)
+
+    _, mine = _claim(client, first)
+
+    assert rival == ['1.pdf', '2.pdf']
+    assert mine == []
+    monkeypatch.undo()
+    assert _claim(client, first)[1] == ['3.pdf', '4.pdf']
+
+
+def test_expired_claim_is_reclaimed(client, db, auth_headers, queue):
+    first, second = (auth_headers(reviewer) for reviewer in queue)
+    stale_token, _ = _claim(client, first)
+    db.session.execute(update(Document).values(claim_expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    db.session.commit()
+
+    _, reclaimed = _claim(client, second)
+    verified = client.post('/api/student/documents/verification-queue/verify',
+                           json={'claim_token': stale_token}, headers=first).json['verified']
+
+    assert reclaimed == ['1.pdf', '2.pdf'] and verified == 0
+
+
+def test_verifying_releases_the_claim(client, db, auth_headers, queue):
+    first, _ = (auth_headers(reviewer) for reviewer in queue)
+    token, claimed = _claim(client, first)
+
+    response = client.post('/api/student/documents/verification-queue/verify',
+                           json={'claim_token': token}, headers=first)
+
+    assert response.json['verified'] == 2
+    documents = Document.query.filter(Document.file_name.in_(claimed)).all()
+    assert all(document.verified and document.verified_by == queue[0] for document in documents)
+    assert all(document.claimed_by is None and document.claim_token is None for document in documents)
+    listed = client.get('/api/student/documents/verification-queue', headers=first).json
+    assert [document['file_name'] for document in listed] == ['3.pdf', '4.pdf']
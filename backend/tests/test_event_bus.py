@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from backend.routes.dcsa.events import events
+from backend.utils import event_bus as event_bus_module
+from backend.utils.event_bus import EventBus, stream_ticket
+
+
+@pytest.fixture
+def client(app, db, monkeypatch):
+    app.register_blueprint(events)
+    # No listener thread in tests; streams read what is already buffered
+    monkeypatch.setattr(event_bus_module.event_bus, '_ensure_listener', lambda app: None)
+    return app.test_client()
+
+
+def test_publish_reaches_subscribers_on_another_worker(db):
+    publisher, subscriber = EventBus(), EventBus()
+    with db.engine.connect() as connection:
+        subscriber._load_recent(connection)
+
+    message_id = publisher.publish('participation.reviewed', {'event_id': 1}, user_ids=[5])
+    with db.engine.connect() as connection:
+        subscriber._read_new(connection)
+
+    messages, head, complete = subscriber.messages_after(0, user_id=5)
+    assert [message[0] for message in messages] == [message_id] and head == message_id and complete
+    assert subscriber.messages_after(0, user_id=6)[0] == []
+
+
+def test_stream_takes_a_ticket_not_a_jwt_in_the_url(client, app, auth_headers):
+    jwt = auth_headers(1)['Authorization'].split()[1]
+
+    assert client.get('/api/dcsa/events/stream').status_code == 401
+    assert client.get(f'/api/dcsa/events/stream?jwt={jwt}').status_code == 401
+    ticket = client.post('/api/dcsa/events/stream/ticket', headers=auth_headers(1)).json['ticket']
+    with app.app_context():
+        expired = stream_ticket(1, ttl=-1)
+    assert client.get(f'/api/dcsa/events/stream?ticket={expired}').status_code == 401
+    assert client.get(f'/api/dcsa/events/stream?ticket={ticket}', buffered=False).status_code == 200
+
+
+def test_stream_ends_when_the_session_expires(client, app):
+    with app.app_context():
+        ticket = stream_ticket(1, session_expires=time.time() - 1)
+
+    body = client.get(f'/api/dcsa/events/stream?ticket={ticket}').get_data(as_text=True)
+
+    assert body.endswith('event: expired\ndata: {}\n\n')
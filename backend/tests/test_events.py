@@ -0,0 +1,271 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models.dcsa import DepartmentEvent, EventParticipant
+from backend.models.user import User
+from backend.routes.dcsa.events import events
+
+
+@pytest.fixture
+def client(app, db):
+    app.register_blueprint(events)
+    return app.test_client()
+
+
+def _seed_events(db, count, participants_each=3):
+    users = [User(email=f'user{i}@example.com', full_name=f'User {i}') for i in range(participants_each + 1)]
+    db.session.add_all(users)
+    db.session.flush()
+    organizer = users[0]
+    start = datetime.utcnow() + timedelta(days=1)
+    for i in range(count):
+        event = DepartmentEvent(title=f'Event {i}', status='approved', organizer_id=organizer.id,
+                                start_date=start + timedelta(hours=i))
+        db.session.add(event)
+        db.session.flush()
+        db.session.add_all(
+            EventParticipant(event_id=event.id, user_id=user.id, approval_status='approved')
+            for user in users[1:]
+        )
+    db.session.commit()
+    return organizer
+
+
+def _listing_statements(client, query_counter, headers=None):
+    client.get('/api/dcsa/events?limit=200', headers=headers)  # warm up lazy setup
+    with query_counter() as statements:
+        response = client.get('/api/dcsa/events?limit=200', headers=headers)
+    assert response.status_code == 200
+    return len(response.json), len(statements)
+
+
+@pytest.mark.parametrize('admin', [False, True])
+def test_listing_runs_a_constant_number_of_queries(client, db, query_counter, auth_headers, admin):
+    organizer = _seed_events(db, 3)
+    if admin:
+        organizer.is_faculty = True
+        db.session.commit()
+    headers = auth_headers(organizer.id) if admin else None
+
+    listed, few = _listing_statements(client, query_counter, headers)
+    assert listed == 3
+
+    later = [DepartmentEvent(title=f'Later {i}', status='approved', organizer_id=organizer.id,
+                                  start_date=datetime.utcnow() + timedelta(days=5, hours=i)) for i in range(27)]
+    db.session.add_all(later)
+    db.session.commit()
+    listed, many = _listing_statements(client, query_counter, headers)
+    assert listed == 30
+    assert many == few
+
+
+def test_current_participants_counts_only_seat_holders(client, db):
+    organizer = _seed_events(db, 1, participants_each=4)
+    event = DepartmentEvent.query.one()
+    statuses = ['approved', 'pending', 'waitlisted', 'cancelled']
+    for link, status in zip(sorted(event.participant_links, key=lambda link: link.user_id), statuses):
+        link.approval_status = status
+    db.session.add(EventParticipant(event_id=event.id, user_id=organizer.id, approval_status='rejected'))
+    db.session.commit()
+
+    [listed] = client.get('/api/dcsa/events').json
+    assert listed['current_participants'] == 2
+
+
+def _full_event(db, seats=2, waitlisted=True):
+    users = [User(email=f'seat{i}@example.com') for i in range(seats + 1)]
+    event = DepartmentEvent(title='Lab tour', status='approved', max_participants=seats, seats_taken=seats,
+                            start_date=datetime.utcnow() + timedelta(days=2))
+    db.session.add_all(users + [event])
+    db.session.flush()
+    for user in users[:seats]:
+        db.session.add(EventParticipant(event_id=event.id, user_id=user.id, approval_status='approved'))
+    if waitlisted:
+        db.session.add(EventParticipant(event_id=event.id, user_id=users[-1].id, approval_status='waitlisted'))
+    db.session.commit()
+    return event.id, users
+
+
+def test_only_one_of_two_racing_transitions_matches(db):
+    from backend.utils.event_registration import transition
+
+    event_id, users = _full_event(db)
+    assert transition(event_id, [users[0].id], 'approved', approval_status='rejected') == [users[0].id]
+    # A second request that read the same 'approved' state must not match
+    assert transition(event_id, [users[0].id], 'approved', approval_status='cancelled') == []
+
+
+def test_cancel_after_reject_releases_one_seat(client, db, auth_headers):
+    event_id, users = _full_event(db)
+    users[0].is_faculty = True
+    db.session.commit()
+    target = users[1].id
+
+    response = client.post(f'/api/dcsa/events/{event_id}/participation/{target}',
+                           json={'status': 'rejected'}, headers=auth_headers(users[0].id))
+    assert response.status_code == 200
+    response = client.delete(f'/api/dcsa/events/{event_id}/participation', headers=auth_headers(target))
+    assert response.status_code == 400
+
+    db.session.expire_all()
+    event = db.session.get(DepartmentEvent, event_id)
+    # The rejected seat went to the waitlisted participant, and only once
+    assert event.seats_taken == 2
+    assert db.session.get(EventParticipant, (users[2].id, event_id)).approval_status == 'pending'
+
+
+def test_cancelled_participation_cannot_be_approved(client, db, auth_headers):
+    from backend.utils.event_registration import transition
+
+    event_id, users = _full_event(db, waitlisted=False)
+    users[0].is_faculty = True
+    db.session.commit()
+    target = users[1].id
+    assert client.delete(f'/api/dcsa/events/{event_id}/participation', headers=auth_headers(target)).status_code == 200
+
+    response = client.post(f'/api/dcsa/events/{event_id}/participation/{target}',
+                           json={'status': 'approved'}, headers=auth_headers(users[0].id))
+
+    assert response.status_code == 400
+    assert transition(event_id, [target], 'cancelled', approval_status='approved') == []
+    db.session.expire_all()
+    assert db.session.get(EventParticipant, (target, event_id)).approval_status == 'cancelled'
+    assert db.session.get(DepartmentEvent, event_id).seats_taken == 1
+
+
+def test_bulk_reject_releases_seats_for_rows_it_moved(client, db, auth_headers, monkeypatch):
+    from backend.routes.dcsa import events as events_module
+
+    monkeypatch.setattr(events_module.notification_queue, 'enqueue_many', lambda items: len(list(items)))
+    event_id, users = _full_event(db)
+    users[0].is_faculty = True
+    db.session.commit()
+
+    response = client.post(f'/api/dcsa/events/{event_id}/participation/review',
+                           json={'status': 'rejected', 'user_ids': [users[0].id, users[1].id]},
+                           headers=auth_headers(users[0].id))
+    assert response.status_code == 200
+    assert response.json['summary'] == {'rejected': 2}
+
+    db.session.expire_all()
+    assert db.session.get(DepartmentEvent, event_id).seats_taken == 1
+
+
+def test_bulk_review_invalidates_cached_stats(client, db, auth_headers, monkeypatch):
+    from backend.routes.dcsa import events as events_module
+
+    monkeypatch.setattr(events_module.notification_queue, 'enqueue_many', lambda items: len(list(items)))
+    # No waitlist, so no ORM-tracked promotion happens to invalidate the cache
+    event_id, users = _full_event(db, waitlisted=False)
+    users[0].is_faculty = True
+    db.session.commit()
+    assert client.get('/api/dcsa/events/stats').json['approved_participants'] == 2
+
+    client.post(f'/api/dcsa/events/{event_id}/participation/review',
+                json={'status': 'rejected', 'user_ids': [users[1].id]}, headers=auth_headers(users[0].id))
+
+    assert client.get('/api/dcsa/events/stats').json['approved_participants'] == 1
+
+
+def test_review_email_escapes_user_text():
+    from backend.routes.dcsa.events import _review_email
+
+    html = _review_email(DepartmentEvent(title='<b>Hack</b>'), '<i>Ravi</i>', 'rejected', '<script>x</script>')
+    assert '<script>' not in html and '<b>Hack</b>' not in html and '<i>Ravi</i>' not in html
+    assert '&lt;script&gt;x&lt;/script&gt;' in html
+
+
+def _page_through(client, url):
+    titles, cursors = [], []
+    while True:
+        response = client.get(url + (f'&cursor={cursors[-1]}' if cursors else ''))
+        assert response.status_code == 200
+        titles += [event['title'] for event in response.json]
+        if 'X-Next-Cursor' not in response.headers:
+            return titles, len(cursors) + 1
+        cursors.append(response.headers['X-Next-Cursor'])
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_cursor_pages_cover_every_event_with_undated_ones_last(client, db, order):
+    start = datetime(2026, 11, 1, 10)
+    db.session.add_all(
+        [DepartmentEvent(title=f'Dated {i}', status='approved', start_date=start + timedelta(days=i // 2))
+         for i in range(5)]  # pairs share a start date, so ties are broken by id
+        + [DepartmentEvent(title=f'Undated {i}', status='approved') for i in range(3)]
+    )
+    db.session.commit()
+
+    titles, pages = _page_through(client, f'/api/dcsa/events?limit=2&order={order}')
+
+    dated = [f'Dated {i}' for i in range(5)]
+    undated = [f'Undated {i}' for i in range(3)]
+    if order == 'desc':
+        dated.reverse()
+        undated.reverse()
+    assert titles == dated + undated
+    assert pages == 4
+
+
+def test_from_to_window_limits_the_listing(client, db):
+    db.session.add_all([
+        DepartmentEvent(title='Before', status='approved', start_date=datetime(2026, 10, 31, 23)),
+        DepartmentEvent(title='Inside', status='approved', start_date=datetime(2026, 11, 1, 9)),
+        DepartmentEvent(title='At end', status='approved', start_date=datetime(2026, 11, 2)),
+        DepartmentEvent(title='Undated', status='approved'),
+    ])
+    db.session.commit()
+
+    response = client.get('/api/dcsa/events?from=2026-11-01T00:00:00%2B00:00&to=2026-11-02T00:00:00')
+
+    assert [event['title'] for event in response.json] == ['Inside']
+    assert client.get('/api/dcsa/events?from=yesterday').status_code == 400
+
+
+def test_stats_filters_and_series_buckets(client, db):
+    users = [User(email=f'stats{i}@example.com') for i in range(4)]
+    workshop = DepartmentEvent(title='Workshop', event_type='Workshop', department='CS', status='approved',
+                               start_date=datetime(2026, 11, 10, 10))
+    seminar = DepartmentEvent(title='Seminar', event_type='Seminar', department='Physics', status='approved',
+                              start_date=datetime(2026, 12, 1, 10))
+    pending = DepartmentEvent(title='Hackathon', event_type='Workshop', department='CS', status='pending',
+                              start_date=datetime(2026, 11, 20, 10))
+    db.session.add_all(users + [workshop, seminar, pending])
+    db.session.flush()
+    registrations = [
+        (workshop, users[0], 'approved', 'MCA', datetime(2026, 10, 5, 9)),  # Monday
+        (workshop, users[1], 'approved', 'MSc', datetime(2026, 10, 7, 9)),  # same week
+        (workshop, users[2], 'pending', 'MCA', datetime(2026, 10, 8, 9)),  # not counted
+        (seminar, users[0], 'approved', 'MCA', datetime(2026, 10, 18, 9)),  # Sunday
+        (seminar, users[3], 'approved', 'MSc', datetime(2026, 11, 2, 9)),  # Monday
+    ]
+    db.session.add_all(
+        EventParticipant(event_id=event.id, user_id=user.id, approval_status=status, program=program,
+                         department=event.department, registration_date=registered)
+        for event, user, status, program, registered in registrations
+    )
+    db.session.commit()
+
+    everything = client.get('/api/dcsa/events/stats?interval=month').json
+    assert everything['events_by_type'] == {'Workshop': 2, 'Seminar': 1}
+    assert everything['approved_participants'] == 4
+    assert everything['program_counts'] == {'MCA': 2, 'MSc': 2}
+    assert everything['participation_series'] == [
+        {'period': '2026-10-01', 'participants': 3},
+        {'period': '2026-11-01', 'participants': 1},
+    ]
+
+    cs = client.get('/api/dcsa/events/stats?department=CS&status=approved&interval=week').json
+    assert cs['events_by_type'] == {'Workshop': 1}
+    assert cs['department_counts'] == {'CS': 2}
+    assert cs['participation_series'] == [{'period': '2026-10-05', 'participants': 2}]
+
+    window = client.get('/api/dcsa/events/stats?from=2026-11-15&to=2026-12-31&interval=week').json
+    assert window['events_by_type'] == {'Workshop': 1, 'Seminar': 1}
+    assert window['participation_series'] == [
+        {'period': '2026-10-12', 'participants': 1},
+        {'period': '2026-11-02', 'participants': 1},
+    ]
+
+    assert client.get('/api/dcsa/events/stats?interval=year').status_code == 400
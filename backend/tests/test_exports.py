@@ -0,0 +1,33 @@
+import csv
+import io
+
+import pytest
+
+from backend.models.dcsa import Achievement, ResearchPublication
+from backend.models.user import User
+from backend.routes.dcsa.exports import exports
+
+
+@pytest.fixture
+def client(app, db):
+    app.register_blueprint(exports)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('dataset, column', [('publications', 'author'), ('achievements', 'user')])
+def test_private_profiles_are_masked(client, db, auth_headers, dataset, column):
+    faculty = User(email='faculty@example.com', full_name='Faculty', is_faculty=True)
+    hidden = User(email='hidden@example.com', full_name='Hidden Person', profile_visibility='private')
+    db.session.add_all([faculty, hidden])
+    db.session.flush()
+    db.session.add_all([
+        ResearchPublication(user_id=hidden.id, title='Paper'),
+        Achievement(user_id=hidden.id, title='Prize'),
+    ])
+    db.session.commit()
+
+    response = client.get(f'/api/dcsa/export/{dataset}', headers=auth_headers(faculty.id))
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 1
+    assert rows[0][column] == '' and 'Hidden Person' not in response.get_data(as_text=True)
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, timezone
+
+from backend.models.dcsa import DepartmentEvent
+from backend.routes.dcsa.events import _parse_datetime
+from backend.utils.ical import _render_vevent
+
+
+def test_offsets_are_converted_to_utc_on_input():
+    assert _parse_datetime('2026-10-18T15:30:00+05:30') == datetime(2026, 10, 18, 10, 0)
+    assert _parse_datetime('2026-10-18T10:00:00.000Z') == datetime(2026, 10, 18, 10, 0)
+    assert _parse_datetime('2026-10-18T10:00:00') == datetime(2026, 10, 18, 10, 0)
+
+
+def test_vevent_times_are_utc():
+    ist = timezone(timedelta(hours=5, minutes=30))
+    event = DepartmentEvent(id=1, title='Talk', start_date=datetime(2026, 10, 18, 10, 0),
+                            end_date=datetime(2026, 10, 18, 15, 30, tzinfo=ist),
+                            updated_at=datetime(2026, 10, 1, 8, 0))
+
+    text = _render_vevent(event, 'example.com')
+
+    assert 'DTSTART:20261018T100000Z' in text
+    assert 'DTEND:20261018T100000Z' in text
@@ -0,0 +1,69 @@
+import json
+from datetime import datetime, timedelta
+
+from backend.models.dcsa import DepartmentEvent, EventRecommendation
+from backend.models.profile import Skill, UserSkill
+from backend.models.user import User
+from backend.utils import recommendations
+from backend.utils.recommendations import drop_recommendation, rebuild_recommendations, refresh_event
+
+
+def _ranked(db, user_id):
+    return [item[0] for item in json.loads(db.session.get(EventRecommendation, user_id).ranked)]
+
+
+def _seed(db):
+    skilled, other = User(email='skilled@example.com'), User(email='other@example.com')
+    skill = Skill(name='Kubernetes')
+    db.session.add_all([skilled, other, skill])
+    db.session.flush()
+    db.session.add(UserSkill(user_id=skilled.id, skill_id=skill.id))
+    db.session.commit()
+    rebuild_recommendations()
+    return skilled.id, other.id
+
+
+def _event(db, title, status='approved'):
+    event = DepartmentEvent(title=title, description='', status=status,
+                            start_date=datetime.utcnow() + timedelta(days=90))
+    db.session.add(event)
+    db.session.commit()
+    return event
+
+
+def test_refresh_scores_only_the_users_the_event_affects(db, monkeypatch):
+    skilled_id, other_id = _seed(db)
+    event = _event(db, 'Kubernetes workshop')
+    loaded = []
+    profiles = recommendations._Profiles
+    monkeypatch.setattr(recommendations, '_Profiles',
+                        lambda user_ids=None, **kwargs: loaded.append(user_ids) or profiles(user_ids, **kwargs))
+
+    assert refresh_event(event.id) == 1
+
+    assert loaded == [{skilled_id}]
+    assert _ranked(db, skilled_id) == [event.id]
+    assert _ranked(db, other_id) == []
+
+
+def test_withdrawn_event_leaves_the_lists_holding_it(db):
+    skilled_id, _ = _seed(db)
+    event = _event(db, 'Kubernetes workshop')
+    refresh_event(event.id)
+
+    event.status = 'rejected'
+    db.session.commit()
+    refresh_event(event.id)
+
+    assert _ranked(db, skilled_id) == []
+
+
+def test_registering_drops_the_event_from_the_list(db):
+    skilled_id, _ = _seed(db)
+    event = _event(db, 'Kubernetes workshop')
+    refresh_event(event.id)
+
+    drop_recommendation(skilled_id, event.id)
+    db.session.commit()
+
+    assert _ranked(db, skilled_id) == []
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from backend.models.dcsa import DepartmentEvent, EventParticipant
+from backend.models.user import User
+from backend.utils import reminders
+
+
+def _event_with_participant(db, starts_in, title='Workshop', name='Asha'):
+    user = User(email='asha@example.com', full_name=name)
+    event = DepartmentEvent(title=title, status='approved', start_date=datetime.utcnow() + starts_in)
+    db.session.add_all([user, event])
+    db.session.flush()
+    db.session.add(EventParticipant(event_id=event.id, user_id=user.id, approval_status='approved'))
+    db.session.commit()
+    return event
+
+
+def _capture(monkeypatch):
+    sent = []
+
+    def enqueue_many(notifications):
+        sent.extend(notifications)
+        return len(sent)
+
+    monkeypatch.setattr(reminders.notification_queue, 'enqueue_many', enqueue_many)
+    return sent
+
+
+def test_late_reminder_states_the_time_actually_left(db, monkeypatch):
+    sent = _capture(monkeypatch)
+    _event_with_participant(db, timedelta(hours=5, minutes=1))
+
+    reminders.ReminderScheduler()._tick()
+
+    assert len(sent) == 1
+    assert 'starts in 5 hours' in sent[0][2]
+
+
+def test_reminder_email_escapes_user_text():
+    now = datetime(2026, 1, 1, 9, 0)
+    html = reminders._reminder_email('<b>Demo</b>', now + timedelta(minutes=45), '<i>Sam</i>', now)
+    assert '<b>Demo</b>' not in html and '&lt;b&gt;Demo&lt;/b&gt;' in html
+    assert '&lt;i&gt;Sam&lt;/i&gt;' in html
+    assert 'starts in 45 minutes' in html
+
+
+def test_poll_picks_up_a_change_stamped_before_the_watermark(db, monkeypatch):
+    sent = _capture(monkeypatch)
+    scheduler = reminders.ReminderScheduler()
+    scheduler._tick()
+
+    event = _event_with_participant(db, timedelta(minutes=30))
+    # Committed now, but stamped before the scheduler's watermark
+    scheduler._watermark = datetime.utcnow() + timedelta(seconds=30)
+    scheduler._tick()
+
+    assert [recipient for _, recipient, _ in sent] == ['asha@example.com']
+    assert event.title in sent[0][0]
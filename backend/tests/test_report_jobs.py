@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from backend.models.dcsa import ReportJob
+from backend.models.user import User
+from backend.routes.dcsa.analytics import analytics
+from backend.utils import report_jobs
+
+
+@pytest.fixture
+def client(app, db):
+    app.register_blueprint(analytics)
+    return app.test_client()
+
+
+@pytest.fixture
+def faculty_headers(db, auth_headers):
+    user = User(email='faculty@example.com', is_faculty=True)
+    db.session.add(user)
+    db.session.commit()
+    return auth_headers(user.id)
+
+
+def test_bool_year_is_rejected(client, faculty_headers):
+    response = client.post('/api/dcsa/reports/annual', json={'year': True}, headers=faculty_headers)
+    assert response.status_code == 400
+
+
+def test_request_is_queued_in_the_database_not_run_in_the_worker(client, faculty_headers, monkeypatch):
+    monkeypatch.setattr(report_jobs, 'generate_report', lambda *args: pytest.fail('ran in the web worker'))
+
+    assert client.post('/api/dcsa/reports/annual', json={'year': 2025}, headers=faculty_headers).status_code == 202
+    assert client.post('/api/dcsa/reports/annual', json={'year': 2025}, headers=faculty_headers).status_code == 409
+    assert client.get('/api/dcsa/reports/annual/2025', headers=faculty_headers).json['status'] == 'queued'
+
+
+def test_runner_claims_and_finishes_a_job(client, db, faculty_headers):
+    client.post('/api/dcsa/reports/annual', json={'year': 2025, 'sections': ['placements']}, headers=faculty_headers)
+
+    job = report_jobs.claim_next()
+    assert job.year == 2025 and job.status == 'running'
+    assert report_jobs.claim_next() is None
+
+    assert report_jobs.finish(2025, job.claim_token, manifest={'files': []})
+    body = client.get('/api/dcsa/reports/annual/2025', headers=faculty_headers).json
+    assert body['status'] == 'completed' and body['manifest'] == {'files': []}
+    # A finished report can be requested again
+    assert client.post('/api/dcsa/reports/annual', json={'year': 2025}, headers=faculty_headers).status_code == 202
+
+
+def test_a_run_that_lost_its_claim_cannot_finish(client, db, faculty_headers):
+    client.post('/api/dcsa/reports/annual', json={'year': 2025}, headers=faculty_headers)
+    stalled = report_jobs.claim_next()
+    stalled_token = stalled.claim_token
+    assert report_jobs.renew(2025, stalled_token)
+
+    # The stalled run stops renewing, its claim lapses and another runner takes over
+    db.session.execute(update(ReportJob).values(claim_expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    db.session.commit()
+    takeover = report_jobs.claim_next()
+    assert takeover.claim_token != stalled_token
+
+    assert not report_jobs.renew(2025, stalled_token)
+    assert not report_jobs.finish(2025, stalled_token, error='stale run')
+    assert report_jobs.finish(2025, takeover.claim_token, manifest={'files': []})
+    assert client.get('/api/dcsa/reports/annual/2025', headers=faculty_headers).json['status'] == 'completed'
@@ -0,0 +1,31 @@
+from sqlalchemy import update
+
+from backend.models.dcsa import CacheGeneration
+from backend.models.user import User
+from backend.utils.response_cache import ResponseCache, cached_response, response_cache
+
+KEY = ('users.list', (), ())
+
+
+def test_invalidation_reaches_other_workers(db):
+    # Two caches stand in for two worker processes sharing one database
+    first, second = ResponseCache(), ResponseCache()
+    for cache in (first, second):
+        cache.set(KEY, b'[]', 200, 'application/json', ('users',), cache.generation(('users',)))
+
+    first.invalidate('users')
+
+    assert second.get(KEY, second.generation(('users',))) is None
+    assert db.session.get(CacheGeneration, 'users').generation == 1
+
+
+def test_core_update_through_the_session_invalidates(db):
+    cached_response('users')  # register the tag as cached
+    db.session.add(User(email='a@example.com', full_name='A'))
+    db.session.commit()
+    before = response_cache.generation(('users',))
+
+    db.session.execute(update(User).values(full_name='B').execution_options(synchronize_session=False))
+    db.session.commit()
+
+    assert response_cache.generation(('users',)) != before
@@ -0,0 +1,96 @@
+import csv
+import io
+
+import pytest
+
+from backend.models.student import SemesterRecord, StudentProfile
+from backend.models.user import User
+from backend.routes.student.results import results
+from backend.utils import response_cache as response_cache_module
+from backend.utils.results import import_results_csv
+
+HEADER = 'roll_number,semester_number,subject_code,subject_name,credits,grade\n'
+OVERSIZED_ROW = 'R1,1,CS103,' + 'x' * 200000 + ',4,A\n'
+
+
+@pytest.fixture
+def client(app, db):
+    app.register_blueprint(results)
+    return app.test_client()
+
+
+@pytest.fixture
+def students(db):
+    users = [User(email='r1@example.com'), User(email='r2@example.com')]
+    db.session.add_all(users)
+    db.session.flush()
+    profiles = [StudentProfile(user_id=user.id, roll_number=f'R{number}') for number, user in enumerate(users, 1)]
+    db.session.add_all(profiles)
+    db.session.commit()
+    return [profile.id for profile in profiles]
+
+
+def _semesters(db, student_profile_id):
+    return {
+        semester.semester_number: semester
+        for semester in SemesterRecord.query.filter_by(student_profile_id=student_profile_id)
+    }
+
+
+def test_sgpa_cgpa_and_backlogs(db, students):
+    retaker, failing = students
+    report = import_results_csv(io.StringIO(
+        HEADER
+        + 'R1,1,CS101,Programming,4,A\n'
+        + 'R1,1,CS102,Mathematics,2,F\n'
+        + 'R1,2,CS201,Databases,4,O\n'
+        + 'R1,2,CS102,Mathematics,2,B\n'  # the failed subject, retaken
+        + 'R2,1,CS101,Programming,4,B+\n'
+        + 'R2,1,CS102,Mathematics,2,AB\n'
+    ))
+
+    assert report['imported'] == 6 and report['recomputed'] == 2
+    first, second = _semesters(db, retaker)[1], _semesters(db, retaker)[2]
+    assert first.sgpa == 5.33 and first.cgpa == 5.33  # (8*4 + 0*2) / 6
+    assert second.sgpa == 8.67  # (10*4 + 6*2) / 6
+    assert second.cgpa == 7.0  # every attempt counts: (32 + 0 + 40 + 12) / 12
+    assert (first.backlog_subjects, second.backlog_subjects) == (1, 0)
+    assert (first.subjects_registered, first.subjects_cleared) == (2, 1)
+    assert db.session.get(StudentProfile, retaker).current_backlog == 0
+    assert db.session.get(StudentProfile, failing).current_backlog == 1
+    assert _semesters(db, failing)[1].sgpa == 4.67  # (7*4 + 0*2) / 6
+
+
+def test_failed_import_still_recomputes_committed_chunks(db, students):
+    lines = io.StringIO(HEADER + 'R1,1,CS101,Programming,4,A\n' + OVERSIZED_ROW)
+
+    with pytest.raises(csv.Error):
+        import_results_csv(lines, chunk_size=1)
+
+    assert _semesters(db, students[0])[1].sgpa == 8.0
+
+
+def test_malformed_csv_is_a_400(client, db, auth_headers, students):
+    faculty = User(email='faculty@example.com', is_faculty=True)
+    db.session.add(faculty)
+    db.session.commit()
+
+    response = client.post('/api/student/results/import', data=HEADER + OVERSIZED_ROW,
+                           headers={**auth_headers(faculty.id), 'Content-Type': 'text/csv'})
+
+    assert response.status_code == 400
+
+
+def test_import_refreshes_cached_analytics(client, db, auth_headers, students, monkeypatch):
+    faculty = User(email='faculty@example.com', is_faculty=True)
+    db.session.add(faculty)
+    db.session.commit()
+    import_results_csv(io.StringIO(HEADER + 'R1,1,CS101,Programming,4,A\n'))
+    url = '/api/student/results/subjects/CS101/analytics'
+    assert client.get(url, headers=auth_headers(faculty.id)).json['results'] == 1
+
+    # A command-line import never loads the routes, so its commits bump no cached tags
+    monkeypatch.setattr(response_cache_module, '_CACHED_TAGS', set())
+    import_results_csv(io.StringIO(HEADER + 'R2,1,CS101,Programming,4,B\n'))
+
+    assert client.get(url, headers=auth_headers(faculty.id)).json['results'] == 2
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from backend.models.dcsa import DepartmentEvent
+from backend.utils.scheduling import VenueSchedule, changed_since
+
+
+def _event(db, start, updated_at, venue='Seminar Hall'):
+    event = DepartmentEvent(title='Talk', venue=venue, status='approved',
+                            start_date=start, end_date=start + timedelta(hours=1))
+    db.session.add(event)
+    db.session.commit()
+    # Stand in for the stamp taken when the writer flushed, not when it committed
+    db.session.execute(DepartmentEvent.__table__.update()
+                       .where(DepartmentEvent.id == event.id).values(updated_at=updated_at))
+    db.session.commit()
+    return event.id
+
+
+def test_row_committed_after_a_later_stamp_is_not_skipped(db):
+    now = datetime.utcnow()
+    start = now + timedelta(days=3)
+    schedule = VenueSchedule()
+    _event(db, start, now)
+    schedule.refresh()
+
+    # Stamped a minute before the watermark but only visible now
+    late_id = _event(db, start + timedelta(hours=4), now - timedelta(minutes=1))
+
+    assert schedule.conflicts('seminar hall', start + timedelta(hours=4), start + timedelta(hours=5)) == [late_id]
+
+
+def test_changed_since_does_not_underflow():
+    assert changed_since(datetime.min) == datetime.min
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from backend.utils import singleflight
+from backend.utils.singleflight import SingleFlight
+
+KEY = ('results.get_subject_analytics', (), ())
+FOLLOWERS = 3
+
+
+@pytest.fixture
+def waiting(monkeypatch):
+    """Semaphore released each time a follower starts waiting on a call."""
+    waiting = threading.Semaphore(0)
+
+    class Done(threading.Event):
+        def wait(self, timeout=None):
+            waiting.release()
+            return super().wait(timeout)
+
+    class Call(singleflight._Call):
+        __slots__ = ()
+
+        def __init__(self):
+            super().__init__()
+            self.done = Done()
+
+    monkeypatch.setattr(singleflight, '_Call', Call)
+    return waiting
+
+
+def _race(group, waiting, fn):
+    """Run ``fn`` through ``group`` from a leader and FOLLOWERS callers that join it mid-flight."""
+    started, release = threading.Event(), threading.Event()
+    outcomes = [None] * (FOLLOWERS + 1)
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(index, work):
+        try:
+            outcomes[index] = ('result', group.do(KEY, work))
+        except Exception as exc:
+            outcomes[index] = ('error', exc)
+
+    threads = [threading.Thread(target=call, args=(0, leader_fn))]
+    threads[0].start()
+    assert started.wait(5)
+    for index in range(1, FOLLOWERS + 1):
+        threads.append(threading.Thread(target=call, args=(index, lambda: pytest.fail('follower ran the view'))))
+        threads[-1].start()
+    for _ in range(FOLLOWERS):
+        assert waiting.acquire(timeout=5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_calls_run_once_and_share_the_result(waiting):
+    group = SingleFlight()
+    runs = []
+
+    outcomes = _race(group, waiting, lambda: runs.append(None) or {'results': 42})
+
+    assert len(runs) == 1
+    assert all(outcome == ('result', {'results': 42}) for outcome in outcomes)
+    assert outcomes[0][1] is outcomes[1][1]
+    assert group.stats() == {'in_flight': 0, 'endpoints': {KEY[0]: {'executed': 1, 'coalesced': FOLLOWERS, 'errors': 0}}}
+
+
+def test_an_exception_reaches_every_waiter(waiting):
+    group = SingleFlight()
+    error = ValueError('analytics failed')
+
+    def fail():
+        raise error
+
+    outcomes = _race(group, waiting, fail)
+
+    assert all(outcome == ('error', error) for outcome in outcomes)
+    assert group.stats()['endpoints'][KEY[0]]['errors'] == 1
+    # Nothing is remembered: the next call runs again
+    assert group.do(KEY, lambda: 'fresh') == 'fresh'
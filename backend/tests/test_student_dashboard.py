@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+import pytest
+
+from backend.models.student import AttendanceRecord, Document, SemesterRecord, StudentProfile
+from backend.models.user import User
+from backend.routes.student.profile import DASHBOARD_SECTIONS, student
+
+
+@pytest.fixture
+def client(app, db):
+    app.register_blueprint(student)
+    return app.test_client()
+
+
+@pytest.fixture
+def user_id(db):
+    user = User(email='student@example.com')
+    db.session.add(user)
+    db.session.flush()
+    profile = StudentProfile(user_id=user.id, roll_number='R1', permanent_address='12 Mall Road',
+                             current_address='Hostel 3')
+    db.session.add(profile)
+    db.session.flush()
+    db.session.add_all([
+        SemesterRecord(student_profile_id=profile.id, semester_number=1, sgpa=7.5, cgpa=7.5),
+        SemesterRecord(student_profile_id=profile.id, semester_number=2, sgpa=8.5, cgpa=8.0),
+        Document(student_profile_id=profile.id, document_type='ID Card', file_name='id.pdf',
+                 upload_date=datetime(2026, 8, 1)),
+        AttendanceRecord(student_profile_id=profile.id, subject_code='CS101', date=date(2026, 8, 3),
+                         status='Present'),
+    ])
+    db.session.commit()
+    return user.id
+
+
+def test_dashboard_returns_every_section(client, auth_headers, user_id):
+    body = client.get('/api/student/dashboard', headers=auth_headers(user_id)).json
+
+    assert set(body) == set(DASHBOARD_SECTIONS)
+    personal = body['profile']['personal_info']
+    assert (personal['permanent_address'], personal['current_address']) == ('12 Mall Road', 'Hostel 3')
+    assert body['profile']['current_semester']['semester_number'] == 2
+    assert body['profile']['overall_attendance'] == 100
+    assert [semester['semester_number'] for semester in body['semesters']] == [1, 2]
+    assert [document['file_name'] for document in body['documents']] == ['id.pdf']
+    assert body['skills'] == [] and body['events'] == []
+
+
+def test_dashboard_returns_only_requested_sections(client, auth_headers, user_id):
+    response = client.get('/api/student/dashboard?sections=documents,semesters', headers=auth_headers(user_id))
+
+    assert set(response.json) == {'documents', 'semesters'}
+
+
+def test_unknown_dashboard_section_is_a_400(client, auth_headers, user_id):
+    response = client.get('/api/student/dashboard?sections=profile,grades', headers=auth_headers(user_id))
+
+    assert response.status_code == 400 and 'grades' in response.json['error']
@@ -0,0 +1,55 @@
+from sqlalchemy import update
+
+from backend.models.user import User
+from backend.utils.response_cache import response_cache
+from backend.utils.user_columns import UserColumnStore
+
+
+def _seed(db):
+    db.session.add_all([
+        User(email='student@example.com', is_alumni=False),
+        User(email='alumnus@example.com', is_alumni=True),
+        User(email='unknown@example.com'),
+    ])
+    db.session.commit()
+    # The column default fills in False on insert, so clear it afterwards
+    db.session.execute(update(User).where(User.email == 'unknown@example.com').values(is_alumni=None))
+    db.session.commit()
+
+
+def test_null_is_alumni_is_neither_student_nor_alumnus(app, db):
+    _seed(db)
+    users = UserColumnStore(app).snapshot()
+
+    assert users.count(users.where(is_alumni=False)) == 1
+    assert users.count(users.where(is_alumni=True)) == 1
+    assert users.count(users.where(is_alumni=None)) == 1
+
+
+def test_write_from_another_worker_forces_a_rebuild(app, db):
+    _seed(db)
+    store = UserColumnStore(app)
+    assert store.snapshot().count(store.snapshot().where(is_alumni=True)) == 1
+
+    # Another worker's write: no local dirty ids, only the shared generation moves
+    with db.engine.begin() as connection:
+        connection.execute(update(User).values(is_alumni=True))
+    response_cache.invalidate('users')
+
+    users = store.snapshot()
+    assert users.count(users.where(is_alumni=True)) == 3
+
+
+def test_local_commit_patches_without_a_rebuild(app, db, monkeypatch):
+    _seed(db)
+    store = UserColumnStore(app)
+    store.snapshot()
+    monkeypatch.setattr(store, '_build', lambda: (_ for _ in ()).throw(AssertionError('rebuilt')))
+
+    user = User.query.filter_by(email='unknown@example.com').one()
+    user.is_alumni = False
+    store.mark_dirty({user.id})
+    db.session.commit()
+
+    users = store.snapshot()
+    assert users.count(users.where(is_alumni=False)) == 2
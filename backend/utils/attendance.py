@@ -0,0 +1,253 @@
+from flask import current_app
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models.student import AttendanceAggregate, AttendanceRecord, SemesterRecord
+from ..models.user import db
+
+_aggregates = AttendanceAggregate.__table__
+_records = AttendanceRecord.__table__
+_semesters = SemesterRecord.__table__
+
+# Record fields that decide which aggregate row a record counts towards
+_TRACKED = ('student_profile_id', 'subject_code', 'date', 'status')
+
+# Dialects whose INSERT ... ON CONFLICT lets a first record create its row atomically
+_UPSERT_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+
+def semester_for(student_profile_id, on_date):
+    """Scalar SQL expression: the semester whose date range covers ``on_date``, or 0."""
+    return func.coalesce(
+        select(func.min(_semesters.c.semester_number))
+        .where(
+            _semesters.c.student_profile_id == student_profile_id,
+            _semesters.c.semester_start_date <= on_date,
+            _semesters.c.semester_end_date >= on_date,
+        )
+        .scalar_subquery(),
+        literal(0),
+    )
+
+
+def _counts(status, sign):
+    return {
+        'total_classes': sign,
+        'present_classes': sign if status == 'Present' else 0,
+        'late_classes': sign if status == 'Late' else 0,
+    }
+
+
+def _apply(connection, student_profile_id, subject_code, on_date, status, sign):
+    """Add (sign=1) or remove (sign=-1) one record from its aggregate row."""
+    semester = connection.execute(select(semester_for(student_profile_id, on_date))).scalar()
+    key = and_(
+        _aggregates.c.student_profile_id == student_profile_id,
+        _aggregates.c.subject_code == subject_code,
+        _aggregates.c.semester_number == semester,
+    )
+    counts = _counts(status, sign)
+    if sign > 0 and connection.dialect.name in _UPSERT_INSERTS:
+        statement = _UPSERT_INSERTS[connection.dialect.name](_aggregates).values(
+            student_profile_id=student_profile_id,
+            subject_code=subject_code,
+            semester_number=semester,
+            **counts,
+        )
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[column.name for column in _aggregates.primary_key],
+            set_={name: _aggregates.c[name] + statement.excluded[name] for name in counts},
+        ))
+        return
+
+    result = connection.execute(
+        update(_aggregates)
+        .where(key)
+        .values({name: _aggregates.c[name] + delta for name, delta in counts.items()})
+    )
+    if result.rowcount == 0 and sign > 0:
+        connection.execute(insert(_aggregates).values(
+            student_profile_id=student_profile_id,
+            subject_code=subject_code,
+            semester_number=semester,
+            **counts,
+        ))
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    pass
+
+
+# Load the old value when a tracked field is set on an expired record, so
+# after_update can tell which aggregate row the record used to count towards
+for _name in _TRACKED:
+    event.listen(getattr(AttendanceRecord, _name), 'set', _keep_previous, active_history=True)
+
+
+# Semester fields that decide which records fall in a semester
+_SEMESTER_TRACKED = ('student_profile_id', 'semester_number', 'semester_start_date', 'semester_end_date')
+
+for _name in _SEMESTER_TRACKED:
+    event.listen(getattr(SemesterRecord, _name), 'set', _keep_previous, active_history=True)
+
+
+def _previous(target, name):
+    history = inspect(target).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, name)
+
+
+def _bitmaps_stale(target, *student_profile_ids):
+    """Have the end of this flush rebuild the students' bitmaps, when they are the store in use."""
+    if current_app.config.get('ATTENDANCE_STORE') == 'bitmap':
+        stale = inspect(target).session.info.setdefault('attendance_bitmaps_stale', set())
+        stale.update(student_profile_ids)
+
+
+@event.listens_for(AttendanceRecord, 'after_insert')
+def _record_inserted(mapper, connection, target):
+    _apply(connection, target.student_profile_id, target.subject_code, target.date, target.status, 1)
+    _bitmaps_stale(target, target.student_profile_id)
+
+
+@event.listens_for(AttendanceRecord, 'after_update')
+def _record_updated(mapper, connection, target):
+    old = [_previous(target, name) for name in _TRACKED]
+    new = [getattr(target, name) for name in _TRACKED]
+    if old != new:
+        _apply(connection, *old, -1)
+        _apply(connection, *new, 1)
+        _bitmaps_stale(target, old[0], new[0])
+
+
+@event.listens_for(AttendanceRecord, 'after_delete')
+def _record_deleted(mapper, connection, target):
+    old = [_previous(target, name) for name in _TRACKED]
+    _apply(connection, *old, -1)
+    _bitmaps_stale(target, old[0])
+
+
+# A semester written, re-dated or removed moves records between its
+# aggregate rows and semester 0, so the student's aggregates are rebuilt
+@event.listens_for(SemesterRecord, 'after_insert')
+def _semester_inserted(mapper, connection, target):
+    if target.semester_start_date is not None and target.semester_end_date is not None:
+        _rebuild(connection, [target.student_profile_id])
+        _bitmaps_stale(target, target.student_profile_id)
+
+
+@event.listens_for(SemesterRecord, 'after_update')
+def _semester_updated(mapper, connection, target):
+    old = [_previous(target, name) for name in _SEMESTER_TRACKED]
+    new = [getattr(target, name) for name in _SEMESTER_TRACKED]
+    if old != new:
+        _rebuild(connection, {old[0], new[0]})
+        _bitmaps_stale(target, old[0], new[0])
+
+
+@event.listens_for(SemesterRecord, 'after_delete')
+def _semester_deleted(mapper, connection, target):
+    student_profile_id = _previous(target, 'student_profile_id')
+    _rebuild(connection, [student_profile_id])
+    _bitmaps_stale(target, student_profile_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _write_stale_bitmaps(session, flush_context):
+    stale = session.info.pop('attendance_bitmaps_stale', None)
+    if stale:
+        # Imported here: attendance_bitmaps imports this module
+        from .attendance_bitmaps import write_bitmaps
+        write_bitmaps(session.connection(), stale)
+
+
+def _rebuild(connection, student_profile_ids=None):
+    dated = select(
+        _records.c.student_profile_id,
+        _records.c.subject_code,
+        semester_for(_records.c.student_profile_id, _records.c.date).label('semester_number'),
+        _records.c.status,
+    )
+    clear = delete(_aggregates)
+    if student_profile_ids is not None:
+        student_profile_ids = list(student_profile_ids)
+        dated = dated.where(_records.c.student_profile_id.in_(student_profile_ids))
+        clear = clear.where(_aggregates.c.student_profile_id.in_(student_profile_ids))
+
+    dated = dated.subquery()
+    grouped = (
+        select(
+            dated.c.student_profile_id,
+            dated.c.subject_code,
+            dated.c.semester_number,
+            func.count(),
+            func.count(case((dated.c.status == 'Present', 1))),
+            func.count(case((dated.c.status == 'Late', 1))),
+        )
+        .group_by(dated.c.student_profile_id, dated.c.subject_code, dated.c.semester_number)
+    )
+
+    connection.execute(clear)
+    return connection.execute(
+        insert(_aggregates).from_select(
+            ['student_profile_id', 'subject_code', 'semester_number',
+             'total_classes', 'present_classes', 'late_classes'],
+            grouped,
+        )
+    ).rowcount
+
+
+def rebuild_attendance_aggregates(student_profile_ids=None):
+    """Recompute aggregates from AttendanceRecord with one INSERT ... SELECT.
+
+    Reconciles drift after bulk writes that bypass the ORM (imports,
+    manual SQL, semesters written with Core). Pass
+    ``student_profile_ids`` to limit the rebuild to those students.
+    Returns the number of aggregate rows written.
+    """
+    written = _rebuild(db.session.connection(), student_profile_ids)
+    db.session.commit()
+    return written
+
+
+def attendance_summary(student_profile_id):
+    """Overall and per-subject attendance for a student from the aggregates.
+
+    A class counts as attended only when its status is Present, as in
+    the original profile calculation.
+    """
+    rows = (
+        db.session.query(AttendanceAggregate)
+        .filter_by(student_profile_id=student_profile_id)
+        .order_by(AttendanceAggregate.semester_number, AttendanceAggregate.subject_code)
+        .all()
+    )
+    total = sum(row.total_classes for row in rows)
+    present = sum(row.present_classes for row in rows)
+    return {
+        'overall_attendance': (present / total) * 100 if total else 0,
+        'total_classes': total,
+        'present_classes': present,
+        'subjects': [
+            {
+                'subject_code': row.subject_code,
+                'semester_number': row.semester_number,
+                'total_classes': row.total_classes,
+                'present_classes': row.present_classes,
+                'late_classes': row.late_classes,
+                'percentage': round(row.present_classes / row.total_classes * 100, 2) if row.total_classes else 0,
+            }
+            for row in rows
+        ],
+    }
+
+
+def attendance_for(student_profile_id):
+    """``attendance_summary`` from whichever store ATTENDANCE_STORE selects."""
+    if current_app.config.get('ATTENDANCE_STORE') == 'bitmap':
+        from .attendance_bitmaps import attendance_summary as bitmap_summary
+        return bitmap_summary(student_profile_id)
+    return attendance_summary(student_profile_id)
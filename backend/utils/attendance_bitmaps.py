@@ -0,0 +1,261 @@
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from ..models.student import AttendanceBitmap, AttendanceRecord, SemesterRecord
+from ..models.user import db
+from .attendance import rebuild_attendance_aggregates
+
+# Days a semester-0 bitmap starts with before it grows to fit later dates
+INITIAL_BITMAP_DAYS = 32
+
+
+def _unpack(blob, days):
+    return np.unpackbits(np.frombuffer(blob, dtype=np.uint8), count=days, bitorder='little').astype(bool)
+
+
+def _pack(bits):
+    return np.packbits(bits, bitorder='little').tobytes()
+
+
+def _streaks(attended):
+    """Longest and current runs of True in ``attended``."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], attended.astype(np.int8), [0]))))
+    runs = edges[1::2] - edges[::2]
+    if not runs.size:
+        return 0, 0
+    return int(runs.max()), int(runs[-1]) if attended[-1] else 0
+
+
+def _semester_windows(connection, student_profile_ids=None):
+    """``{student_profile_id: [(semester_number, start, end), ...]}`` for dated semesters."""
+    query = select(
+        SemesterRecord.student_profile_id, SemesterRecord.semester_number,
+        SemesterRecord.semester_start_date, SemesterRecord.semester_end_date,
+    ).where(SemesterRecord.semester_start_date.isnot(None), SemesterRecord.semester_end_date.isnot(None))
+    if student_profile_ids is not None:
+        query = query.where(SemesterRecord.student_profile_id.in_(student_profile_ids))
+    windows = defaultdict(list)
+    for student_profile_id, number, start, end in connection.execute(query.order_by(SemesterRecord.semester_number)):
+        windows[student_profile_id].append((number, start, end))
+    return windows
+
+
+def _locate(windows, on_date):
+    """The lowest-numbered semester covering ``on_date``, as in semester_for."""
+    for number, start, end in windows:
+        if start <= on_date <= end:
+            return number, start, (end - start).days + 1
+    return 0, None, None
+
+
+class _Bitmap:
+    """Unpacked present/late/marked bits for one AttendanceBitmap row."""
+
+    def __init__(self, start_date, days):
+        self.start_date = start_date
+        self.marked = np.zeros(days, dtype=bool)
+        self.present = np.zeros(days, dtype=bool)
+        self.late = np.zeros(days, dtype=bool)
+
+    @classmethod
+    def from_row(cls, row):
+        bitmap = cls(row.start_date, row.days)
+        bitmap.marked = _unpack(row.marked, row.days)
+        bitmap.present = _unpack(row.present, row.days)
+        bitmap.late = _unpack(row.late, row.days)
+        return bitmap
+
+    def _fit(self, first, last):
+        """Grow the bitmaps (only semester-0 ones ever need to) to cover the dates."""
+        before = max(0, (self.start_date - first).days)
+        after = max(0, (last - self.start_date).days + 1 - len(self.marked))
+        if after:
+            after = max(after, len(self.marked))  # double on growth to keep rewrites rare
+        if before or after:
+            self.marked, self.present, self.late = (
+                np.pad(bits, (before, after)) for bits in (self.marked, self.present, self.late)
+            )
+            self.start_date -= timedelta(days=before)
+
+    def set_many(self, dates, statuses):
+        if not dates:
+            return
+        self._fit(min(dates), max(dates))
+        offsets = np.array([(on_date - self.start_date).days for on_date in dates])
+        statuses = np.array(statuses, dtype=object)
+        self.marked[offsets] = True
+        self.present[offsets] = statuses == 'Present'
+        self.late[offsets] = statuses == 'Late'
+
+    def row(self, student_profile_id, subject_code, semester_number):
+        return {
+            'student_profile_id': student_profile_id,
+            'subject_code': subject_code,
+            'semester_number': semester_number,
+            'start_date': self.start_date,
+            'days': len(self.marked),
+            'marked': _pack(self.marked),
+            'present': _pack(self.present),
+            'late': _pack(self.late),
+        }
+
+
+def _new_bitmap(start, days, dates):
+    if start is None:
+        return _Bitmap(min(dates), INITIAL_BITMAP_DAYS)
+    return _Bitmap(start, days)
+
+
+def write_bitmaps(connection, student_profile_ids=None):
+    """Rebuild the students' AttendanceBitmap rows on ``connection``; return the rows written.
+
+    Runs inside the caller's transaction: the import paths commit after
+    it, and the flush listener in ``utils.attendance`` calls it for the
+    students whose records or semesters a flush wrote.
+    """
+    if student_profile_ids is not None:
+        student_profile_ids = list(student_profile_ids)
+    windows = _semester_windows(connection, student_profile_ids)
+
+    query = select(
+        AttendanceRecord.student_profile_id, AttendanceRecord.subject_code,
+        AttendanceRecord.date, AttendanceRecord.status,
+    )
+    clear = delete(AttendanceBitmap)
+    if student_profile_ids is not None:
+        query = query.where(AttendanceRecord.student_profile_id.in_(student_profile_ids))
+        clear = clear.where(AttendanceBitmap.student_profile_id.in_(student_profile_ids))
+
+    groups = defaultdict(lambda: ([], []))
+    bounds = {}
+    for student_profile_id, subject_code, on_date, status in connection.execute(query.order_by(AttendanceRecord.id)):
+        number, start, days = _locate(windows.get(student_profile_id, ()), on_date)
+        key = (student_profile_id, subject_code, number)
+        dates, statuses = groups[key]
+        dates.append(on_date)
+        statuses.append(status)
+        bounds[key] = (start, days)
+
+    rows = []
+    for key, (dates, statuses) in groups.items():
+        bitmap = _new_bitmap(*bounds[key], dates)
+        bitmap.set_many(dates, statuses)
+        rows.append(bitmap.row(*key))
+
+    connection.execute(clear)
+    if rows:
+        connection.execute(insert(AttendanceBitmap), rows)
+    return len(rows)
+
+
+def bitmaps_from_records(student_profile_ids=None):
+    """Build AttendanceBitmap rows from AttendanceRecord rows.
+
+    Existing bitmaps for the students are replaced. Where a student has
+    several records for one subject and day, the latest one wins.
+    Returns the number of bitmap rows written.
+    """
+    written = write_bitmaps(db.session.connection(), student_profile_ids)
+    db.session.commit()
+    return written
+
+
+def records_from_bitmaps(student_profile_ids=None):
+    """Yield AttendanceRecord-shaped dicts for every marked day in the bitmaps."""
+    query = AttendanceBitmap.query
+    if student_profile_ids is not None:
+        query = query.filter(AttendanceBitmap.student_profile_id.in_(list(student_profile_ids)))
+    for row in query.yield_per(500):
+        bitmap = _Bitmap.from_row(row)
+        for offset in np.flatnonzero(bitmap.marked):
+            status = 'Present' if bitmap.present[offset] else 'Late' if bitmap.late[offset] else 'Absent'
+            yield {
+                'student_profile_id': row.student_profile_id,
+                'subject_code': row.subject_code,
+                'date': row.start_date + timedelta(days=int(offset)),
+                'status': status,
+            }
+
+
+def restore_records(student_profile_ids=None):
+    """Write the bitmaps back as AttendanceRecord rows.
+
+    Days with no record are inserted and records whose status differs
+    are updated; remarks on existing records are kept. Attendance
+    aggregates are rebuilt for the students afterwards. Returns
+    ``(inserted, updated)``.
+    """
+    if student_profile_ids is not None:
+        student_profile_ids = list(student_profile_ids)
+    existing_query = db.session.query(
+        AttendanceRecord.id, AttendanceRecord.student_profile_id, AttendanceRecord.subject_code,
+        AttendanceRecord.date, AttendanceRecord.status,
+    )
+    if student_profile_ids is not None:
+        existing_query = existing_query.filter(AttendanceRecord.student_profile_id.in_(student_profile_ids))
+    existing = {(sid, subject, on_date): (record_id, status)
+                for record_id, sid, subject, on_date, status in existing_query}
+
+    inserts, updates = [], []
+    for record in records_from_bitmaps(student_profile_ids):
+        key = (record['student_profile_id'], record['subject_code'], record['date'])
+        if key not in existing:
+            inserts.append(record)
+        elif existing[key][1] != record['status']:
+            updates.append({'record_id': existing[key][0], 'status': record['status']})
+
+    if inserts:
+        db.session.execute(insert(AttendanceRecord), inserts)
+    if updates:
+        table = AttendanceRecord.__table__
+        db.session.execute(
+            update(table).where(table.c.id == bindparam('record_id')).values(status=bindparam('status')),
+            updates,
+        )
+    db.session.commit()
+    # Core writes skip the mapper events that keep the aggregates in step
+    if inserts or updates:
+        rebuild_attendance_aggregates(student_profile_ids)
+    return len(inserts), len(updates)
+
+
+def attendance_summary(student_profile_id):
+    """Same shape as ``utils.attendance.attendance_summary``, read from the bitmaps.
+
+    Each subject also reports its longest and current streak of
+    consecutive classes attended (Present), skipping days with no class.
+    """
+    rows = (
+        AttendanceBitmap.query
+        .filter_by(student_profile_id=student_profile_id)
+        .order_by(AttendanceBitmap.semester_number, AttendanceBitmap.subject_code)
+        .all()
+    )
+    subjects = []
+    for row in rows:
+        marked = _unpack(row.marked, row.days)
+        present = _unpack(row.present, row.days)
+        total = int(marked.sum())
+        present_classes = int(present.sum())
+        longest, current = _streaks(present[marked])
+        subjects.append({
+            'subject_code': row.subject_code,
+            'semester_number': row.semester_number,
+            'total_classes': total,
+            'present_classes': present_classes,
+            'late_classes': int(_unpack(row.late, row.days).sum()),
+            'percentage': round(present_classes / total * 100, 2) if total else 0,
+            'longest_streak': longest,
+            'current_streak': current,
+        })
+    total = sum(subject['total_classes'] for subject in subjects)
+    present = sum(subject['present_classes'] for subject in subjects)
+    return {
+        'overall_attendance': (present / total) * 100 if total else 0,
+        'total_classes': total,
+        'present_classes': present,
+        'subjects': subjects,
+    }
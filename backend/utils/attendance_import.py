@@ -0,0 +1,168 @@
+import csv
+from datetime import datetime
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import bindparam, insert, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..models.student import AttendanceRecord, StudentProfile
+from ..models.user import db
+from .attendance import rebuild_attendance_aggregates
+from .attendance_bitmaps import bitmaps_from_records
+
+# CSV rows validated and written per round trip
+ATTENDANCE_IMPORT_CHUNK = 1000
+# Per-row errors returned in full; the rest are only counted
+MAX_REPORTED_ERRORS = 500
+
+REQUIRED_COLUMNS = ('roll_number', 'subject_code', 'date', 'status')
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+STATUSES = {
+    'present': 'Present', 'p': 'Present',
+    'absent': 'Absent', 'a': 'Absent',
+    'late': 'Late', 'l': 'Late',
+}
+
+_records = AttendanceRecord.__table__
+_KEY = ('student_profile_id', 'subject_code', 'date')
+_UPSERT_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _validate(row, roll_numbers):
+    """Return ``(record, None)`` for a good row or ``(None, error)``."""
+    roll_number = (row.get('roll_number') or '').strip()
+    subject_code = (row.get('subject_code') or '').strip().upper()
+    status = STATUSES.get((row.get('status') or '').strip().lower())
+    on_date = _parse_date((row.get('date') or '').strip())
+    remarks = (row.get('remarks') or '').strip() or None
+
+    if roll_number not in roll_numbers:
+        return None, f'Unknown roll number {roll_number!r}'
+    if not subject_code or len(subject_code) > 20:
+        return None, 'subject_code is required and must be at most 20 characters'
+    if on_date is None:
+        return None, f"date must be one of {', '.join(DATE_FORMATS)}"
+    if status is None:
+        return None, 'status must be Present, Absent or Late (or P, A, L)'
+    if remarks and len(remarks) > 200:
+        return None, 'remarks must be at most 200 characters'
+    return {
+        'student_profile_id': roll_numbers[roll_number],
+        'subject_code': subject_code,
+        'date': on_date,
+        'status': status,
+        'remarks': remarks,
+    }, None
+
+
+def _upsert(records):
+    """Insert ``records`` or overwrite the ones already stored for the same key."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect in _UPSERT_INSERTS:
+        statement = _UPSERT_INSERTS[dialect](_records)
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(_KEY),
+                set_={'status': statement.excluded.status, 'remarks': statement.excluded.remarks},
+            ),
+            records,
+        )
+        return
+
+    keys = [tuple(record[name] for name in _KEY) for record in records]
+    existing = {
+        tuple(row[1:]): row[0]
+        for row in db.session.execute(
+            _records.select().with_only_columns(_records.c.id, *(_records.c[name] for name in _KEY))
+            .where(tuple_(*(_records.c[name] for name in _KEY)).in_(keys))
+        )
+    }
+    updates = [
+        {'record_id': existing[key], 'status': record['status'], 'remarks': record['remarks']}
+        for key, record in zip(keys, records) if key in existing
+    ]
+    inserts = [record for key, record in zip(keys, records) if key not in existing]
+    if updates:
+        db.session.execute(
+            update(_records).where(_records.c.id == bindparam('record_id'))
+            .values(status=bindparam('status'), remarks=bindparam('remarks')),
+            updates,
+        )
+    if inserts:
+        db.session.execute(insert(_records), inserts)
+
+
+def import_attendance_csv(lines, chunk_size=ATTENDANCE_IMPORT_CHUNK):
+    """Stream attendance rows from CSV text into AttendanceRecord.
+
+    ``lines`` is any iterable of CSV lines with a header naming
+    roll_number, subject_code, date and status (remarks is optional).
+    Rows are validated and upserted ``chunk_size`` at a time, one
+    executemany per chunk, so a file of any size is held in memory only
+    a chunk at a time. Re-importing a row for the same student, subject
+    and date overwrites its status and remarks, so a file can safely be
+    imported again. Each chunk commits on its own; attendance aggregates
+    (and bitmaps, when that store is in use) are rebuilt for the affected
+    students at the end, including when a later line fails and the
+    error (ValueError, UnicodeDecodeError or csv.Error) propagates.
+    Returns a report with per-row errors by line.
+    """
+    reader = csv.DictReader(lines)
+    columns = {name.strip().lower() for name in reader.fieldnames or ()}
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+
+    roll_numbers = dict(db.session.query(StudentProfile.roll_number, StudentProfile.id))
+    report = {'rows': 0, 'imported': 0, 'error_count': 0, 'errors': []}
+    students = set()
+
+    rows = ((reader.line_num, row) for row in reader)
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            report['rows'] += len(chunk)
+
+            # Later rows for the same key win, as they would if imported one by one
+            records = {}
+            for line, row in chunk:
+                record, error = _validate(row, roll_numbers)
+                if error:
+                    report['error_count'] += 1
+                    if len(report['errors']) < MAX_REPORTED_ERRORS:
+                        report['errors'].append({'line': line, 'error': error})
+                    continue
+                records[tuple(record[name] for name in _KEY)] = record
+
+            if records:
+                _upsert(list(records.values()))
+                db.session.commit()
+                report['imported'] += len(records)
+                students.update(key[0] for key in records)
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        # Bulk writes skip the mapper events that keep the aggregates in
+        # step; rebuild for the chunks already committed even when a later
+        # line fails to decode or parse
+        if students:
+            rebuild_attendance_aggregates(students)
+            if current_app.config.get('ATTENDANCE_STORE') == 'bitmap':
+                bitmaps_from_records(students)
+    report['students'] = len(students)
+    return report
@@ -0,0 +1,201 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import bindparam, case, func
+
+from ..models.dcsa import EventParticipant
+from ..models.user import db
+from .signing import sign_token, verify_token
+
+CHECKIN_TOKEN_PURPOSE = 'event-check-in'
+
+# Seconds between flushes of buffered check-ins
+CHECKIN_FLUSH_INTERVAL = 0.25
+# Seconds a check-in token stays valid after it is issued
+CHECKIN_TOKEN_TTL = 2 * 24 * 3600
+# Seconds an event's roster (approved and attended participants) is reused
+ROSTER_TTL = 30
+# A roster younger than this is not re-read when a scan misses it
+ROSTER_MIN_RELOAD = 2
+ROSTER_MAX_EVENTS = 64
+# Check-ins remembered per worker to answer repeat scans, and for how long
+SEEN_MAX = 50000
+SEEN_TTL = 15 * 60
+
+CHECKED_IN = 'checked_in'
+ALREADY_CHECKED_IN = 'already_checked_in'
+NOT_APPROVED = 'not_approved'
+
+_mark_attended = (
+    EventParticipant.__table__.update()
+    .where(
+        EventParticipant.event_id == bindparam('e_id'),
+        EventParticipant.user_id == bindparam('u_id'),
+        EventParticipant.approval_status == 'approved',
+        EventParticipant.attendance_status.is_distinct_from('Attended'),
+    )
+    .values(attendance_status='Attended')
+)
+
+
+def check_in_token(event_id, user_id, ttl=CHECKIN_TOKEN_TTL):
+    """Signed token encoded in a participant's QR code, valid for ``ttl`` seconds."""
+    return sign_token(CHECKIN_TOKEN_PURPOSE, event_id, user_id, int(time.time()) + ttl)
+
+
+def read_check_in_token(token):
+    """Return ``(event_id, user_id)`` for a valid, unexpired token, or None."""
+    fields = verify_token(CHECKIN_TOKEN_PURPOSE, token)
+    if not fields or len(fields) != 3:
+        return None
+    try:
+        event_id, user_id, expires = (int(field) for field in fields)
+    except ValueError:
+        return None
+    if expires < time.time():
+        return None
+    return event_id, user_id
+
+
+class AttendanceBuffer:
+    """Write-behind buffer for check-ins.
+
+    Each event's roster (approved and already-attended participants) is
+    read with one query and reused for ROSTER_TTL seconds, so a scan of a
+    participant who is not approved is rejected up front and one already
+    checked in by another worker is recognised once its write has landed.
+    A scan missing from the roster re-reads it first, so fresh approvals
+    are not turned away. Accepted scans are acknowledged from memory, and
+    a background thread writes them out with one executemany UPDATE per
+    flush. The UPDATE only touches participations that are still approved
+    and not yet marked attended, so a repeat scan on another worker
+    inside the roster window is written once. Recent check-ins are kept
+    in a bounded, expiring map; pending ones are flushed at interpreter
+    exit and retried on the next tick if a flush fails.
+    """
+
+    def __init__(self, interval=CHECKIN_FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending = set()
+        self._seen = OrderedDict()  # (event_id, user_id) -> expiry
+        self._rosters = OrderedDict()  # event_id -> (loaded_at, approved, attended)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._app = None
+        self._worker = None
+        atexit.register(self.flush)
+
+    def record(self, event_id, user_id):
+        """Buffer a check-in; return CHECKED_IN, ALREADY_CHECKED_IN or NOT_APPROVED."""
+        key = (event_id, user_id)
+        now = time.monotonic()
+        with self._lock:
+            self._expire_seen(now)
+            if key in self._seen:
+                return ALREADY_CHECKED_IN
+
+        approved, attended = self._roster(event_id, now)
+        if user_id not in approved:
+            approved, attended = self._roster(event_id, now, reload=True)
+            if user_id not in approved:
+                return NOT_APPROVED
+
+        with self._lock:
+            if key in self._seen or user_id in attended:
+                return ALREADY_CHECKED_IN
+            self._seen[key] = now + SEEN_TTL
+            while len(self._seen) > SEEN_MAX:
+                self._seen.popitem(last=False)
+            self._pending.add(key)
+            if self._app is None:
+                self._app = current_app._get_current_object()
+        self._ensure_worker()
+        return CHECKED_IN
+
+    def _expire_seen(self, now):
+        while self._seen:
+            key, expires = next(iter(self._seen.items()))
+            if expires > now:
+                break
+            del self._seen[key]
+
+    def _roster(self, event_id, now, reload=False):
+        with self._lock:
+            cached = self._rosters.get(event_id)
+        if cached:
+            loaded_at, approved, attended = cached
+            age = now - loaded_at
+            if age < (ROSTER_MIN_RELOAD if reload else ROSTER_TTL):
+                return approved, attended
+
+        rows = (
+            db.session.query(EventParticipant.user_id, EventParticipant.attendance_status)
+            .filter(EventParticipant.event_id == event_id, EventParticipant.approval_status == 'approved')
+            .all()
+        )
+        approved = frozenset(user_id for user_id, _ in rows)
+        attended = frozenset(user_id for user_id, status in rows if status == 'Attended')
+        with self._lock:
+            self._rosters[event_id] = (now, approved, attended)
+            self._rosters.move_to_end(event_id)
+            while len(self._rosters) > ROSTER_MAX_EVENTS:
+                self._rosters.popitem(last=False)
+        return approved, attended
+
+    def pending_count(self, event_id):
+        with self._lock:
+            return sum(1 for pending_event, _ in self._pending if pending_event == event_id)
+
+    def flush(self):
+        """Write every buffered check-in; return how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, set()
+                app = self._app
+            if not batch:
+                return 0
+            with app.app_context():
+                try:
+                    db.session.execute(
+                        _mark_attended,
+                        [{'e_id': event_id, 'u_id': user_id} for event_id, user_id in batch],
+                    )
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    with self._lock:
+                        self._pending |= batch
+                    app.logger.exception('Failed to flush %d check-in(s); will retry', len(batch))
+                    return 0
+            return len(batch)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='check-in-flusher', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+attendance_buffer = AttendanceBuffer()
+
+
+def attendance_counts(event_id):
+    """Approved participants and check-ins for the venue screen."""
+    approved, attended = (
+        db.session.query(
+            func.count(),
+            func.count(case((EventParticipant.attendance_status == 'Attended', 1))),
+        )
+        .filter(EventParticipant.event_id == event_id, EventParticipant.approval_status == 'approved')
+        .one()
+    )
+    pending = attendance_buffer.pending_count(event_id)
+    return {'approved': approved, 'checked_in': attended + pending, 'pending_flush': pending}
@@ -0,0 +1,238 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from sqlalchemy import create_engine, extract, func, select
+from sqlalchemy.pool import NullPool
+
+from ..models.user import User
+from ..models.dcsa import Achievement, Course, DepartmentEvent, EventParticipant, ResearchPublication
+
+# Engine owned by each worker process, created once by _init_worker
+_engine = None
+
+
+def _init_worker(database_uri):
+    global _engine
+    _engine = create_engine(database_uri, poolclass=NullPool)
+
+
+def _fetch(statement):
+    with _engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(statement)]
+
+
+def placements_section(year):
+    rows = _fetch(
+        select(Course.name, User.placement_company, func.count(User.id))
+        .select_from(User)
+        .outerjoin(Course, User.course_id == Course.id)
+        .where(User.placement_year == year, User.placement_company.isnot(None))
+        .group_by(Course.name, User.placement_company)
+        .order_by(func.count(User.id).desc())
+    )
+    return {
+        'header': ['course', 'company', 'placements'],
+        'rows': rows,
+        'summary': {
+            'total_placements': sum(row[2] for row in rows),
+            'companies': len({row[1] for row in rows}),
+        },
+    }
+
+
+def publications_section(year):
+    rows = _fetch(
+        select(
+            ResearchPublication.title,
+            ResearchPublication.authors,
+            ResearchPublication.publication_type,
+            func.coalesce(ResearchPublication.journal_name, ResearchPublication.conference_name),
+            ResearchPublication.citation_count,
+            User.full_name,
+        )
+        .select_from(ResearchPublication)
+        .outerjoin(User, ResearchPublication.user_id == User.id)
+        .where(ResearchPublication.year == year)
+        .order_by(ResearchPublication.citation_count.desc())
+    )
+    by_type = {}
+    for row in rows:
+        by_type[row[2]] = by_type.get(row[2], 0) + 1
+    return {
+        'header': ['title', 'authors', 'type', 'venue', 'citations', 'faculty'],
+        'rows': rows,
+        'summary': {
+            'total_publications': len(rows),
+            'total_citations': sum(row[4] or 0 for row in rows),
+            'by_type': by_type,
+        },
+    }
+
+
+def events_section(year):
+    participants = (
+        select(EventParticipant.event_id, func.count().label('approved'))
+        .where(EventParticipant.approval_status == 'approved')
+        .group_by(EventParticipant.event_id)
+        .subquery()
+    )
+    rows = _fetch(
+        select(
+            DepartmentEvent.title,
+            DepartmentEvent.event_type,
+            DepartmentEvent.start_date,
+            DepartmentEvent.department,
+            DepartmentEvent.venue,
+            func.coalesce(participants.c.approved, 0),
+        )
+        .outerjoin(participants, participants.c.event_id == DepartmentEvent.id)
+        .where(extract('year', DepartmentEvent.start_date) == year, DepartmentEvent.status == 'approved')
+        .order_by(DepartmentEvent.start_date)
+    )
+    return {
+        'header': ['title', 'type', 'start_date', 'department', 'venue', 'approved_participants'],
+        'rows': rows,
+        'summary': {
+            'total_events': len(rows),
+            'total_participants': sum(row[5] for row in rows),
+        },
+    }
+
+
+def achievements_section(year):
+    rows = _fetch(
+        select(Achievement.title, Achievement.achievement_type, Achievement.date, User.full_name)
+        .select_from(Achievement)
+        .outerjoin(User, Achievement.user_id == User.id)
+        .where(extract('year', Achievement.date) == year)
+        .order_by(Achievement.date)
+    )
+    by_type = {}
+    for row in rows:
+        by_type[row[1]] = by_type.get(row[1], 0) + 1
+    return {
+        'header': ['title', 'type', 'date', 'awarded_to'],
+        'rows': rows,
+        'summary': {'total_achievements': len(rows), 'by_type': by_type},
+    }
+
+
+def cohort_cgpa_section(year):
+    """CGPA of every cohort enrolled at some point during ``year``."""
+    rows = _fetch(
+        select(
+            Course.name,
+            User.batch_year,
+            func.count(User.id),
+            func.avg(User.cgpa),
+            func.min(User.cgpa),
+            func.max(User.cgpa),
+            func.count(User.placement_company),
+        )
+        .select_from(User)
+        .join(Course, User.course_id == Course.id)
+        .where(
+            User.batch_year <= year,
+            (User.graduation_year.is_(None)) | (User.graduation_year >= year),
+        )
+        .group_by(Course.name, User.batch_year)
+        .order_by(Course.name, User.batch_year)
+    )
+    rows = [
+        (course, batch, students, round(avg, 2) if avg is not None else None, low, high, placed)
+        for course, batch, students, avg, low, high, placed in rows
+    ]
+    return {
+        'header': ['course', 'batch_year', 'students', 'average_cgpa', 'min_cgpa', 'max_cgpa', 'placed'],
+        'rows': rows,
+        'summary': {'cohorts': len(rows), 'students': sum(row[2] for row in rows)},
+    }
+
+
+SECTIONS = {
+    'placements': placements_section,
+    'publications': publications_section,
+    'events': events_section,
+    'achievements': achievements_section,
+    'cohort_cgpa': cohort_cgpa_section,
+}
+
+
+def _run_section(name, year):
+    started = time.perf_counter()
+    result = SECTIONS[name](year)
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return name, result
+
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def generate_report(database_uri, year, out_dir, sections=None, workers=None):
+    """Build the annual department report for ``year`` into ``out_dir``.
+
+    Each section runs in its own worker process with a private database
+    connection. Sections are written to ``<section>.csv`` as soon as they
+    finish, and ``report.json`` is streamed section by section, so the
+    whole report is never held in memory at once.
+
+    Returns a manifest describing the files written and per-section timings.
+    """
+    sections = list(sections or SECTIONS)
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown report sections: {', '.join(sorted(unknown))}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+    manifest = {'year': year, 'generated_at': datetime.utcnow().isoformat(), 'files': [], 'sections': {}}
+    json_path = os.path.join(out_dir, 'report.json')
+
+    with open(json_path, 'w') as report, ProcessPoolExecutor(
+        max_workers=workers or min(len(sections), os.cpu_count() or 1),
+        initializer=_init_worker,
+        initargs=(database_uri,),
+    ) as pool:
+        report.write('{"year": %d, "sections": {' % year)
+        futures = [pool.submit(_run_section, name, year) for name in sections]
+
+        for index, future in enumerate(as_completed(futures)):
+            name, result = future.result()
+
+            csv_path = os.path.join(out_dir, f'{name}.csv')
+            with open(csv_path, 'w', newline='') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(result['header'])
+                writer.writerows(result['rows'])
+
+            if index:
+                report.write(', ')
+            report.write(json.dumps(name) + ': ')
+            json.dump(
+                {
+                    'summary': result['summary'],
+                    'rows': [dict(zip(result['header'], row)) for row in result['rows']],
+                },
+                report,
+                default=_json_default,
+            )
+
+            manifest['files'].append(csv_path)
+            manifest['sections'][name] = {
+                'rows': len(result['rows']),
+                'seconds': result['seconds'],
+                'summary': result['summary'],
+            }
+
+        report.write('}}')
+
+    manifest['files'].append(json_path)
+    manifest['seconds'] = round(time.perf_counter() - started, 3)
+    return manifest
@@ -0,0 +1,214 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+
+from .signing import sign_token, verify_token
+
+# Bytes read from the request stream per iteration
+STREAM_CHUNK_SIZE = 64 * 1024
+
+DOWNLOAD_TOKEN_PURPOSE = 'document-download'
+
+# Formats accepted for certificates, ID cards, receipts and scans
+ALLOWED_CONTENT_TYPES = {'application/pdf', 'image/jpeg', 'image/png', 'image/webp', 'image/tiff'}
+
+
+class DocumentTooLarge(Exception):
+    """The upload exceeded the configured maximum document size."""
+
+
+class _NullHasher:
+    def update(self, data):
+        pass
+
+
+def document_content_type(file_name, declared=None):
+    """The accepted content type for an upload, trusting the file extension
+    when the client sent none or a generic one; None if not accepted."""
+    if declared in ALLOWED_CONTENT_TYPES:
+        return declared
+    guessed, _ = mimetypes.guess_type(file_name or '')
+    return guessed if guessed in ALLOWED_CONTENT_TYPES else None
+
+
+def download_token(document_id, content_hash, ttl):
+    """Signed token for a download URL, valid for ``ttl`` seconds.
+
+    The content hash is signed in as well, so a URL stops working if the
+    document's file is replaced.
+    """
+    return sign_token(DOWNLOAD_TOKEN_PURPOSE, document_id, content_hash, int(time.time()) + ttl)
+
+
+def read_download_token(token):
+    """Return ``(document_id, content_hash, expires)`` for a valid, unexpired token, or None."""
+    fields = verify_token(DOWNLOAD_TOKEN_PURPOSE, token)
+    if not fields or len(fields) != 3 or not fields[0].isdigit() or not fields[2].isdigit():
+        return None
+    expires = int(fields[2])
+    if expires < time.time():
+        return None
+    return int(fields[0]), fields[1], expires
+
+
+class DocumentStorage:
+    """Content-addressed file store for student documents.
+
+    Every stored file lives at ``objects/<first two hex digits>/<sha256>``
+    under DOCUMENTS_DIR, so identical uploads (the same certificate sent
+    twice, or by two students) share one file on disk. Uploads are
+    streamed to a temporary file while being hashed and only moved into
+    place once complete, so readers never see a partial object.
+
+    Resumable uploads keep their bytes in ``uploads/<upload id>.part``
+    until the last chunk arrives. Each chunk is staged under ``tmp/`` and
+    only appended once its request has claimed the offset, so racing
+    chunks never write the part file. The running hash of an upload is kept
+    in memory between chunks; a chunk handled by another worker (or after
+    a restart) re-hashes the part file first.
+    """
+
+    def __init__(self, app=None):
+        self.root = None
+        self.max_size = None
+        self._hashers = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = app.config['DOCUMENTS_DIR']
+        self.max_size = app.config.get('MAX_DOCUMENT_SIZE')
+        for name in ('objects', 'uploads', 'tmp'):
+            os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        app.extensions['document_storage'] = self
+
+    def path_for(self, relative_path):
+        """Absolute path of a stored object from its ``Document.file_path``."""
+        return os.path.join(self.root, relative_path)
+
+    def _copy(self, stream, target, hasher, limit, written=0):
+        while True:
+            chunk = stream.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return written
+            written += len(chunk)
+            if limit and written > limit:
+                raise DocumentTooLarge(f'Documents may be at most {limit} bytes')
+            hasher.update(chunk)
+            target.write(chunk)
+
+    def _commit(self, source_path, content_hash):
+        relative_path = os.path.join('objects', content_hash[:2], content_hash)
+        path = self.path_for(relative_path)
+        if os.path.exists(path):
+            # Already stored: drop the duplicate
+            os.unlink(source_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(source_path, path)
+        return relative_path
+
+    def save(self, stream):
+        """Store everything readable from ``stream``.
+
+        Returns ``(content_hash, size, relative_path)``. Raises
+        DocumentTooLarge, leaving nothing behind, if the stream is longer
+        than MAX_DOCUMENT_SIZE.
+        """
+        hasher = hashlib.sha256()
+        handle, temp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'tmp'))
+        try:
+            with os.fdopen(handle, 'wb') as target:
+                size = self._copy(stream, target, hasher, self.max_size)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        content_hash = hasher.hexdigest()
+        return content_hash, size, self._commit(temp_path, content_hash)
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.root, 'uploads', f'{upload_id}.part')
+
+    def _hasher_at(self, upload_id, offset):
+        with self._lock:
+            cached = self._hashers.pop(upload_id, None)
+        if cached and cached[0] == offset:
+            return cached[1]
+        hasher = hashlib.sha256()
+        with open(self._part_path(upload_id), 'rb') as part:
+            remaining = offset
+            while remaining:
+                chunk = part.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        return hasher
+
+    def begin_upload(self, upload_id):
+        open(self._part_path(upload_id), 'wb').close()
+        with self._lock:
+            self._hashers[upload_id] = (0, hashlib.sha256())
+
+    def stage_chunk(self, stream, limit):
+        """Write ``stream`` to a temporary file; return ``(chunk_path, size)``.
+
+        Nothing touches the part file yet: the caller first claims the
+        chunk's offset on the upload row, then calls ``append``, or drops
+        the chunk with ``discard_chunk`` if another request won. ``limit``
+        is the number of bytes the upload still expects; a longer chunk
+        raises DocumentTooLarge and is discarded.
+        """
+        handle, chunk_path = tempfile.mkstemp(dir=os.path.join(self.root, 'tmp'), suffix='.chunk')
+        try:
+            with os.fdopen(handle, 'wb') as target:
+                try:
+                    size = self._copy(stream, target, _NullHasher(), limit)
+                except DocumentTooLarge:
+                    raise DocumentTooLarge('Chunk runs past the declared upload size') from None
+        except BaseException:
+            os.unlink(chunk_path)
+            raise
+        return chunk_path, size
+
+    def append(self, upload_id, offset, chunk_path):
+        """Move a staged chunk into the upload at ``offset``; return the new size.
+
+        Call only after winning the offset, while still holding the row
+        lock that claim took, so chunks reach the part file in order.
+        """
+        hasher = self._hasher_at(upload_id, offset)
+        with open(self._part_path(upload_id), 'r+b') as part, open(chunk_path, 'rb') as chunk:
+            part.seek(offset)
+            part.truncate()
+            size = self._copy(chunk, part, hasher, None, offset)
+        os.unlink(chunk_path)
+        with self._lock:
+            self._hashers[upload_id] = (size, hasher)
+        return size
+
+    def discard_chunk(self, chunk_path):
+        try:
+            os.unlink(chunk_path)
+        except FileNotFoundError:
+            pass
+
+    def finish_upload(self, upload_id, size):
+        """Move a complete upload into the object store; return ``(content_hash, relative_path)``."""
+        content_hash = self._hasher_at(upload_id, size).hexdigest()
+        return content_hash, self._commit(self._part_path(upload_id), content_hash)
+
+    def discard_upload(self, upload_id):
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+        try:
+            os.unlink(self._part_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+
+document_storage = DocumentStorage()
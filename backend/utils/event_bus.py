@@ -0,0 +1,261 @@
+import json
+import select
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, insert, text
+
+from ..models.dcsa import EventBusMessage
+from ..models.user import db
+from .signing import sign_token, verify_token
+
+# Published messages kept in memory for clients resuming with Last-Event-ID
+EVENT_BUS_HISTORY = 1000
+# Published messages are deleted from the table after this long
+EVENT_BUS_RETENTION = timedelta(days=1)
+# Postgres channel a publish notifies; listeners then read the new rows
+EVENT_BUS_CHANNEL = 'event_bus'
+# Advisory lock serializing publishes, so ids commit in increasing order
+EVENT_BUS_LOCK_KEY = 0x45564255
+# Seconds between reads of the table without a notification (the only
+# wake-up on databases without LISTEN/NOTIFY)
+EVENT_BUS_POLL_INTERVAL = 1
+EVENT_BUS_LISTEN_TIMEOUT = 30
+# Seconds between keep-alive comments on an idle stream
+SSE_HEARTBEAT_INTERVAL = 15
+# Reconnect delay suggested to EventSource clients, in milliseconds
+SSE_RETRY_MS = 3000
+
+STREAM_TICKET_PURPOSE = 'event-stream'
+# Seconds a stream ticket can be used to open a stream
+STREAM_TICKET_TTL = 60
+
+
+def stream_ticket(user_id, session_expires=None, ttl=STREAM_TICKET_TTL):
+    """Short-lived signed ticket that opens one user's stream.
+
+    EventSource cannot send an Authorization header, so browsers trade
+    their JWT for a ticket instead of putting the JWT in the URL.
+    ``session_expires`` (the JWT's ``exp``) is carried along and ends
+    the stream when it passes.
+    """
+    return sign_token(STREAM_TICKET_PURPOSE, user_id, int(time.time()) + ttl, int(session_expires or 0))
+
+
+def read_stream_ticket(token):
+    """Return ``(user_id, session_expires)`` for a valid, unexpired ticket, or None."""
+    fields = verify_token(STREAM_TICKET_PURPOSE, token)
+    if not fields or len(fields) != 3:
+        return None
+    try:
+        user_id, expires, session_expires = (int(field) for field in fields)
+    except ValueError:
+        return None
+    if expires < time.time():
+        return None
+    return user_id, session_expires or None
+
+
+class EventBus:
+    """Publish/subscribe bus backing the SSE stream, shared by all workers.
+
+    ``publish`` inserts a row into event_bus_message, so message ids come
+    from the database and are the same on every worker. On Postgres the
+    insert takes an advisory lock (ids become visible in order) and
+    NOTIFYs EVENT_BUS_CHANNEL. Each worker runs one listener thread,
+    started by its first subscriber, that LISTENs on the channel (or
+    polls the table on other databases) and copies new rows into a
+    bounded ring buffer, so a reconnecting client can replay what it
+    missed from its Last-Event-ID. Subscribers wait on a shared
+    condition rather than owning a queue each.
+    """
+
+    def __init__(self, history=EVENT_BUS_HISTORY):
+        self._messages = deque(maxlen=history)
+        self._head = 0
+        self._condition = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._listener = None
+
+    @property
+    def last_id(self):
+        with self._condition:
+            return self._head
+
+    def publish(self, kind, data, user_ids=None):
+        """Publish a message to everyone, or only to ``user_ids``."""
+        audience = None if user_ids is None else json.dumps(sorted({int(user_id) for user_id in user_ids}))
+        with db.engine.begin() as connection:
+            postgres = connection.dialect.name == 'postgresql'
+            if postgres:
+                connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': EVENT_BUS_LOCK_KEY})
+            message_id = connection.execute(
+                insert(EventBusMessage)
+                .values(kind=kind, data=json.dumps(data), audience=audience, created_at=datetime.utcnow())
+                .returning(EventBusMessage.id)
+            ).scalar_one()
+            if postgres:
+                connection.execute(text('SELECT pg_notify(:channel, :payload)'),
+                                   {'channel': EVENT_BUS_CHANNEL, 'payload': str(message_id)})
+        return message_id
+
+    def messages_after(self, last_id, user_id=None):
+        """Messages newer than ``last_id`` visible to ``user_id``.
+
+        Returns ``(messages, head, complete)``: ``head`` is the newest id on
+        the bus, and ``complete`` is False when ``last_id`` cannot be
+        resumed from, either because messages after it have left the
+        ring buffer or because it is newer than anything published.
+        """
+        with self._condition:
+            head = self._head
+            oldest = self._messages[0][0] if self._messages else head + 1
+            complete = oldest <= last_id + 1 and last_id <= head
+            messages = []
+            # Walk back from the newest message so a caught-up subscriber
+            # touches only what is new
+            for message in reversed(self._messages):
+                if message[0] <= last_id:
+                    break
+                if message[3] is None or user_id in message[3]:
+                    messages.append(message)
+        messages.reverse()
+        return messages, head, complete
+
+    def wait(self, last_id, timeout):
+        """Block until a message newer than ``last_id`` exists or ``timeout`` passes."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._head > last_id, timeout)
+
+    def stream(self, user_id=None, last_event_id=None, expires_at=None, heartbeat=SSE_HEARTBEAT_INTERVAL):
+        """Return an iterator of ``text/event-stream`` chunks for one subscriber.
+
+        The stream ends with an ``expired`` event once ``expires_at`` (a
+        Unix timestamp) passes; the client then needs a fresh ticket.
+        """
+        self._ensure_listener(current_app._get_current_object())
+        return self._stream(user_id, last_event_id, expires_at, heartbeat)
+
+    def _stream(self, user_id, last_event_id, expires_at, heartbeat):
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        if last_event_id is None:
+            cursor = self.last_id
+        else:
+            cursor = last_event_id
+            _, head, complete = self.messages_after(cursor, user_id)
+            if not complete:
+                # The client missed messages we no longer have; tell it to refetch
+                yield f'id: {head}\nevent: reset\ndata: {{}}\n\n'
+                cursor = head
+
+        last_sent = time.monotonic()
+        while True:
+            if expires_at is not None and time.time() >= expires_at:
+                yield 'event: expired\ndata: {}\n\n'
+                return
+
+            messages, head, _ = self.messages_after(cursor, user_id)
+            for message_id, kind, data, _ in messages:
+                yield f'id: {message_id}\nevent: {kind}\ndata: {data}\n\n'
+                last_sent = time.monotonic()
+            # Skip past messages meant for other users as well
+            cursor = head
+
+            remaining = heartbeat - (time.monotonic() - last_sent)
+            if expires_at is not None:
+                remaining = min(remaining, max(0, expires_at - time.time()))
+            if remaining <= 0 or not self.wait(cursor, remaining):
+                yield ': ping\n\n'
+                last_sent = time.monotonic()
+
+    def _ensure_listener(self, app):
+        with self._start_lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            # Load recent history before the first subscriber reads last_id
+            with db.engine.connect() as connection:
+                self._load_recent(connection)
+            self._listener = threading.Thread(target=self._run, args=(app,), name='event-bus-listener', daemon=True)
+            self._listener.start()
+
+    def _load_recent(self, connection):
+        rows = connection.execute(
+            EventBusMessage.__table__.select()
+            .where(EventBusMessage.id > self._head)
+            .order_by(EventBusMessage.id.desc())
+            .limit(self._messages.maxlen)
+        ).all()
+        self._append(reversed(rows))
+
+    def _read_new(self, connection):
+        rows = connection.execute(
+            EventBusMessage.__table__.select()
+            .where(EventBusMessage.id > self._head)
+            .order_by(EventBusMessage.id)
+        ).all()
+        self._append(rows)
+
+    def _append(self, rows):
+        with self._condition:
+            added = False
+            for row in rows:
+                audience = None if row.audience is None else frozenset(json.loads(row.audience))
+                self._messages.append((row.id, row.kind, row.data, audience))
+                self._head = row.id
+                added = True
+            if added:
+                self._condition.notify_all()
+
+    def _prune(self, connection):
+        connection.execute(delete(EventBusMessage).where(
+            EventBusMessage.created_at < datetime.utcnow() - EVENT_BUS_RETENTION
+        ))
+        connection.commit()
+
+    def _run(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    if db.engine.dialect.name == 'postgresql':
+                        self._listen()
+                    else:
+                        self._poll()
+                except Exception:
+                    app.logger.exception('Event bus listener failed; reconnecting')
+            time.sleep(EVENT_BUS_POLL_INTERVAL)
+
+    def _poll(self):
+        pruned_at = time.monotonic()
+        while True:
+            with db.engine.connect() as connection:
+                self._read_new(connection)
+                if time.monotonic() - pruned_at > 3600:
+                    self._prune(connection)
+                    pruned_at = time.monotonic()
+            time.sleep(EVENT_BUS_POLL_INTERVAL)
+
+    def _listen(self):
+        raw = db.engine.raw_connection()
+        try:
+            listener = raw.driver_connection
+            listener.autocommit = True
+            listener.cursor().execute(f'LISTEN {EVENT_BUS_CHANNEL}')
+            pruned_at = time.monotonic()
+            while True:
+                # Read after LISTEN, so nothing published in between is missed
+                with db.engine.connect() as connection:
+                    self._read_new(connection)
+                    if time.monotonic() - pruned_at > 3600:
+                        self._prune(connection)
+                        pruned_at = time.monotonic()
+                if select.select([listener], [], [], EVENT_BUS_LISTEN_TIMEOUT) != ([], [], []):
+                    listener.poll()
+                    listener.notifies.clear()
+        finally:
+            raw.invalidate()
+
+
+event_bus = EventBus()
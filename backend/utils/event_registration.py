@@ -0,0 +1,161 @@
+from sqlalchemy import case, func, or_, update
+
+from ..models.dcsa import DepartmentEvent, EventParticipant
+from ..models.user import db
+
+# Participation states that occupy one of the event's seats
+SEAT_HOLDING = ('pending', 'approved')
+
+# Seat counts are not part of an event's published details, so changing
+# them must not bump updated_at (which drives calendar feed versions)
+_KEEP_UPDATED_AT = {'updated_at': DepartmentEvent.updated_at}
+
+
+def take_seats(event_id, count=1):
+    """Atomically reserve ``count`` seats; return False if the event is full.
+
+    A single conditional UPDATE both checks capacity and increments the
+    counter, so concurrent registrations cannot oversubscribe the event.
+    On PostgreSQL the updated row stays locked until the caller commits;
+    callers should do their other writes first and commit promptly.
+    """
+    result = db.session.execute(
+        update(DepartmentEvent)
+        .where(
+            DepartmentEvent.id == event_id,
+            or_(
+                DepartmentEvent.max_participants.is_(None),
+                DepartmentEvent.seats_taken + count <= DepartmentEvent.max_participants,
+            ),
+        )
+        .values(seats_taken=DepartmentEvent.seats_taken + count, **_KEEP_UPDATED_AT)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def transition(event_id, user_ids, from_status, **values):
+    """Apply ``values`` to the participations still in ``from_status``.
+
+    Returns the user ids that were changed. The status check is part of
+    the UPDATE, so when two requests race to move the same row (two
+    rejects, or a cancel and a reject) only one of them matches and only
+    that one may release or take a seat for it. Cancelled participations
+    are final here: nothing moves out of 'cancelled' (the participant
+    registers again instead), matching what bulk review reports.
+    """
+    if not user_ids or from_status == 'cancelled':
+        return []
+    result = db.session.execute(
+        update(EventParticipant)
+        .where(
+            EventParticipant.event_id == event_id,
+            EventParticipant.user_id.in_(user_ids),
+            EventParticipant.approval_status == from_status,
+        )
+        .values(**values)
+        .returning(EventParticipant.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    return [user_id for (user_id,) in result]
+
+
+def _waitlist(event_id):
+    return (
+        EventParticipant.query
+        .filter_by(event_id=event_id, approval_status='waitlisted')
+        .order_by(EventParticipant.registration_date, EventParticipant.user_id)
+    )
+
+
+def waitlist_position(link):
+    """1-based position of a waitlisted participation, or None."""
+    if link.approval_status != 'waitlisted':
+        return None
+    ahead = (
+        db.session.query(func.count())
+        .select_from(EventParticipant)
+        .filter(
+            EventParticipant.event_id == link.event_id,
+            EventParticipant.approval_status == 'waitlisted',
+            or_(
+                EventParticipant.registration_date < link.registration_date,
+                (EventParticipant.registration_date == link.registration_date)
+                & (EventParticipant.user_id < link.user_id),
+            ),
+        )
+        .scalar()
+    )
+    return ahead + 1
+
+
+def release_seats(event_id, count=1):
+    """Return ``count`` seats to the event and refill them from the waitlist.
+
+    Returns the participations promoted from the waitlist, oldest first.
+    """
+    db.session.execute(
+        update(DepartmentEvent)
+        .where(DepartmentEvent.id == event_id)
+        .values(seats_taken=case(
+            (DepartmentEvent.seats_taken > count, DepartmentEvent.seats_taken - count),
+            else_=0,
+        ), **_KEEP_UPDATED_AT)
+        .execution_options(synchronize_session=False)
+    )
+    return fill_from_waitlist(event_id)
+
+
+def fill_from_waitlist(event_id):
+    """Promote waitlisted participants into any free seats, in FIFO order.
+
+    The event row is locked for the rest of the transaction so concurrent
+    promotions cannot hand out the same seat twice.
+    """
+    event = (
+        DepartmentEvent.query
+        .filter_by(id=event_id)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+    waitlist = _waitlist(event_id)
+    if event.max_participants is not None:
+        free = event.max_participants - event.seats_taken
+        if free <= 0:
+            return []
+        waitlist = waitlist.limit(free)
+
+    promoted = waitlist.with_for_update(skip_locked=True).all()
+    for link in promoted:
+        link.approval_status = 'pending'
+    if promoted:
+        db.session.execute(
+            update(DepartmentEvent)
+            .where(DepartmentEvent.id == event_id)
+            .values(seats_taken=DepartmentEvent.seats_taken + len(promoted), **_KEEP_UPDATED_AT)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.expire(event, ['seats_taken'])
+    return promoted
+
+
+def recount_seats(event_id=None):
+    """Recompute ``seats_taken`` from participation rows.
+
+    Used to backfill the counter for events created before it existed, or
+    to repair it after manual edits.
+    """
+    held = (
+        db.session.query(func.count())
+        .select_from(EventParticipant)
+        .filter(
+            EventParticipant.event_id == DepartmentEvent.id,
+            EventParticipant.approval_status.in_(SEAT_HOLDING),
+        )
+        .scalar_subquery()
+    )
+    statement = update(DepartmentEvent).values(seats_taken=held, **_KEEP_UPDATED_AT)
+    if event_id is not None:
+        statement = statement.where(DepartmentEvent.id == event_id)
+    db.session.execute(statement.execution_options(synchronize_session=False))
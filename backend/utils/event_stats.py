@@ -0,0 +1,94 @@
+from sqlalchemy import func
+
+from ..models.dcsa import DepartmentEvent, EventParticipant
+from ..models.user import db
+
+SERIES_INTERVALS = ('week', 'month')
+
+
+def _event_filters(start=None, end=None, department=None, status=None):
+    filters = []
+    if start:
+        filters.append(DepartmentEvent.start_date >= start)
+    if end:
+        filters.append(DepartmentEvent.start_date < end)
+    if department:
+        filters.append(DepartmentEvent.department == department)
+    if status:
+        filters.append(DepartmentEvent.status == status)
+    return filters
+
+
+def _approved_participants(filters):
+    query = db.session.query(EventParticipant).filter(EventParticipant.approval_status == 'approved')
+    if filters:
+        query = query.join(DepartmentEvent, EventParticipant.event_id == DepartmentEvent.id).filter(*filters)
+    return query
+
+
+def event_statistics(start=None, end=None, department=None, status=None):
+    """Aggregate event and participation counts with grouped queries.
+
+    Filters apply to the event (start date window, department, status);
+    participation counts only include approved participants of matching
+    events.
+    """
+    filters = _event_filters(start, end, department, status)
+
+    events_by_type = dict(
+        db.session.query(DepartmentEvent.event_type, func.count(DepartmentEvent.id))
+        .filter(*filters)
+        .group_by(DepartmentEvent.event_type)
+        .all()
+    )
+
+    participants = _approved_participants(filters)
+    program_counts = dict(
+        participants.with_entities(EventParticipant.program, func.count())
+        .filter(EventParticipant.program.isnot(None), EventParticipant.program != '')
+        .group_by(EventParticipant.program)
+        .all()
+    )
+    department_counts = dict(
+        participants.with_entities(EventParticipant.department, func.count())
+        .filter(EventParticipant.department.isnot(None), EventParticipant.department != '')
+        .group_by(EventParticipant.department)
+        .all()
+    )
+
+    return {
+        'events_by_type': events_by_type,
+        'total_events': sum(events_by_type.values()),
+        'approved_participants': participants.with_entities(func.count()).scalar(),
+        'program_counts': program_counts,
+        'department_counts': department_counts,
+    }
+
+
+def _period_start(column, interval):
+    """SQL expression truncating ``column`` to the start of its week or month."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        if interval == 'month':
+            return func.strftime('%Y-%m-01', column)
+        return func.date(column, '-6 days', 'weekday 1')
+    return func.date(func.date_trunc(interval, column))
+
+
+def participation_series(interval, start=None, end=None, department=None, status=None):
+    """Approved registrations per week or month, oldest period first."""
+    if interval not in SERIES_INTERVALS:
+        raise ValueError(f'interval must be one of {", ".join(SERIES_INTERVALS)}')
+
+    period = _period_start(EventParticipant.registration_date, interval).label('period')
+    rows = (
+        _approved_participants(_event_filters(start, end, department, status))
+        .with_entities(period, func.count())
+        .filter(EventParticipant.registration_date.isnot(None))
+        .group_by(period)
+        .order_by(period)
+        .all()
+    )
+    return [
+        {'period': value.isoformat() if hasattr(value, 'isoformat') else value, 'participants': count}
+        for value, count in rows
+    ]
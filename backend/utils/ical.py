@@ -0,0 +1,139 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Rendered VEVENT blocks kept in memory, keyed by event id
+VEVENT_CACHE_SIZE = 5000
+# Assembled feeds kept in memory, keyed by feed scope
+FEED_CACHE_SIZE = 256
+
+PRODID = '-//DCSA Panjab University//Department Events//EN'
+
+
+def _escape(text):
+    return (str(text)
+            .replace('\\', '\\\\')
+            .replace(';', '\\;')
+            .replace(',', '\\,')
+            .replace('\r\n', '\\n')
+            .replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Fold a content line to 75 octets as RFC 5545 requires."""
+    raw = line.encode('utf-8')
+    if len(raw) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while raw:
+        cut = min(limit, len(raw))
+        # Never split a multi-byte character
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(raw[:cut].decode('utf-8'))
+        raw = raw[cut:]
+        limit = 74
+    return '\r\n '.join(parts)
+
+
+def _timestamp(value):
+    """Format as a UTC DATE-TIME.
+
+    Event dates and updated_at are stored as naive UTC (the event routes
+    convert offsets on input); aware values are converted first.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _render_vevent(event, host):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:dcsa-event-{event.id}@{host}',
+        f'DTSTAMP:{_timestamp(event.updated_at or datetime.utcnow())}',
+        f'DTSTART:{_timestamp(event.start_date)}',
+    ]
+    if event.end_date:
+        lines.append(f'DTEND:{_timestamp(event.end_date)}')
+    if event.updated_at:
+        lines.append(f'LAST-MODIFIED:{_timestamp(event.updated_at)}')
+    lines.append(f'SUMMARY:{_escape(event.title)}')
+    if event.description:
+        lines.append(f'DESCRIPTION:{_escape(event.description)}')
+    if event.venue:
+        lines.append(f'LOCATION:{_escape(event.venue)}')
+    categories = [value for value in (event.event_type, event.department) if value]
+    if categories:
+        lines.append('CATEGORIES:' + ','.join(_escape(value) for value in categories))
+    lines.append('END:VEVENT')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+class _LRU:
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_vevents = _LRU(VEVENT_CACHE_SIZE)
+_feeds = _LRU(FEED_CACHE_SIZE)
+
+
+def vevent(event, host):
+    """VEVENT block for ``event``, re-rendered only when it has changed."""
+    key = (event.id, host)
+    cached = _vevents.get(key)
+    if cached and cached[0] == event.updated_at:
+        return cached[1]
+    text = _render_vevent(event, host)
+    _vevents.set(key, (event.updated_at, text))
+    return text
+
+
+def feed_etag(scope, version):
+    """Strong ETag for a feed scope at a given version tuple."""
+    return hashlib.sha256(repr((scope, version)).encode()).hexdigest()[:32]
+
+
+def build_feed(scope, version, name, load_events, host):
+    """Return the iCalendar text for ``scope``.
+
+    ``version`` must change whenever the feed content could change; while
+    it is unchanged the assembled feed is served from memory and
+    ``load_events`` is not called.
+    """
+    cached = _feeds.get(scope)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    parts = [
+        'BEGIN:VCALENDAR\r\n',
+        'VERSION:2.0\r\n',
+        f'PRODID:{PRODID}\r\n',
+        'CALSCALE:GREGORIAN\r\n',
+        'METHOD:PUBLISH\r\n',
+        _fold(f'X-WR-CALNAME:{_escape(name)}') + '\r\n',
+    ]
+    parts.extend(vevent(event, host) for event in load_events() if event.start_date)
+    parts.append('END:VCALENDAR\r\n')
+    text = ''.join(parts)
+    _feeds.set(scope, (version, text))
+    return text
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models.dcsa import SchedulerLease
+from ..models.user import db
+
+
+def acquire_lease(name, holder, ttl):
+    """Take or renew the ``name`` lease for ``holder``; return True if held.
+
+    A single conditional UPDATE succeeds only if the lease is already
+    ours or has expired, so at most one holder wins however many workers
+    race for it. The first worker to ever ask creates the row. Commits
+    the current session.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    result = db.session.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+        )
+        .values(holder=holder, expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        db.session.commit()
+        return True
+
+    db.session.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def release_lease(name, holder):
+    """Give the lease up early so another worker can take over at once."""
+    db.session.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+        .values(expires_at=datetime.min)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
@@ -0,0 +1,91 @@
+import queue
+import threading
+
+from flask import current_app
+from flask_mail import Message
+
+from .email_service import mail
+
+# Messages sent over one SMTP connection before it is recycled
+NOTIFICATION_BATCH_SIZE = 100
+
+
+class NotificationQueue:
+    """Send notification emails from a background thread in batches.
+
+    Requests enqueue messages and return immediately; a single worker
+    thread per process drains the queue and sends whatever has piled up
+    over one SMTP connection instead of connecting once per message.
+    """
+
+    def __init__(self, batch_size=NOTIFICATION_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, subject, recipient, html):
+        self.enqueue_many([(subject, recipient, html)])
+
+    def enqueue_many(self, notifications):
+        """Queue ``(subject, recipient, html)`` tuples; return how many were queued."""
+        app = current_app._get_current_object()
+        sender = app.config.get('MAIL_DEFAULT_SENDER')
+        count = 0
+        for subject, recipient, html in notifications:
+            if not recipient:
+                continue
+            message = Message(subject, sender=sender, recipients=[recipient])
+            message.html = html
+            self._queue.put((app, message))
+            count += 1
+        if count:
+            self._ensure_worker()
+        return count
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def join(self):
+        """Block until every queued message has been handled."""
+        self._queue.join()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='notification-queue', daemon=True)
+                self._worker.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                by_app = {}
+                for app, message in batch:
+                    by_app.setdefault(app, []).append(message)
+                for app, messages in by_app.items():
+                    self._send(app, messages)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _send(self, app, messages):
+        with app.app_context():
+            try:
+                with mail.connect() as connection:
+                    for message in messages:
+                        connection.send(message)
+            except Exception:
+                app.logger.exception('Failed to send %d notification(s)', len(messages))
+
+
+notification_queue = NotificationQueue()
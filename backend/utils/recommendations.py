@@ -0,0 +1,388 @@
+import json
+import queue
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import bindparam, func, or_
+
+from ..models.dcsa import (
+    Course, Specialization, UserSpecialization,
+    DepartmentEvent, EventParticipant, EventRecommendation
+)
+from ..models.profile import Skill, UserSkill
+from ..models.user import User, db
+
+# Events kept in each user's ranked list
+RECOMMENDATIONS_PER_USER = 20
+# Users scored per matrix block during a rebuild
+RECOMMENDATION_BATCH_SIZE = 1000
+# Upcoming events further out than this get no recency bonus
+RECENCY_HORIZON_DAYS = 60
+
+# Score weights
+W_COURSE = 3.0          # event text mentions the user's programme
+W_PEERS = 2.0           # share of the user's programme already registered
+W_SPECIALIZATION = 2.0  # event text mentions one of the user's specialisations
+W_SKILL = 1.0           # per skill mentioned, up to MAX_SKILL_MATCHES
+W_EVENT_TYPE = 1.5      # share of the user's past events of this type
+W_DEPARTMENT = 1.0      # share of the user's past events from this department
+W_POPULARITY = 0.5      # share of all users registered
+W_RECENCY = 0.5         # sooner events rank slightly higher
+MAX_SKILL_MATCHES = 3
+
+_STOPWORDS = {'and', 'the', 'for', 'with', 'of', 'in', 'on', 'to', 'a', 'an'}
+
+
+
+def _tokens(text):
+    return [token for token in re.findall(r'[a-z0-9+#]+', (text or '').lower()) if token not in _STOPWORDS]
+
+
+def _mentions(phrase_tokens, event_tokens):
+    return bool(phrase_tokens) and all(token in event_tokens for token in phrase_tokens)
+
+
+def _upcoming_events(event_ids=None):
+    query = db.session.query(
+        DepartmentEvent.id, DepartmentEvent.title, DepartmentEvent.description,
+        DepartmentEvent.event_type, DepartmentEvent.department, DepartmentEvent.start_date,
+    ).filter(DepartmentEvent.status == 'approved', DepartmentEvent.start_date > datetime.utcnow())
+    if event_ids is not None:
+        query = query.filter(DepartmentEvent.id.in_(event_ids))
+    return query.order_by(DepartmentEvent.id).all()
+
+
+_ACTIVE_REGISTRATION = EventParticipant.approval_status.notin_(('rejected', 'cancelled'))
+
+
+class _Profiles:
+    """Everything the scorer needs about users, loaded with a few grouped queries.
+
+    ``user_ids`` limits the per-user data to those users, and
+    ``event_ids`` limits registration counts to those events; the
+    department-wide totals are always counted over everyone.
+    """
+
+    def __init__(self, user_ids=None, event_ids=None):
+        students = db.session.query(User.id, User.course_id).filter(User.is_faculty.isnot(True))
+        self.total_users = max(students.order_by(None).count(), 1)
+        self.course_sizes = Counter(dict(
+            db.session.query(User.course_id, func.count())
+            .filter(User.is_faculty.isnot(True), User.course_id.isnot(None))
+            .group_by(User.course_id)
+        ))
+        if user_ids is not None:
+            students = students.filter(User.id.in_(user_ids))
+        self.users = students.order_by(User.id).all()
+        self.course_tokens = {course_id: _tokens(name) for course_id, name in db.session.query(Course.id, Course.name)}
+
+        def for_users(query, column):
+            return query if user_ids is None else query.filter(column.in_(user_ids))
+
+        self.specializations = defaultdict(list)
+        for user_id, name in for_users(db.session.query(UserSpecialization.user_id, Specialization.name)
+                                       .join(Specialization, Specialization.id == UserSpecialization.specialization_id),
+                                       UserSpecialization.user_id):
+            self.specializations[user_id].append(_tokens(name))
+
+        self.skills = defaultdict(list)
+        for user_id, name in for_users(db.session.query(UserSkill.user_id, Skill.name)
+                                       .join(Skill, Skill.id == UserSkill.skill_id), UserSkill.user_id):
+            self.skills[user_id].append(_tokens(name))
+
+        self.registered = defaultdict(set)
+        self.type_counts = defaultdict(Counter)
+        self.department_counts = defaultdict(Counter)
+        history = for_users(db.session.query(EventParticipant.user_id, EventParticipant.event_id,
+                                             DepartmentEvent.event_type, DepartmentEvent.department)
+                            .join(DepartmentEvent, DepartmentEvent.id == EventParticipant.event_id)
+                            .filter(_ACTIVE_REGISTRATION), EventParticipant.user_id)
+        for user_id, event_id, event_type, department in history:
+            self.registered[user_id].add(event_id)
+            if event_type:
+                self.type_counts[user_id][event_type] += 1
+            if department:
+                self.department_counts[user_id][department] += 1
+
+        self.event_registrations = Counter()
+        self.course_registrations = Counter()
+        registrations = (db.session.query(EventParticipant.event_id, User.course_id, func.count())
+                         .join(User, User.id == EventParticipant.user_id)
+                         .filter(_ACTIVE_REGISTRATION)
+                         .group_by(EventParticipant.event_id, User.course_id))
+        if event_ids is not None:
+            registrations = registrations.filter(EventParticipant.event_id.in_(event_ids))
+        for event_id, course_id, count in registrations:
+            self.event_registrations[event_id] += count
+            if course_id:
+                self.course_registrations[course_id, event_id] += count
+
+
+def _score(profiles, users, events):
+    """Score matrix of ``users`` x ``events``; already-registered pairs are -inf."""
+    now = datetime.utcnow()
+    event_tokens = [set(_tokens(f'{event.title} {event.description}')) for event in events]
+    columns = {event.id: column for column, event in enumerate(events)}
+    total_users = profiles.total_users
+
+    shared = np.array([
+        W_POPULARITY * profiles.event_registrations[event.id] / total_users
+        + W_RECENCY * max(0.0, 1 - (event.start_date - now).days / RECENCY_HORIZON_DAYS)
+        for event in events
+    ], dtype=np.float32)
+
+    # Programme and specialisation rows are computed once and shared by
+    # every user with that programme or specialisation
+    course_rows = {}
+    for _, course_id in users:
+        if course_id and course_id not in course_rows:
+            tokens = profiles.course_tokens.get(course_id, [])
+            size = max(profiles.course_sizes[course_id], 1)
+            course_rows[course_id] = np.array([
+                W_COURSE * _mentions(tokens, event_tokens[column])
+                + W_PEERS * profiles.course_registrations[course_id, event.id] / size
+                for column, event in enumerate(events)
+            ], dtype=np.float32)
+    phrase_rows = {}
+
+    def phrase_row(tokens):
+        key = tuple(tokens)
+        if key not in phrase_rows:
+            phrase_rows[key] = np.array([_mentions(tokens, tokens_) for tokens_ in event_tokens], dtype=np.float32)
+        return phrase_rows[key]
+
+    types = np.array([event.event_type for event in events], dtype=object)
+    departments = np.array([event.department for event in events], dtype=object)
+
+    scores = np.tile(shared, (len(users), 1))
+    for row, (user_id, course_id) in enumerate(users):
+        if course_id in course_rows:
+            scores[row] += course_rows[course_id]
+        specializations = profiles.specializations.get(user_id)
+        if specializations:
+            scores[row] += W_SPECIALIZATION * np.max([phrase_row(tokens) for tokens in specializations], axis=0)
+        skills = profiles.skills.get(user_id)
+        if skills:
+            matches = np.sum([phrase_row(tokens) for tokens in skills], axis=0)
+            scores[row] += W_SKILL * np.minimum(matches, MAX_SKILL_MATCHES)
+        type_counts = profiles.type_counts.get(user_id)
+        if type_counts:
+            total = sum(type_counts.values())
+            scores[row] += W_EVENT_TYPE * np.array([type_counts.get(value, 0) for value in types]) / total
+        department_counts = profiles.department_counts.get(user_id)
+        if department_counts:
+            total = sum(department_counts.values())
+            scores[row] += W_DEPARTMENT * np.array([department_counts.get(value, 0) for value in departments]) / total
+        for event_id in profiles.registered.get(user_id, ()):
+            if event_id in columns:
+                scores[row, columns[event_id]] = -np.inf
+    return scores
+
+
+def _top(scores_row, events, limit=RECOMMENDATIONS_PER_USER):
+    candidates = np.flatnonzero(np.isfinite(scores_row) & (scores_row > 0))
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-scores_row[candidates], limit - 1)[:limit]]
+    ordered = candidates[np.argsort(-scores_row[candidates], kind='stable')]
+    return [
+        [events[column].id, round(float(scores_row[column]), 3), int(events[column].start_date.timestamp())]
+        for column in ordered
+    ]
+
+
+def rebuild_recommendations(batch_size=RECOMMENDATION_BATCH_SIZE):
+    """Recompute every user's ranked list; return the number of users written."""
+    profiles = _Profiles()
+    events = _upcoming_events()
+    now = datetime.utcnow()
+    written = 0
+
+    db.session.query(EventRecommendation).delete(synchronize_session=False)
+    for offset in range(0, len(profiles.users), batch_size):
+        users = profiles.users[offset:offset + batch_size]
+        scores = _score(profiles, users, events) if events else np.zeros((len(users), 0), dtype=np.float32)
+        db.session.execute(EventRecommendation.__table__.insert(), [
+            {'user_id': user_id, 'ranked': json.dumps(_top(scores[row], events)), 'computed_at': now}
+            for row, (user_id, _) in enumerate(users)
+        ])
+        written += len(users)
+    db.session.commit()
+    return written
+
+
+def _affected_users(event):
+    """Students whose score for ``event`` has a term of their own.
+
+    That is anyone whose programme or a specialisation or skill is
+    mentioned in the event text, whose programme has peers registered
+    for it, or who has been to events of its type or department. Every
+    other student would score it on popularity and recency alone, which
+    the periodic rebuild picks up.
+    """
+    event_tokens = set(_tokens(f'{event.title} {event.description}'))
+    mentioned_courses = [course_id for course_id, name in db.session.query(Course.id, Course.name)
+                         if _mentions(_tokens(name), event_tokens)]
+    mentioned_specializations = [specialization_id for specialization_id, name
+                                 in db.session.query(Specialization.id, Specialization.name)
+                                 if _mentions(_tokens(name), event_tokens)]
+    mentioned_skills = [skill_id for skill_id, name in db.session.query(Skill.id, Skill.name)
+                        if _mentions(_tokens(name), event_tokens)]
+    peer_courses = (db.session.query(User.course_id)
+                    .join(EventParticipant, EventParticipant.user_id == User.id)
+                    .filter(EventParticipant.event_id == event.id, _ACTIVE_REGISTRATION))
+
+    history = [criterion for criterion in (
+        DepartmentEvent.event_type == event.event_type if event.event_type else None,
+        DepartmentEvent.department == event.department if event.department else None,
+    ) if criterion is not None]
+
+    users = set()
+    users.update(user_id for (user_id,) in db.session.query(User.id).filter(
+        or_(User.course_id.in_(mentioned_courses), User.course_id.in_(peer_courses))))
+    if mentioned_specializations:
+        users.update(user_id for (user_id,) in db.session.query(UserSpecialization.user_id)
+                     .filter(UserSpecialization.specialization_id.in_(mentioned_specializations)))
+    if mentioned_skills:
+        users.update(user_id for (user_id,) in db.session.query(UserSkill.user_id)
+                     .filter(UserSkill.skill_id.in_(mentioned_skills)))
+    if history:
+        users.update(user_id for (user_id,) in db.session.query(EventParticipant.user_id)
+                     .join(DepartmentEvent, DepartmentEvent.id == EventParticipant.event_id)
+                     .filter(_ACTIVE_REGISTRATION, or_(*history)))
+    return users
+
+
+def _lists_with_event(event_id):
+    # Lists are JSON [[event_id, score, start], ...]; match the entry's opening
+    return EventRecommendation.ranked.like(f'%[{event_id}, %')
+
+
+def refresh_event(event_id):
+    """Fold one newly approved (or withdrawn) event into the stored lists.
+
+    Only this event's column is scored, and only for the lists that
+    already hold it and the students ``_affected_users`` finds; changed
+    lists are rewritten in one executemany UPDATE. Returns the number of
+    lists updated.
+    """
+    events = _upcoming_events([event_id])
+    user_ids = set(user_id for (user_id,) in
+                   db.session.query(EventRecommendation.user_id).filter(_lists_with_event(event_id)))
+    if events:
+        user_ids |= _affected_users(events[0])
+    if not user_ids:
+        return 0
+    stored = dict(db.session.query(EventRecommendation.user_id, EventRecommendation.ranked)
+                  .filter(EventRecommendation.user_id.in_(user_ids)))
+
+    new_entries = {}
+    if events:
+        profiles = _Profiles(user_ids=user_ids, event_ids=[event_id])
+        scores = _score(profiles, profiles.users, events)
+        for row, (user_id, _) in enumerate(profiles.users):
+            entry = _top(scores[row], events)
+            if entry:
+                new_entries[user_id] = entry[0]
+
+    updates, inserts = [], []
+    for user_id in set(stored) | set(new_entries):
+        ranked = [item for item in json.loads(stored.get(user_id, '[]')) if item[0] != event_id]
+        if user_id in new_entries:
+            ranked.append(new_entries[user_id])
+            ranked.sort(key=lambda item: -item[1])
+            ranked = ranked[:RECOMMENDATIONS_PER_USER]
+        payload = json.dumps(ranked)
+        if user_id not in stored:
+            inserts.append({'user_id': user_id, 'ranked': payload, 'computed_at': datetime.utcnow()})
+        elif payload != stored[user_id]:
+            updates.append({'u_id': user_id, 'ranked': payload})
+
+    if updates:
+        table = EventRecommendation.__table__
+        db.session.execute(
+            table.update().where(table.c.user_id == bindparam('u_id')).values(ranked=bindparam('ranked')),
+            updates,
+        )
+    if inserts:
+        db.session.execute(EventRecommendation.__table__.insert(), inserts)
+    db.session.commit()
+    return len(updates) + len(inserts)
+
+
+class RefreshQueue:
+    """Run ``refresh_event`` for moderated events on one background thread.
+
+    Refreshes rewrite whole lists, so they must not interleave; a single
+    worker per process drains the queue in order, and an event queued
+    again before its turn is refreshed once.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, event_id):
+        app = current_app._get_current_object()
+        with self._lock:
+            if event_id in self._queued:
+                return
+            self._queued.add(event_id)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='recommendation-refresh', daemon=True)
+                self._worker.start()
+        self._queue.put((app, event_id))
+
+    def join(self):
+        """Block until every queued refresh has run."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            app, event_id = self._queue.get()
+            with self._lock:
+                self._queued.discard(event_id)
+            with app.app_context():
+                try:
+                    refresh_event(event_id)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Failed to refresh recommendations for event %s', event_id)
+                finally:
+                    db.session.remove()
+                    self._queue.task_done()
+
+
+refresh_queue = RefreshQueue()
+
+
+def refresh_event_in_background(event_id):
+    """Queue ``refresh_event`` to run off the request thread after a moderation."""
+    refresh_queue.enqueue(event_id)
+
+
+def drop_recommendation(user_id, event_id):
+    """Remove ``event_id`` from a user's stored list once they register for it."""
+    ranked = (db.session.query(EventRecommendation.ranked)
+              .filter(EventRecommendation.user_id == user_id, _lists_with_event(event_id))
+              .scalar())
+    if ranked is None:
+        return
+    db.session.query(EventRecommendation).filter_by(user_id=user_id).update(
+        {'ranked': json.dumps([item for item in json.loads(ranked) if item[0] != event_id])},
+        synchronize_session=False,
+    )
+
+
+def recommended_for(user_id, limit=RECOMMENDATIONS_PER_USER):
+    """Ranked ``[event_id, score]`` pairs for a user, skipping events already started."""
+    ranked = db.session.query(EventRecommendation.ranked).filter_by(user_id=user_id).scalar()
+    if not ranked:
+        return []
+    now = datetime.utcnow().timestamp()
+    return [(event_id, score) for event_id, score, starts in json.loads(ranked) if starts > now][:limit]
@@ -0,0 +1,221 @@
+import atexit
+import heapq
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from markupsafe import escape
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+
+from ..models.dcsa import DepartmentEvent, EventParticipant, EventReminderLog
+from ..models.user import User, db
+from .leases import acquire_lease, release_lease
+from .notifications import notification_queue
+from .scheduling import FULL_RELOAD_INTERVAL, changed_since
+
+# How long before an event's start each reminder goes out, largest first
+REMINDER_OFFSETS = (timedelta(hours=24), timedelta(hours=1))
+
+LEASE_NAME = 'event-reminders'
+# Seconds a scheduler lease lasts without renewal
+LEASE_TTL = 60
+# Seconds between lease renewals and polls for changed events
+POLL_INTERVAL = 15
+
+
+def _offset_minutes(offset):
+    return int(offset.total_seconds() // 60)
+
+
+def _time_left(start_date, now):
+    minutes = max(0, round((start_date - now).total_seconds() / 60))
+    if minutes >= 60:
+        hours = round(minutes / 60)
+        return f'in {hours} hour{"s" if hours != 1 else ""}'
+    if minutes:
+        return f'in {minutes} minute{"s" if minutes != 1 else ""}'
+    return 'now'
+
+
+def _reminder_email(title, start_date, name, now):
+    # A reminder can go out late (the event was approved or moved inside
+    # the offset), so say how long is actually left
+    return (
+        f'<p>Hi {escape(name or "there")},</p>'
+        f'<p>This is a reminder that <strong>{escape(title)}</strong> starts {_time_left(start_date, now)}, '
+        f'at {start_date:%d %b %Y %H:%M} UTC.</p>'
+    )
+
+
+class ReminderScheduler:
+    """Send participant reminders ahead of approved events.
+
+    Runs in a process of its own (backend/scripts/run_reminders.py), never
+    in web workers. Only the holder of the ``event-reminders`` lease
+    schedules anything, so a second copy (another deployment instance)
+    stays idle until the first one goes away. The leader keeps a heap
+    of (fire time, event) entries: it loads all upcoming approved events
+    when it takes over (and again every FULL_RELOAD_INTERVAL), then polls
+    for events whose updated_at moved, re-reading the CHANGE_OVERLAP
+    window behind the watermark, and pushes fresh entries for them.
+    Entries made stale by a reschedule are skipped when popped. Sent
+    reminders are recorded in EventReminderLog first, so a crash,
+    failover or reload never sends one twice.
+    """
+
+    def __init__(self, offsets=REMINDER_OFFSETS):
+        self.offsets = tuple(sorted(offsets, reverse=True))
+        self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._heap = []
+        self._starts = {}
+        self._watermark = None
+        self._loaded_at = None
+        self._leader = False
+        self._condition = threading.Condition()
+
+    def run(self, app):
+        """Run the scheduler loop in this thread until the process exits."""
+        atexit.register(self._step_down, app)
+        self._run(app)
+
+    def _schedule(self, event_id, start_date, status):
+        if status != 'approved' or start_date is None or start_date <= datetime.utcnow():
+            self._starts.pop(event_id, None)
+            return
+        if self._starts.get(event_id) == start_date:
+            return
+        self._starts[event_id] = start_date
+        for offset in self.offsets:
+            heapq.heappush(self._heap, (start_date - offset, event_id, start_date, offset))
+
+    def _load(self):
+        """Rebuild the heap from scratch after winning the lease."""
+        self._watermark = db.session.query(func.max(DepartmentEvent.updated_at)).scalar() or datetime.min
+        rows = (
+            db.session.query(DepartmentEvent.id, DepartmentEvent.start_date, DepartmentEvent.status)
+            .filter(DepartmentEvent.status == 'approved', DepartmentEvent.start_date > datetime.utcnow())
+            .all()
+        )
+        with self._condition:
+            self._heap, self._starts = [], {}
+            for row in rows:
+                self._schedule(*row)
+        self._loaded_at = datetime.utcnow()
+
+    def _poll_changes(self):
+        rows = (
+            db.session.query(
+                DepartmentEvent.id, DepartmentEvent.start_date, DepartmentEvent.status, DepartmentEvent.updated_at
+            )
+            .filter(DepartmentEvent.updated_at >= changed_since(self._watermark))
+            .all()
+        )
+        with self._condition:
+            for event_id, start_date, status, updated_at in rows:
+                self._schedule(event_id, start_date, status)
+                self._watermark = max(self._watermark, updated_at)
+
+    def _pop_due(self, now):
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                _, event_id, start_date, offset = heapq.heappop(self._heap)
+                if self._starts.get(event_id) == start_date:
+                    due.append((event_id, start_date, offset))
+        return due
+
+    def _send(self, event_id, start_date, offset, now):
+        # A late 24 h reminder is pointless once the 1 h one is due as well
+        if any(smaller < offset and start_date - now <= smaller for smaller in self.offsets):
+            return 0
+
+        minutes = _offset_minutes(offset)
+        already_sent = (
+            db.session.query(EventReminderLog.user_id)
+            .filter(
+                EventReminderLog.event_id == event_id,
+                EventReminderLog.offset_minutes == minutes,
+            )
+        )
+        recipients = (
+            db.session.query(User.id, User.email, User.full_name, DepartmentEvent.title)
+            .join(EventParticipant, EventParticipant.user_id == User.id)
+            .join(DepartmentEvent, DepartmentEvent.id == EventParticipant.event_id)
+            .filter(
+                EventParticipant.event_id == event_id,
+                EventParticipant.approval_status == 'approved',
+                EventParticipant.user_id.notin_(already_sent),
+            )
+            .all()
+        )
+        if not recipients:
+            return 0
+
+        try:
+            db.session.execute(insert(EventReminderLog), [
+                {'event_id': event_id, 'user_id': user_id, 'offset_minutes': minutes, 'sent_at': now}
+                for user_id, _, _, _ in recipients
+            ])
+            db.session.commit()
+        except IntegrityError:
+            # Someone else sent this batch while we held a stale lease
+            db.session.rollback()
+            return 0
+
+        return notification_queue.enqueue_many(
+            (f'Reminder: {title}', email, _reminder_email(title, start_date, name, now))
+            for _, email, name, title in recipients
+        )
+
+    def _tick(self):
+        leader = acquire_lease(LEASE_NAME, self.holder, LEASE_TTL)
+        if not leader:
+            with self._condition:
+                self._leader, self._heap, self._starts = False, [], {}
+            return POLL_INTERVAL
+
+        if not self._leader:
+            self._load()
+            with self._condition:
+                self._leader = True
+        elif datetime.utcnow() - self._loaded_at >= FULL_RELOAD_INTERVAL:
+            # Sent reminders are in EventReminderLog, so reloading never repeats one
+            self._load()
+        else:
+            self._poll_changes()
+
+        now = datetime.utcnow()
+        for event_id, start_date, offset in self._pop_due(now):
+            self._send(event_id, start_date, offset, now)
+
+        with self._condition:
+            if not self._heap:
+                return POLL_INTERVAL
+            return max(0, min(POLL_INTERVAL, (self._heap[0][0] - datetime.utcnow()).total_seconds()))
+
+    def _run(self, app):
+        while True:
+            with app.app_context():
+                try:
+                    timeout = self._tick()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Event reminder scheduler tick failed')
+                    timeout = POLL_INTERVAL
+            with self._condition:
+                self._condition.wait(timeout)
+
+    def _step_down(self, app):
+        if not self._leader:
+            return
+        with app.app_context():
+            try:
+                release_lease(LEASE_NAME, self.holder)
+            except Exception:
+                pass
+
+
+reminder_scheduler = ReminderScheduler()
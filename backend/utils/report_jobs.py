@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models.dcsa import ReportJob
+from ..models.user import db
+from .department_report import generate_report
+
+# How long a claim lasts without renewal before another runner may take the job over
+JOB_TIMEOUT = timedelta(minutes=30)
+# Seconds between claim renewals while a report is being generated
+HEARTBEAT_INTERVAL = JOB_TIMEOUT.total_seconds() / 3
+# Seconds between polls for queued reports
+POLL_INTERVAL = 5
+
+
+def _active(now):
+    """Jobs that block a new request: queued, or running within their claim."""
+    return or_(
+        ReportJob.status == 'queued',
+        and_(ReportJob.status == 'running', ReportJob.claim_expires_at >= now),
+    )
+
+
+def request_report(year, sections):
+    """Queue the ``year`` report; return False if one is already queued or running.
+
+    Same shape as acquire_lease: a conditional UPDATE re-queues a finished
+    or abandoned job, and the first request for a year inserts its row.
+    """
+    now = datetime.utcnow()
+    values = dict(status='queued', sections=json.dumps(sections), requested_at=now,
+                  started_at=None, finished_at=None, claim_expires_at=None, claim_token=None,
+                  manifest=None, error=None)
+    result = db.session.execute(
+        update(ReportJob)
+        .where(ReportJob.year == year, ~_active(now))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        db.session.commit()
+        return True
+
+    db.session.add(ReportJob(year=year, **values))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def claim_next():
+    """Move the oldest queued (or abandoned) job to running; return it or None.
+
+    The job's new ``claim_token`` identifies this run: ``renew`` and
+    ``finish`` only act while the token still holds the claim.
+    """
+    now = datetime.utcnow()
+    waiting = or_(
+        ReportJob.status == 'queued',
+        and_(ReportJob.status == 'running', ReportJob.claim_expires_at < now),
+    )
+    years = [year for (year,) in db.session.query(ReportJob.year).filter(waiting).order_by(ReportJob.requested_at)]
+    for year in years:
+        result = db.session.execute(
+            update(ReportJob)
+            .where(ReportJob.year == year, waiting)
+            .values(status='running', started_at=now, claim_expires_at=now + JOB_TIMEOUT,
+                    claim_token=uuid.uuid4().hex)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return db.session.get(ReportJob, year)
+    return None
+
+
+def _holding(year, token):
+    return and_(ReportJob.year == year, ReportJob.status == 'running', ReportJob.claim_token == token)
+
+
+def renew(year, token):
+    """Extend a running claim; return False if another runner has taken the job over."""
+    result = db.session.execute(
+        update(ReportJob)
+        .where(_holding(year, token))
+        .values(claim_expires_at=datetime.utcnow() + JOB_TIMEOUT)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def finish(year, token, manifest=None, error=None):
+    """Record the outcome of the run holding ``token``; return False if it lost the claim."""
+    result = db.session.execute(
+        update(ReportJob)
+        .where(_holding(year, token))
+        .values(
+            status='failed' if error else 'completed',
+            finished_at=datetime.utcnow(),
+            claim_expires_at=None,
+            claim_token=None,
+            manifest=json.dumps(manifest) if manifest is not None else None,
+            error=error,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _heartbeat(app, year, token, stop):
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        with app.app_context():
+            try:
+                if not renew(year, token):
+                    return
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Renewing the claim on the %s report failed', year)
+
+
+def serialize(job):
+    return {
+        'year': job.year,
+        'status': job.status,
+        'sections': json.loads(job.sections),
+        'requested_at': job.requested_at.isoformat() if job.requested_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'manifest': json.loads(job.manifest) if job.manifest else None,
+        'error': job.error,
+    }
+
+
+def run(app):
+    """Generate queued reports one at a time until the process exits.
+
+    Runs in a process of its own (backend/scripts/run_report_jobs.py), so
+    the section worker pool is never forked from a web worker.
+    """
+    while True:
+        with app.app_context():
+            try:
+                job = claim_next()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Claiming a report job failed')
+                job = None
+            if job is None:
+                db.session.remove()
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            year, token, sections = job.year, job.claim_token, json.loads(job.sections)
+            # Keep the claim alive so a long report is not taken over mid-run
+            stop = threading.Event()
+            threading.Thread(target=_heartbeat, args=(app, year, token, stop),
+                             name=f'report-{year}-heartbeat', daemon=True).start()
+            try:
+                manifest = generate_report(
+                    app.config['SQLALCHEMY_DATABASE_URI'], year,
+                    os.path.join(app.config['REPORTS_DIR'], str(year)), sections,
+                )
+            except Exception as e:
+                app.logger.exception('Generating the %s report failed', year)
+                outcome = {'error': str(e)}
+            else:
+                outcome = {'manifest': manifest}
+            finally:
+                stop.set()
+            if not finish(year, token, **outcome):
+                app.logger.warning('The %s report was taken over by another runner; dropping this result', year)
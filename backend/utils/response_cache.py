@@ -0,0 +1,250 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, request
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.dcsa import CacheGeneration
+from ..models.user import db
+
+# Tables whose writes invalidate cached responses, mapped to cache tags.
+# Tables not listed here use their own name as the tag.
+TABLE_TAGS = {
+    'user': 'users',
+    'users': 'users',
+    'course': 'courses',
+    'user_specializations': 'users',
+    'research_publication': 'publications',
+    'achievement': 'achievements',
+    'department_event': 'events',
+    'event_participants': 'events',
+    'semester_record': 'results',
+    'subject_record': 'results',
+}
+
+_UPSERT_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+# Tags some view caches under; writes to other tables bump nothing
+_CACHED_TAGS = set()
+
+
+class _Entry:
+    __slots__ = ('body', 'status', 'mimetype', 'etag', 'expires_at', 'tags', 'generation')
+
+    def __init__(self, body, status, mimetype, etag, expires_at, tags, generation):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = etag
+        self.expires_at = expires_at
+        self.tags = tags
+        self.generation = generation
+
+
+class ResponseCache:
+    """Per-process cache for read-mostly JSON endpoints, invalidated
+    across processes.
+
+    Entries are keyed by endpoint, view arguments and normalized query
+    arguments, and remember the generation of their tags (counters in
+    the cache_generation table) at the time they were computed. A
+    lookup first reads the current generations in one query and only
+    serves an entry whose generations still match, so a write committed
+    through any worker invalidates every worker's copy. Committed
+    session writes bump the generations of the tags mapped to the
+    tables they touch, including Core and bulk INSERT/UPDATE/DELETE
+    statements run through the session. Entries also expire after a
+    TTL, which bounds staleness for writes made outside this app.
+    Every cached response carries a strong ETag, so a matching
+    ``If-None-Match`` is answered with 304 before the view runs.
+    """
+
+    def __init__(self, app=None):
+        self._entries = {}
+        self._by_tag = {}
+        self._lock = threading.Lock()
+        self.default_ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.default_ttl = app.config.get('RESPONSE_CACHE_TTL', self.default_ttl)
+        if not event.contains(Session, 'after_flush', _collect_written_tags):
+            event.listen(Session, 'after_flush', _collect_written_tags)
+            event.listen(Session, 'do_orm_execute', _collect_statement_tags)
+            event.listen(Session, 'after_commit', _invalidate_written_tags)
+        app.extensions['response_cache'] = self
+
+    def generation(self, tags):
+        """Current shared generation of ``tags``, read from the database."""
+        with db.session.no_autoflush:
+            rows = dict(db.session.execute(
+                select(CacheGeneration.tag, CacheGeneration.generation).where(CacheGeneration.tag.in_(tags))
+            ).all())
+        return tuple(rows.get(tag, 0) for tag in tags)
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.generation != generation or entry.expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            return entry
+
+    def set(self, key, body, status, mimetype, tags, generation, ttl=None):
+        """Store a response body computed while ``tags`` were at ``generation``.
+
+        ``generation`` must be read before the data the body was built
+        from, so a write that lands in between leaves the entry stale.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        entry = _Entry(body, status, mimetype, etag, time.monotonic() + ttl, frozenset(tags), generation)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+        return entry
+
+    def invalidate(self, *tags):
+        """Bump the shared generation of ``tags`` and drop this process's entries for them.
+
+        Runs in a short transaction of its own, after the write it
+        follows has committed.
+        """
+        tags = sorted(set(tags))
+        if not tags:
+            return
+        with db.engine.begin() as connection:
+            _bump_generations(connection, tags)
+        with self._lock:
+            for tag in tags:
+                for key in self._by_tag.pop(tag, ()):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+
+def _bump_generations(connection, tags):
+    dialect = connection.dialect.name
+    if dialect in _UPSERT_INSERTS:
+        statement = _UPSERT_INSERTS[dialect](CacheGeneration).values([{'tag': tag, 'generation': 1} for tag in tags])
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['tag'],
+            set_={'generation': CacheGeneration.generation + 1},
+        ))
+        return
+    connection.execute(
+        update(CacheGeneration).where(CacheGeneration.tag.in_(tags))
+        .values(generation=CacheGeneration.generation + 1)
+    )
+    existing = set(connection.execute(select(CacheGeneration.tag).where(CacheGeneration.tag.in_(tags))).scalars())
+    for tag in tags:
+        if tag not in existing:
+            try:
+                with connection.begin_nested():
+                    connection.execute(CacheGeneration.__table__.insert().values(tag=tag, generation=1))
+            except IntegrityError:
+                # Created by a concurrent invalidation, which also moved it past 0
+                pass
+
+
+response_cache = ResponseCache()
+
+
+def request_cache_key():
+    """Build a cache key from the current endpoint and its arguments.
+
+    Query arguments are sorted by name and value so that ``?a=1&b=2``
+    and ``?b=2&a=1`` share an entry.
+    """
+    view_args = tuple(sorted((request.view_args or {}).items()))
+    query_args = tuple(sorted((name, tuple(sorted(values))) for name, values in request.args.lists()))
+    return (request.endpoint, view_args, query_args)
+
+
+def _conditional_response(entry):
+    response = Response(entry.body, status=entry.status, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+def watch_tags(*tags):
+    """Have committed writes bump the shared generation of ``tags``."""
+    _CACHED_TAGS.update(tags)
+
+
+def cached_response(*tags, ttl=None):
+    """Cache a view's successful responses under the given invalidation tags."""
+    watch_tags(*tags)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache', response_cache)
+            key = request_cache_key()
+
+            generation = cache.generation(tags)
+            entry = cache.get(key, generation)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry = cache.set(
+                    key, response.get_data(), response.status_code, response.mimetype, tags,
+                    generation, ttl=ttl,
+                )
+
+            return _conditional_response(entry)
+        return wrapper
+    return decorator
+
+
+def _collect_written_tags(session, flush_context):
+    tags = session.info.setdefault('response_cache_tags', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(type(obj), '__table__', None)
+        if table is not None:
+            tags.add(TABLE_TAGS.get(table.name, table.name))
+
+
+def _collect_statement_tags(orm_execute_state):
+    # Bulk and Core DML run through the session never show up in its
+    # new/dirty/deleted sets
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    name = getattr(table, 'name', None)
+    if name:
+        tags = orm_execute_state.session.info.setdefault('response_cache_tags', set())
+        tags.add(TABLE_TAGS.get(name, name))
+
+
+def _invalidate_written_tags(session):
+    tags = session.info.pop('response_cache_tags', set()) & _CACHED_TAGS
+    if tags:
+        response_cache.invalidate(*tags)
@@ -0,0 +1,401 @@
+import csv
+from itertools import islice
+
+import numpy as np
+from sqlalchemy import bindparam, insert, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..models.student import SemesterRecord, StudentProfile, SubjectRecord
+from ..models.user import db
+from .response_cache import response_cache
+
+# CSV rows validated and written per round trip
+RESULTS_IMPORT_CHUNK = 1000
+# Per-row errors returned in full; the rest are only counted
+MAX_REPORTED_ERRORS = 500
+# Rows per executemany when writing recomputed results
+RESULTS_UPDATE_BATCH = 1000
+
+# Histogram buckets per marks column in subject analytics
+ANALYTICS_BINS = 10
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# Ten-point grade scale; F and AB (absent) are fails and leave a backlog
+GRADE_POINTS = {'O': 10, 'A+': 9, 'A': 8, 'B+': 7, 'B': 6, 'C': 5, 'P': 4, 'F': 0, 'AB': 0}
+FAILING_GRADES = {'F', 'AB'}
+
+REQUIRED_COLUMNS = ('roll_number', 'semester_number', 'subject_code', 'subject_name', 'credits', 'grade')
+MARK_COLUMNS = ('internal_marks', 'external_marks', 'total_marks')
+
+_subjects = SubjectRecord.__table__
+_semesters = SemesterRecord.__table__
+_KEY = ('semester_record_id', 'subject_code')
+_UPSERT_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+
+def _number(value, cast):
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f'{value!r} is not a number')
+
+
+def _validate(row, roll_numbers):
+    """Return ``(record, None)`` for a good row or ``(None, error)``."""
+    roll_number = (row.get('roll_number') or '').strip()
+    subject_code = (row.get('subject_code') or '').strip().upper()
+    subject_name = (row.get('subject_name') or '').strip()
+    grade = (row.get('grade') or '').strip().upper()
+
+    if roll_number not in roll_numbers:
+        return None, f'Unknown roll number {roll_number!r}'
+    if not subject_code or len(subject_code) > 20:
+        return None, 'subject_code is required and must be at most 20 characters'
+    if not subject_name or len(subject_name) > 200:
+        return None, 'subject_name is required and must be at most 200 characters'
+    if grade not in GRADE_POINTS:
+        return None, f"grade must be one of {', '.join(GRADE_POINTS)}"
+    try:
+        semester_number = _number(row.get('semester_number'), int)
+        credits = _number(row.get('credits'), int)
+        marks = {name: _number(row.get(name), float) for name in MARK_COLUMNS}
+    except ValueError as e:
+        return None, str(e)
+    if not semester_number or semester_number < 1:
+        return None, 'semester_number must be a positive whole number'
+    if credits is None or credits < 0:
+        return None, 'credits must be a whole number of at least 0'
+
+    result_status = (row.get('result_status') or '').strip().title()
+    if not result_status:
+        result_status = 'Absent' if grade == 'AB' else 'Fail' if grade in FAILING_GRADES else 'Pass'
+    return {
+        'student_profile_id': roll_numbers[roll_number],
+        'semester_number': semester_number,
+        'subject_code': subject_code,
+        'subject_name': subject_name,
+        'credits': credits,
+        'grade': grade,
+        'is_backlog': grade in FAILING_GRADES,
+        'result_status': result_status,
+        **marks,
+    }, None
+
+
+def _semester_ids(keys):
+    """``{(student_profile_id, semester_number): SemesterRecord.id}``, creating missing semesters."""
+    def load():
+        return {
+            (student_profile_id, number): semester_id
+            for semester_id, student_profile_id, number in db.session.execute(
+                _semesters.select()
+                .with_only_columns(_semesters.c.id, _semesters.c.student_profile_id, _semesters.c.semester_number)
+                .where(tuple_(_semesters.c.student_profile_id, _semesters.c.semester_number).in_(keys))
+                .order_by(_semesters.c.id.desc())
+            )
+        }
+
+    ids = load()
+    missing = [key for key in keys if key not in ids]
+    if missing:
+        # Created without dates, so no attendance falls in them and the
+        # attendance aggregates need no rebuild
+        db.session.execute(insert(_semesters), [
+            {'student_profile_id': student_profile_id, 'semester_number': number, 'backlog_subjects': 0}
+            for student_profile_id, number in missing
+        ])
+        ids = load()
+    return ids
+
+
+def _upsert(records):
+    """Insert subject results or overwrite the ones already stored for that semester."""
+    columns = [name for name in records[0] if name not in _KEY]
+    dialect = db.session.get_bind().dialect.name
+    if dialect in _UPSERT_INSERTS:
+        statement = _UPSERT_INSERTS[dialect](_subjects)
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(_KEY),
+                set_={name: statement.excluded[name] for name in columns},
+            ),
+            records,
+        )
+        return
+
+    keys = [tuple(record[name] for name in _KEY) for record in records]
+    existing = {
+        (semester_record_id, subject_code): subject_id
+        for subject_id, semester_record_id, subject_code in db.session.execute(
+            _subjects.select()
+            .with_only_columns(_subjects.c.id, _subjects.c.semester_record_id, _subjects.c.subject_code)
+            .where(tuple_(_subjects.c.semester_record_id, _subjects.c.subject_code).in_(keys))
+        )
+    }
+    updates = [{'subject_id': existing[key], **record} for key, record in zip(keys, records) if key in existing]
+    inserts = [record for key, record in zip(keys, records) if key not in existing]
+    if updates:
+        db.session.execute(
+            update(_subjects).where(_subjects.c.id == bindparam('subject_id'))
+            .values({name: bindparam(name) for name in columns}),
+            [{name: row[name] for name in ('subject_id', *columns)} for row in updates],
+        )
+    if inserts:
+        db.session.execute(insert(_subjects), inserts)
+
+
+def import_results_csv(lines, chunk_size=RESULTS_IMPORT_CHUNK):
+    """Stream subject results for a cohort from CSV text into SubjectRecord.
+
+    The header must name roll_number, semester_number, subject_code,
+    subject_name, credits and grade; internal_marks, external_marks,
+    total_marks and result_status are optional. Semester records are
+    created as needed. A result for a subject already recorded in that
+    semester is overwritten, so a corrected sheet can be imported again.
+    Each chunk commits on its own, then SGPA, CGPA and backlogs are
+    recomputed for every student in the file, including when a later
+    line fails and the error (ValueError, UnicodeDecodeError or
+    csv.Error) propagates. Returns a report with per-row errors by line.
+    """
+    reader = csv.DictReader(lines)
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or ()]
+    missing = [name for name in REQUIRED_COLUMNS if name not in reader.fieldnames]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+
+    roll_numbers = dict(db.session.query(StudentProfile.roll_number, StudentProfile.id))
+    report = {'rows': 0, 'imported': 0, 'error_count': 0, 'errors': []}
+    students = set()
+
+    rows = ((reader.line_num, row) for row in reader)
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            report['rows'] += len(chunk)
+
+            # Later rows for the same subject and semester win
+            records = {}
+            for line, row in chunk:
+                record, error = _validate(row, roll_numbers)
+                if error:
+                    report['error_count'] += 1
+                    if len(report['errors']) < MAX_REPORTED_ERRORS:
+                        report['errors'].append({'line': line, 'error': error})
+                    continue
+                records[record['student_profile_id'], record['semester_number'], record['subject_code']] = record
+
+            if records:
+                semester_ids = _semester_ids(list({key[:2] for key in records}))
+                _upsert([
+                    {
+                        'semester_record_id': semester_ids[record.pop('student_profile_id'), record.pop('semester_number')],
+                        **record,
+                    }
+                    for record in records.values()
+                ])
+                db.session.commit()
+                report['imported'] += len(records)
+                students.update(key[0] for key in records)
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        # Recompute for the chunks already committed even when a later
+        # line fails to decode or parse
+        report['recomputed'] = recompute_results(students) if students else 0
+        if students:
+            # Command-line imports run without the commit listener that
+            # bumps cached tags, so the cached subject analytics would
+            # outlive the import on every worker
+            response_cache.invalidate('results')
+
+    report['students'] = len(students)
+    return report
+
+
+def _grouped_sum(groups, values, count):
+    return np.bincount(groups, weights=values, minlength=count)
+
+
+def recompute_results(student_profile_ids=None):
+    """Recompute SGPA, CGPA and backlogs from SubjectRecord.
+
+    One columnar fetch loads every subject result of the students (all
+    students when ``student_profile_ids`` is None); the sums are NumPy
+    grouped operations over those columns.
+
+    SGPA is the credit-weighted mean grade point of a semester's
+    subjects. CGPA after semester n is the same mean over every subject
+    in semesters 1..n. A semester's backlog_subjects counts its failed
+    subjects, while StudentProfile.current_backlog counts subjects whose
+    most recent attempt is still a fail. Results are written back with
+    batched executemany UPDATEs. Returns the number of students updated.
+    """
+    query = (
+        db.session.query(
+            SemesterRecord.id, SemesterRecord.student_profile_id, SemesterRecord.semester_number,
+            SubjectRecord.subject_code, SubjectRecord.credits, SubjectRecord.grade,
+        )
+        .join(SubjectRecord, SubjectRecord.semester_record_id == SemesterRecord.id)
+    )
+    if student_profile_ids is not None:
+        query = query.filter(SemesterRecord.student_profile_id.in_(list(student_profile_ids)))
+    rows = query.all()
+    if not rows:
+        return 0
+
+    semester_ids, student_ids, semester_numbers, subject_codes, credits, grades = zip(*rows)
+    credits = np.array([value or 0 for value in credits], dtype=np.float64)
+    points = np.array([GRADE_POINTS.get((grade or '').upper(), np.nan) for grade in grades])
+    graded = ~np.isnan(points)
+    failed = np.array([(grade or '').upper() in FAILING_GRADES for grade in grades])
+    weighted = np.where(graded, points, 0) * credits
+    graded_credits = np.where(graded, credits, 0)
+
+    # Per semester: SGPA and subject counts
+    semesters, semester_index = np.unique(np.array(semester_ids), return_inverse=True)
+    count = len(semesters)
+    semester_points = _grouped_sum(semester_index, weighted, count)
+    semester_credits = _grouped_sum(semester_index, graded_credits, count)
+    registered = np.bincount(semester_index, minlength=count)
+    backlogs = np.bincount(semester_index, weights=failed, minlength=count).astype(int)
+    cleared = np.bincount(semester_index, weights=graded & ~failed, minlength=count).astype(int)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sgpa = semester_points / semester_credits
+
+    # Per student: CGPA as running totals over semesters in order
+    semester_student = np.zeros(count, dtype=np.int64)
+    semester_number = np.zeros(count, dtype=np.int64)
+    semester_student[semester_index] = student_ids
+    semester_number[semester_index] = semester_numbers
+    order = np.lexsort((semester_number, semester_student))
+    running_points = np.cumsum(semester_points[order])
+    running_credits = np.cumsum(semester_credits[order])
+    first = np.r_[True, semester_student[order][1:] != semester_student[order][:-1]]
+    starts = np.maximum.accumulate(np.where(first, np.arange(count), 0))
+    before_points = np.where(starts > 0, running_points[starts - 1], 0)
+    before_credits = np.where(starts > 0, running_credits[starts - 1], 0)
+    cgpa = np.empty(count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cgpa[order] = (running_points - before_points) / (running_credits - before_credits)
+
+    # Per student: subjects whose latest attempt failed
+    students, student_index = np.unique(np.array(student_ids), return_inverse=True)
+    subjects, subject_index = np.unique(np.array(subject_codes, dtype=object).astype(str), return_inverse=True)
+    attempts = np.lexsort((np.array(semester_numbers), subject_index, student_index))
+    last = np.r_[
+        (student_index[attempts][1:] != student_index[attempts][:-1])
+        | (subject_index[attempts][1:] != subject_index[attempts][:-1]),
+        True,
+    ]
+    latest = attempts[last]
+    current_backlog = np.bincount(student_index[latest], weights=failed[latest], minlength=len(students)).astype(int)
+
+    def rounded(values, index):
+        return None if np.isnan(values[index]) else round(float(values[index]), 2)
+
+    semester_updates = [
+        {
+            'semester_id': int(semesters[index]),
+            'sgpa': rounded(sgpa, index),
+            'cgpa': rounded(cgpa, index),
+            'subjects_registered': int(registered[index]),
+            'subjects_cleared': int(cleared[index]),
+            'backlog_subjects': int(backlogs[index]),
+        }
+        for index in range(count)
+    ]
+    student_updates = [
+        {'student_id': int(student_id), 'current_backlog': int(backlog)}
+        for student_id, backlog in zip(students, current_backlog)
+    ]
+
+    semester_statement = (
+        update(_semesters).where(_semesters.c.id == bindparam('semester_id'))
+        .values({name: bindparam(name) for name in semester_updates[0] if name != 'semester_id'})
+    )
+    profiles = StudentProfile.__table__
+    student_statement = (
+        update(profiles).where(profiles.c.id == bindparam('student_id'))
+        .values(current_backlog=bindparam('current_backlog'))
+    )
+    for statement, batch in ((semester_statement, semester_updates), (student_statement, student_updates)):
+        for offset in range(0, len(batch), RESULTS_UPDATE_BATCH):
+            db.session.execute(statement, batch[offset:offset + RESULTS_UPDATE_BATCH])
+    db.session.commit()
+    return len(students)
+
+
+def _marks_summary(ids, values, bins):
+    """Distribution of one marks column, with IQR outliers by SubjectRecord id."""
+    present = ~np.isnan(values)
+    ids, values = ids[present], values[present]
+    if not values.size:
+        return {'count': 0}
+    q1, q3 = np.percentile(values, [25, 75])
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        'count': int(values.size),
+        'mean': round(float(values.mean()), 2),
+        'std': round(float(values.std()), 2),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'percentiles': {
+            f'p{rank}': round(float(value), 2)
+            for rank, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+        },
+        'histogram': {'edges': [round(float(edge), 2) for edge in edges], 'counts': counts.tolist()},
+        'outliers': {
+            'low': ids[values < low].tolist(),
+            'high': ids[values > high].tolist(),
+        },
+    }
+
+
+def subject_analytics(subject_code, semester_number=None, bins=ANALYTICS_BINS):
+    """Grade distribution, pass rate and marks statistics for one subject.
+
+    Loads the subject's results as columns in one query and computes
+    everything with NumPy. Marks outliers use the 1.5 x IQR rule and are
+    returned as SubjectRecord ids.
+    """
+    query = (
+        db.session.query(
+            SubjectRecord.id, SubjectRecord.grade, SubjectRecord.result_status,
+            SubjectRecord.internal_marks, SubjectRecord.external_marks, SubjectRecord.total_marks,
+        )
+        .filter(SubjectRecord.subject_code == subject_code)
+    )
+    if semester_number is not None:
+        query = (query.join(SemesterRecord, SemesterRecord.id == SubjectRecord.semester_record_id)
+                 .filter(SemesterRecord.semester_number == semester_number))
+    rows = query.all()
+
+    report = {'subject_code': subject_code, 'semester_number': semester_number, 'results': len(rows)}
+    if not rows:
+        return report
+
+    ids, grades, statuses, *marks = zip(*rows)
+    ids = np.array(ids)
+    grades = np.array([(grade or '').upper() for grade in grades], dtype=object)
+    statuses = np.array([status or '' for status in statuses], dtype=object)
+    passed = (statuses == 'Pass') | ((statuses == '') & np.isin(grades, list(GRADE_POINTS)) & ~np.isin(grades, list(FAILING_GRADES)))
+    points = np.array([GRADE_POINTS.get(grade, np.nan) for grade in grades])
+    graded = ~np.isnan(points)
+
+    report.update({
+        'pass_rate': round(float(passed.mean()) * 100, 2),
+        'average_grade_point': round(float(points[graded].mean()), 2) if graded.any() else None,
+        'grade_distribution': {grade: int(np.count_nonzero(grades == grade)) for grade in GRADE_POINTS},
+    })
+    for name, column in zip(MARK_COLUMNS, marks):
+        values = np.array([np.nan if value is None else value for value in column], dtype=np.float64)
+        report[name] = _marks_summary(ids, values, bins)
+    return report
@@ -0,0 +1,221 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from ..models.dcsa import DepartmentEvent
+from ..models.user import db
+
+# Length assumed for events submitted without an end date
+DEFAULT_EVENT_DURATION = timedelta(hours=2)
+
+# updated_at is stamped by the writing worker before its transaction
+# commits, so a row can become visible after rows stamped later than it.
+# Incremental reads therefore go back this far behind the watermark;
+# anything slower is caught by the periodic full reload.
+CHANGE_OVERLAP = timedelta(minutes=2)
+FULL_RELOAD_INTERVAL = timedelta(minutes=10)
+
+
+def changed_since(watermark):
+    """Lower bound on updated_at for an incremental read after ``watermark``."""
+    return max(watermark, datetime.min + CHANGE_OVERLAP) - CHANGE_OVERLAP
+
+
+def venue_key(venue):
+    """Normalise a venue name so "Seminar Hall" and "seminar hall " match."""
+    return ' '.join(venue.split()).casefold() if venue else None
+
+
+def event_interval(start, end):
+    """Half-open ``[start, end)`` booking interval for an event."""
+    if end is None or end <= start:
+        end = start + DEFAULT_EVENT_DURATION
+    return start, end
+
+
+class VenueIntervals:
+    """Bookings of one venue, sorted by start with a max-end segment tree.
+
+    Overlap queries binary-search the bookings that start before the
+    query ends, then walk only the tree nodes whose latest end falls
+    after the query starts: O(log n + k) for k overlaps. Inserts and
+    removals keep the list sorted and mark the tree for a lazy O(n)
+    rebuild on the next query.
+    """
+
+    def __init__(self):
+        self.items = []  # (start, end, event_id), sorted
+        self._tree = None
+        self._size = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, start, end, event_id):
+        insort(self.items, (start, end, event_id))
+        self._tree = None
+
+    def remove(self, start, end, event_id):
+        position = bisect_left(self.items, (start, end, event_id))
+        if position < len(self.items) and self.items[position] == (start, end, event_id):
+            del self.items[position]
+            self._tree = None
+
+    def _build(self):
+        size = 1
+        while size < len(self.items):
+            size *= 2
+        tree = [datetime.min] * (2 * size)
+        for position, (_, end, _) in enumerate(self.items):
+            tree[size + position] = end
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._tree, self._size = tree, size
+
+    def overlapping(self, start, end):
+        """Bookings that overlap ``[start, end)``, ordered by start."""
+        limit = bisect_left(self.items, end, key=lambda item: item[0])
+        if not limit:
+            return []
+        if self._tree is None:
+            self._build()
+
+        found = []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or self._tree[node] <= start:
+                continue
+            if high - low == 1:
+                found.append(low)
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+        return [self.items[position] for position in sorted(found)]
+
+
+class VenueSchedule:
+    """Per-venue interval index of approved events.
+
+    The first query loads every approved event with a venue in one
+    select. Afterwards each query first pulls only the events whose
+    updated_at is at or after the last one seen (less CHANGE_OVERLAP),
+    so edits and moderation made by other workers are picked up without
+    a rebuild; the whole index is still reloaded every
+    FULL_RELOAD_INTERVAL. ``apply`` updates the index immediately after
+    a local change.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._venues, self._events = {}, {}
+        self._watermark, self._loaded, self._loaded_at = None, False, None
+
+    def _rows(self, since=None):
+        query = db.session.query(
+            DepartmentEvent.id,
+            DepartmentEvent.venue,
+            DepartmentEvent.start_date,
+            DepartmentEvent.end_date,
+            DepartmentEvent.status,
+            DepartmentEvent.updated_at,
+        )
+        if since is None:
+            query = query.filter(
+                DepartmentEvent.status == 'approved',
+                DepartmentEvent.venue.isnot(None),
+                DepartmentEvent.start_date.isnot(None),
+            )
+        else:
+            # Rows inside the overlap are re-read; applying a row twice is harmless
+            query = query.filter(DepartmentEvent.updated_at >= since)
+        # Only committed state belongs in the index; never flush a
+        # caller's pending changes into this read
+        with db.session.no_autoflush:
+            return query.all()
+
+    def _apply_row(self, event_id, venue, start, end, status, updated_at):
+        previous = self._events.pop(event_id, None)
+        if previous:
+            key, old_start, old_end = previous
+            intervals = self._venues[key]
+            intervals.remove(old_start, old_end, event_id)
+            if not intervals:
+                del self._venues[key]
+
+        key = venue_key(venue)
+        if status == 'approved' and key and start:
+            start, end = event_interval(start, end)
+            self._venues.setdefault(key, VenueIntervals()).add(start, end, event_id)
+            self._events[event_id] = (key, start, end)
+
+        if updated_at and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def refresh(self):
+        with self._lock:
+            if self._loaded and datetime.utcnow() - self._loaded_at >= FULL_RELOAD_INTERVAL:
+                self._reset()
+            if not self._loaded:
+                # Take the watermark first so changes made during the load
+                # are picked up by the next refresh
+                with db.session.no_autoflush:
+                    watermark = db.session.query(func.max(DepartmentEvent.updated_at)).scalar()
+                for row in self._rows():
+                    self._apply_row(*row)
+                self._watermark = max(filter(None, (watermark, self._watermark)), default=datetime.min)
+                self._loaded, self._loaded_at = True, datetime.utcnow()
+                return
+            for row in self._rows(since=changed_since(self._watermark)):
+                self._apply_row(*row)
+
+    def apply(self, event):
+        """Reflect a committed change to ``event`` in the index."""
+        with self._lock:
+            if self._loaded:
+                self._apply_row(event.id, event.venue, event.start_date, event.end_date,
+                                event.status, event.updated_at)
+
+    def rebuild(self):
+        with self._lock:
+            self._reset()
+            self.refresh()
+
+    def conflicts(self, venue, start, end, exclude_id=None):
+        """Ids of approved events booked at ``venue`` overlapping the interval."""
+        key = venue_key(venue)
+        if not key or not start:
+            return []
+        start, end = event_interval(start, end)
+        self.refresh()
+        with self._lock:
+            intervals = self._venues.get(key)
+            if not intervals:
+                return []
+            return [event_id for _, _, event_id in intervals.overlapping(start, end) if event_id != exclude_id]
+
+    def free_slots(self, venue, start, end, min_duration=timedelta(0)):
+        """Gaps of at least ``min_duration`` at ``venue`` within ``[start, end)``."""
+        self.refresh()
+        with self._lock:
+            intervals = self._venues.get(venue_key(venue))
+            busy = intervals.overlapping(start, end) if intervals else []
+
+        slots = []
+        cursor = start
+        for busy_start, busy_end, _ in busy:
+            if busy_start > cursor and busy_start - cursor >= min_duration:
+                slots.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if end > cursor and end - cursor >= min_duration:
+            slots.append((cursor, end))
+        return slots
+
+
+venue_schedule = VenueSchedule()
@@ -0,0 +1,50 @@
+import base64
+import hashlib
+import hmac
+
+from flask import current_app
+
+# Bytes of the HMAC-SHA256 digest kept in a token
+SIGNATURE_BYTES = 16
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(purpose, payload, key=None):
+    key = key or current_app.config['SECRET_KEY']
+    if isinstance(key, str):
+        key = key.encode()
+    message = purpose.encode() + b'\x00' + payload
+    return hmac.new(key, message, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+def sign_token(purpose, *fields, key=None):
+    """Return a compact URL-safe token carrying ``fields``.
+
+    ``purpose`` is mixed into the signature so a token issued for one use
+    (say, event check-in) is rejected everywhere else.
+    """
+    payload = ':'.join(str(field) for field in fields).encode()
+    return f'{_b64encode(payload)}.{_b64encode(_signature(purpose, payload, key))}'
+
+
+def verify_token(purpose, token, key=None):
+    """Return the fields of a valid token as strings, or None.
+
+    Verification only needs the secret key, so it costs no database reads.
+    """
+    try:
+        payload_part, signature_part = token.split('.', 1)
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+    except (AttributeError, ValueError):
+        return None
+    if not hmac.compare_digest(signature, _signature(purpose, payload, key)):
+        return None
+    return payload.decode().split(':')
@@ -0,0 +1,90 @@
+import threading
+from collections import defaultdict
+from functools import wraps
+
+from flask import Response, current_app
+
+from .response_cache import request_cache_key
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent identical requests into one computation.
+
+    The first request for a key runs the view; requests for the same key
+    that arrive while it is running block until it finishes and receive a
+    copy of its response. Nothing is kept once the call completes, so this
+    only removes duplicate work that overlaps in time. Coordination is per
+    worker process.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {'executed': 0, 'coalesced': 0, 'errors': 0})
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            with self._lock:
+                self._counters[key[0]]['coalesced'] += 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                counters = self._counters[key[0]]
+                counters['executed'] += 1
+                if call.error is not None:
+                    counters['errors'] += 1
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'endpoints': {endpoint: dict(counters) for endpoint, counters in self._counters.items()},
+            }
+
+
+single_flight_group = SingleFlight()
+
+
+def single_flight(view):
+    """Share one in-flight execution of ``view`` between identical requests.
+
+    Requests are identical when they hit the same endpoint with the same
+    view and query arguments. The leader's response is materialized so
+    every caller gets its own ``Response`` object.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        def compute():
+            response = current_app.make_response(view(*args, **kwargs))
+            return response.get_data(), response.status_code, list(response.headers.items())
+
+        body, status, headers = single_flight_group.do(request_cache_key(), compute)
+        return Response(body, status=status, headers=headers)
+    return wrapper
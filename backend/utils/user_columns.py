@@ -0,0 +1,284 @@
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models.user import User, db
+from .response_cache import response_cache, watch_tags
+
+# Sentinel stored in integer columns where the database value is NULL
+MISSING = -1
+
+INT_COLUMNS = ('batch_year', 'graduation_year', 'placement_year', 'course_id')
+BOOL_COLUMNS = ('is_alumni', 'is_faculty')
+FLOAT_COLUMNS = ('cgpa',)
+DICT_COLUMNS = ('placement_company',)
+
+_LOADED = (User.id,) + tuple(
+    getattr(User, name) for name in BOOL_COLUMNS + INT_COLUMNS + FLOAT_COLUMNS + DICT_COLUMNS
+)
+
+
+class UserColumns:
+    """Immutable columnar snapshot of the user fields used by analytics.
+
+    Rows are sorted by user id. Integer and boolean columns (the latter
+    stored as 0/1 int8) hold ``MISSING`` for NULL, ``cgpa`` holds NaN, and ``placement_company`` holds codes into
+    ``dictionaries['placement_company']`` (``MISSING`` for NULL). Column
+    arrays are public and may be combined with ordinary NumPy expressions;
+    the helpers below cover the common aggregations.
+    """
+
+    def __init__(self, ids, columns, dictionaries):
+        self.ids = ids
+        self.columns = columns
+        self.dictionaries = dictionaries
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['columns'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def code_for(self, column, value):
+        """Return the dictionary code of ``value``, or ``None`` if it never occurs."""
+        try:
+            return self.dictionaries[column].index(value)
+        except ValueError:
+            return None
+
+    def decode(self, column, code):
+        return self.dictionaries[column][code] if code != MISSING else None
+
+    def where(self, mask=None, **conditions):
+        """Build a row mask from equality conditions.
+
+        ``None`` matches NULL; strings are matched against the column's
+        dictionary. An existing ``mask`` is narrowed rather than replaced.
+        """
+        result = np.ones(len(self), dtype=bool) if mask is None else mask.copy()
+        for name, value in conditions.items():
+            column = self.columns[name]
+            if name in DICT_COLUMNS and value is not None:
+                value = self.code_for(name, value)
+                if value is None:
+                    return np.zeros(len(self), dtype=bool)
+            if value is None:
+                result &= np.isnan(column) if name in FLOAT_COLUMNS else column == MISSING
+            else:
+                result &= column == value
+        return result
+
+    def present(self, name, mask=None):
+        """Mask of rows where ``name`` is not NULL."""
+        column = self.columns[name]
+        present = ~np.isnan(column) if name in FLOAT_COLUMNS else column != MISSING
+        return present if mask is None else present & mask
+
+    def count(self, mask=None):
+        return len(self) if mask is None else int(np.count_nonzero(mask))
+
+    def values(self, name, mask=None, missing_as=None):
+        column = self.columns[name]
+        if mask is not None:
+            column = column[mask]
+        if missing_as is not None and name in FLOAT_COLUMNS:
+            column = np.nan_to_num(column, nan=missing_as)
+        return column
+
+    def mean(self, name, mask=None, missing_as=0.0):
+        values = self.values(name, mask, missing_as=missing_as)
+        return float(values.mean()) if len(values) else 0
+
+    def group_count(self, by, mask=None):
+        """Count rows per non-NULL value of ``by``."""
+        keys = self.columns[by][self.present(by, mask)]
+        uniques, counts = np.unique(keys, return_counts=True)
+        return {self._key(by, key): int(count) for key, count in zip(uniques, counts)}
+
+    def group_mean(self, name, by, mask=None, missing_as=0.0):
+        """Average ``name`` per non-NULL value of ``by``."""
+        rows = self.present(by, mask)
+        keys = self.columns[by][rows]
+        uniques, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        sums = np.bincount(inverse, weights=self.values(name, rows, missing_as=missing_as), minlength=len(uniques))
+        return {self._key(by, key): float(total / count) for key, total, count in zip(uniques, sums, counts)}
+
+    def histogram(self, name, edges, mask=None):
+        """Count values into half-open buckets ``[edges[i], edges[i + 1])``."""
+        values = self.values(name, self.present(name, mask))
+        buckets = np.searchsorted(edges, values, side='right') - 1
+        buckets = buckets[(buckets >= 0) & (buckets < len(edges) - 1)]
+        return np.bincount(buckets, minlength=len(edges) - 1)
+
+    def top_k(self, name, k, mask=None, missing_as=0.0):
+        """Return ``(user_id, value)`` pairs for the ``k`` largest values of ``name``.
+
+        NULLs rank as ``missing_as`` but are returned as ``None``.
+        """
+        ids = self.ids if mask is None else self.ids[mask]
+        raw = self.values(name, mask)
+        values = self.values(name, mask, missing_as=missing_as)
+        if len(values) > k:
+            top = np.argpartition(-values, k)[:k]
+        else:
+            top = np.arange(len(values))
+        top = top[np.argsort(-values[top], kind='stable')]
+        return [(int(ids[i]), self._value(name, raw[i])) for i in top]
+
+    def top_groups(self, by, k, mask=None):
+        """Return the ``k`` most frequent non-NULL values of ``by`` with their counts."""
+        keys = self.columns[by][self.present(by, mask)]
+        uniques, counts = np.unique(keys, return_counts=True)
+        order = np.argsort(-counts, kind='stable')[:k]
+        return [(self._key(by, uniques[i]), int(counts[i])) for i in order]
+
+    def _value(self, column, value):
+        if column in FLOAT_COLUMNS:
+            return None if np.isnan(value) else float(value)
+        return None if value == MISSING else value.item()
+
+    def _key(self, column, key):
+        if column in DICT_COLUMNS:
+            return self.dictionaries[column][key]
+        return key.item()
+
+
+def _encode(values, dictionary, index):
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = MISSING
+            continue
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(dictionary)
+            dictionary.append(value)
+        codes[i] = code
+    return codes
+
+
+def _build_columns(rows, dictionaries):
+    """Turn ``(id, *fields)`` rows into column arrays, extending ``dictionaries`` in place."""
+    fields = list(zip(*rows)) if rows else [()] * len(_LOADED)
+    ids = np.fromiter(fields[0], dtype=np.int64, count=len(rows))
+    columns = {}
+    offset = 1
+    for name in BOOL_COLUMNS:
+        # NULL stays distinct from False, so where(is_alumni=False) matches
+        # what filter_by(is_alumni=False) would
+        columns[name] = np.fromiter((MISSING if v is None else v for v in fields[offset]), dtype=np.int8, count=len(rows))
+        offset += 1
+    for name in INT_COLUMNS:
+        columns[name] = np.fromiter((MISSING if v is None else v for v in fields[offset]), dtype=np.int32, count=len(rows))
+        offset += 1
+    for name in FLOAT_COLUMNS:
+        columns[name] = np.fromiter((np.nan if v is None else v for v in fields[offset]), dtype=np.float64, count=len(rows))
+        offset += 1
+    for name in DICT_COLUMNS:
+        dictionary = dictionaries.setdefault(name, [])
+        index = {value: code for code, value in enumerate(dictionary)}
+        columns[name] = _encode(fields[offset], dictionary, index)
+        offset += 1
+    return ids, columns
+
+
+class UserColumnStore:
+    """Process-wide holder of the current ``UserColumns`` snapshot.
+
+    The snapshot is built with one bulk query on first use and remembers
+    the shared ``users`` cache generation it reflects. Committed writes to
+    ``User`` rows in this process mark their ids dirty and bump that
+    generation once per commit. ``snapshot()`` reads the generation: if
+    it moved only by this process's own commits, the dirty rows are
+    reloaded; if anything else (another worker, a Core update) moved it,
+    the snapshot is rebuilt. A full rebuild also happens after
+    ``USER_COLUMNS_MAX_AGE`` seconds, for writes made outside the app.
+    """
+
+    def __init__(self, app=None):
+        self._snapshot = None
+        self._built_at = 0.0
+        self._dirty = set()
+        self._generation = None
+        self._local_commits = 0
+        self._lock = threading.Lock()
+        self.max_age = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_age = app.config.get('USER_COLUMNS_MAX_AGE', self.max_age)
+        if not event.contains(Session, 'after_flush', _collect_dirty_users):
+            event.listen(Session, 'after_flush', _collect_dirty_users)
+            event.listen(Session, 'after_commit', _mark_dirty_users)
+        watch_tags('users')
+        app.extensions['user_columns'] = self
+
+    def mark_dirty(self, ids):
+        with self._lock:
+            self._dirty.update(ids)
+            self._local_commits += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def snapshot(self):
+        generation = response_cache.generation(('users',))
+        with self._lock:
+            expected = None if self._generation is None else (self._generation[0] + self._local_commits,)
+            if (self._snapshot is None or generation != expected
+                    or time.monotonic() - self._built_at > self.max_age):
+                self._snapshot = self._build()
+                self._built_at = time.monotonic()
+            elif self._dirty:
+                self._snapshot = self._patch(self._snapshot, self._dirty)
+            # Read before the rows, so a write landing during the load
+            # forces another rebuild rather than going unseen
+            self._generation, self._local_commits, self._dirty = generation, 0, set()
+            return self._snapshot
+
+    def _build(self):
+        rows = db.session.query(*_LOADED).order_by(User.id).all()
+        dictionaries = {}
+        ids, columns = _build_columns(rows, dictionaries)
+        return UserColumns(ids, columns, dictionaries)
+
+    def _patch(self, snapshot, dirty):
+        dirty_ids = np.array(sorted(dirty), dtype=np.int64)
+        rows = db.session.query(*_LOADED).filter(User.id.in_(dirty_ids.tolist())).order_by(User.id).all()
+        dictionaries = {name: list(values) for name, values in snapshot.dictionaries.items()}
+        fresh_ids, fresh = _build_columns(rows, dictionaries)
+
+        # Drop every dirty row, then merge the reloaded ones back in id order.
+        # Ids that were dirty but not reloaded have been deleted.
+        keep = ~np.isin(snapshot.ids, dirty_ids)
+        ids = np.concatenate([snapshot.ids[keep], fresh_ids])
+        order = np.argsort(ids, kind='stable')
+        columns = {
+            name: np.concatenate([column[keep], fresh[name]])[order]
+            for name, column in snapshot.columns.items()
+        }
+        return UserColumns(ids[order], columns, dictionaries)
+
+
+user_columns = UserColumnStore()
+
+
+def _collect_dirty_users(session, flush_context):
+    ids = session.info.setdefault('user_columns_dirty', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            ids.add(obj.id)
+
+
+def _mark_dirty_users(session):
+    ids = session.info.pop('user_columns_dirty', None)
+    if ids:
+        user_columns.mark_dirty(ids)
@@ -0,0 +1,10 @@
+# Read by gunicorn from the working directory; see the deployment command in .replit
+
+
+def post_worker_init(worker):
+    # gevent workers run every request, SSE stream and background thread
+    # as greenlets on one hub; make psycopg2 wait through the hub instead
+    # of blocking the whole worker on each query
+    if worker.cfg.worker_class_str == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()